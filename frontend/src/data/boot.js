@@ -0,0 +1,34 @@
+import { reactive } from 'vue'
+
+// The current user, roles and capabilities, fetched once per page load and shared
+// by the router guard and every component that needs them
+export const boot = reactive({
+  data: null,
+  loaded: false,
+})
+
+let bootRequest = null
+
+export function loadBoot() {
+  if (!bootRequest) {
+    bootRequest = fetch('/api/method/oms.api.get_boot_info')
+      .then(async (response) => {
+        const data = response.ok ? await response.json() : null
+        boot.data = data?.message?.user_id ? data.message : null
+        boot.loaded = true
+        return boot.data
+      })
+      .catch((error) => {
+        // Let the next caller retry
+        bootRequest = null
+        throw error
+      })
+  }
+  return bootRequest
+}
+
+export function resetBoot() {
+  bootRequest = null
+  boot.data = null
+  boot.loaded = false
+}
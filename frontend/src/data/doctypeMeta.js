@@ -0,0 +1,117 @@
+// Precompiled DocType metadata (fields, link targets, child tables), kept in
+// localStorage across page loads and revalidated against the server's version
+// so an unchanged DocType costs a tiny "not modified" response
+
+const STORAGE_KEY = 'oms:doctype-meta'
+
+// DocTypes the generic form pages open, fetched in one call at app start
+export const FORM_DOCTYPES = ['Employee', 'Task', 'Issue', 'Timesheet']
+
+const store = readStore()
+const pending = {}
+// DocTypes already checked against the server during this page load
+const validated = new Set()
+let prefetchRequest = null
+
+function readStore() {
+  try {
+    return JSON.parse(localStorage.getItem(STORAGE_KEY)) || {}
+  } catch (error) {
+    return {}
+  }
+}
+
+function writeStore() {
+  try {
+    localStorage.setItem(STORAGE_KEY, JSON.stringify(store))
+  } catch (error) {
+    // Storage full or disabled; the in-memory copy still works for this page load
+  }
+}
+
+function remember(doctype, meta) {
+  if (meta && meta.not_modified && store[doctype]) {
+    return store[doctype]
+  }
+  if (meta && Array.isArray(meta.fields)) {
+    store[doctype] = meta
+    return meta
+  }
+  return null
+}
+
+async function callApi(method, args) {
+  const response = await fetch(`/api/method/oms.api.${method}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'X-Frappe-CSRF-Token': window.csrf_token || '',
+    },
+    body: JSON.stringify(args),
+  })
+  const data = await response.json()
+  if (!data.message || data.message.error) {
+    throw new Error(data.message?.error || `${method} failed`)
+  }
+  return data.message
+}
+
+/**
+ * Metadata for one DocType, revalidated at most once per page load
+ * @param {string} doctype - The doctype name
+ * @returns {Promise<Object>} - `{version, fields, links, tables, ...}`
+ */
+export async function getDoctypeMeta(doctype) {
+  if (prefetchRequest) {
+    await prefetchRequest
+  }
+  if (validated.has(doctype) && store[doctype]) {
+    return store[doctype]
+  }
+
+  if (!pending[doctype]) {
+    pending[doctype] = callApi('get_doctype_metadata', {
+      doctype,
+      version: store[doctype]?.version,
+    })
+      .then((meta) => {
+        const result = remember(doctype, meta)
+        writeStore()
+        validated.add(doctype)
+        return result
+      })
+      .finally(() => {
+        delete pending[doctype]
+      })
+  }
+  return pending[doctype]
+}
+
+/**
+ * Revalidate several DocTypes in one request, e.g. right after login
+ * @param {Array<string>} doctypes - The doctype names
+ */
+export function prefetchDoctypeMeta(doctypes = FORM_DOCTYPES) {
+  if (!prefetchRequest) {
+    const versions = {}
+    doctypes.forEach((doctype) => {
+      if (store[doctype]?.version) {
+        versions[doctype] = store[doctype].version
+      }
+    })
+
+    prefetchRequest = callApi('get_bulk_doctype_metadata', { doctypes, versions })
+      .then((metas) => {
+        Object.entries(metas).forEach(([doctype, meta]) => {
+          remember(doctype, meta)
+          validated.add(doctype)
+        })
+        writeStore()
+      })
+      .catch((error) => {
+        console.warn('Prefetching doctype metadata failed:', error)
+        prefetchRequest = null
+      })
+  }
+  return prefetchRequest
+}
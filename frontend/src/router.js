@@ -4,6 +4,8 @@ import Home from "@/pages/Home.vue"
 import Login from "@/pages/Login.vue"
 import Profile from "@/pages/Profile.vue"
 import LocationManager from "@/pages/LocationManager.vue"
+import { loadBoot } from "@/data/boot"
+import { prefetchDoctypeMeta } from "@/data/doctypeMeta"
 
 const universalDoctypes = [
   { name: "Issue", path: "issue" },
@@ -104,9 +106,12 @@ router.beforeEach(async (to, from, next) => {
 
 async function checkAuthStatus() {
   try {
-    const response = await fetch("/api/method/frappe.auth.get_logged_user")
-    const data = await response.json()
-    return data.message && data.message !== "Guest"
+    const bootInfo = await loadBoot()
+    if (bootInfo) {
+      // Warm the form metadata in the background; the forms revalidate it themselves otherwise
+      prefetchDoctypeMeta()
+    }
+    return !!bootInfo
   } catch (error) {
     return false
   }
@@ -114,9 +119,8 @@ async function checkAuthStatus() {
 
 async function getUserRoles() {
   try {
-    const response = await fetch("/api/method/oms.api.get_current_user_info")
-    const data = await response.json()
-    return data.message?.roles || []
+    const bootInfo = await loadBoot()
+    return bootInfo?.roles || []
   } catch (error) {
     return []
   }
@@ -0,0 +1,21 @@
+import { io } from 'socket.io-client'
+
+let socket = null
+
+// Shared connection to the Frappe socket.io server (one per tab)
+export function initSocket() {
+  if (socket) return socket
+
+  const host = window.location.hostname
+  const siteName = window.site_name || host
+  // In development socket.io runs on its own port; in production it is proxied
+  const port = window.location.port ? `:${window.socketio_port || 9000}` : ''
+  const protocol = port ? 'http' : 'https'
+
+  socket = io(`${protocol}://${host}${port}/${siteName}`, {
+    withCredentials: true,
+    reconnectionAttempts: 5,
+  })
+
+  return socket
+}
@@ -1,3 +1,5 @@
+import { getDoctypeMeta } from "@/data/doctypeMeta"
+
 // Cache for API responses
 const apiCache = {
   doctypeFields: {},
@@ -162,26 +164,19 @@ async function fetchDoctypeFields(doctype) {
     // 1. Try the custom API first (if available)
     try {
       console.log(`Trying custom API for ${doctype}...`)
-      const customResponse = await fetch("/api/method/oms.api.get_doctype_fields", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ doctype }),
-        credentials: "include",
-      })
-
-      if (customResponse.ok) {
-        const data = await customResponse.json()
-        if (data && data.message && Array.isArray(data.message)) {
-          console.log(`Custom API returned ${data.message.length} fields`)
-
-          // Add fields from custom API
-          data.message.forEach((field) => {
-            if (field && field.fieldname && !processedFieldnames.has(field.fieldname)) {
-              allResults.fields.push(field)
-              processedFieldnames.add(field.fieldname)
-            }
-          })
-        }
+      const doctypeMeta = await getDoctypeMeta(doctype)
+      if (doctypeMeta) {
+        console.log(`Custom API returned ${doctypeMeta.fields.length} fields`)
+
+        // Add fields from custom API; copies, since the merging below mutates them
+        doctypeMeta.fields.forEach((field) => {
+          if (field && field.fieldname && !processedFieldnames.has(field.fieldname)) {
+            allResults.fields.push({ ...field })
+            processedFieldnames.add(field.fieldname)
+          }
+        })
+        allResults.links = doctypeMeta.links
+        allResults.tables = doctypeMeta.tables
       }
     } catch (error) {
       console.warn("Custom API failed or not available:", error)
@@ -458,6 +453,37 @@ async function fetchLinkOptions(doctype, fields = ["name"], filters = {}, start
   }
 }
 
+/**
+ * Search options for a Link field, a page at a time (typeahead)
+ * @param {string} doctype - The linked doctype
+ * @param {string} txt - Prefix to match against the name and title fields
+ * @param {Object} options - Optional `fields`, `cursor` (from a previous page) and `limit`
+ * @returns {Promise<Object>} - `{ data, nextCursor }`
+ */
+async function searchLinkOptions(doctype, txt = "", { fields, cursor, limit = 20 } = {}) {
+  try {
+    const response = await fetch("/api/method/oms.api.search_link_options", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-Frappe-CSRF-Token": window.csrf_token || "",
+      },
+      body: JSON.stringify({ doctype, txt, fields, cursor, limit }),
+    })
+
+    const data = await response.json()
+
+    if (data.message && data.message.success) {
+      return { data: data.message.data, nextCursor: data.message.next_cursor }
+    }
+
+    return { data: [], nextCursor: null }
+  } catch (error) {
+    console.error(`Error searching options for ${doctype}:`, error)
+    return { data: [], nextCursor: null }
+  }
+}
+
 /**
  * Fetch client scripts for a doctype
  * @param {string} doctype - The doctype name
@@ -994,6 +1020,7 @@ export default {
   fetchDoctypeFields,
   getFieldPermissions,
   fetchLinkOptions,
+  searchLinkOptions,
   fetchClientScripts,
   fetchDocument,
   fetchDocumentList,
@@ -1,460 +1,773 @@
-import frappe
-from frappe import _
-
 import json
 from datetime import datetime
 
+import frappe
+from frappe import _
 
-@frappe.whitelist()
-def get_current_user_info() -> dict:
-	current_user = frappe.session.user
-	user = frappe.db.get_value(
-		"User", current_user, ["name", "first_name", "full_name", "user_image"], as_dict=True
-	)
-	user["roles"] = frappe.get_roles(current_user)
-
-	return user
+from oms.utils.boot import get_boot
+from oms.utils.capabilities import can_view_all_locations
+from oms.utils.doctype_meta import MAX_BULK_DOCTYPES, get_doctype_meta, get_doctypes_meta
+from oms.utils.instrumentation import clear_api_stats, get_api_profiles, get_endpoint_stats, instrument
+from oms.utils.last_location import get_last_location_changes, get_last_locations, get_user_last_location
+from oms.utils.link_search import find_link_options
+from oms.utils.location_daily import get_daily_summaries, get_department_rollups
+from oms.utils.location_export import (
+    build_download_response,
+    get_creation_range,
+    get_export_writer,
+    iter_location_rows,
+)
+from oms.utils.location_filter import get_filter_stats
+from oms.utils.location_ingest import (
+    MAX_BATCH_SIZE,
+    insert_fixes,
+    make_fix_row,
+    parse_coordinates,
+    validate_fixes,
+)
+from oms.utils.location_queue import enqueue_fixes, get_queue_stats
+from oms.utils.location_realtime import make_map_update
+from oms.utils.location_retention import get_summary_history
+from oms.utils.location_simplify import simplify_track
+from oms.utils.location_spatial import find_in_bbox, find_in_polygon, find_within_radius, parse_polygon
+from oms.utils.pagination import clamp_page_size, decode_cursor, encode_cursor, fetch_page
+from oms.utils.time_ago import add_time_ago, time_ago
+from oms.utils.user_profile import get_department_users, get_user_profile, get_user_profiles
 
 
 @frappe.whitelist()
+@instrument
 def get_employee_details():
     """Fetch Employee details for the logged-in user"""
     current_user = frappe.session.user
 
-    employee = frappe.db.get_value(
-        "Employee", 
-        {"user_id": current_user},
-        ["name", "employee_name", "designation", "department", "company"], 
-        as_dict=True
-    )
+    profile = get_user_profile(current_user)
 
-    if not employee:
+    if not profile.get("employee"):
         frappe.throw("Employee record not found for the logged-in user", frappe.DoesNotExistError)
 
-    return employee
+    return frappe._dict(
+        name=profile["employee"],
+        employee_name=profile["employee_name"],
+        designation=profile["designation"],
+        department=profile["department"],
+        company=profile["company"],
+    )
 
 
 
 @frappe.whitelist()
+@instrument
 def get_doctype_fields(doctype):
     """
     Get all fields for a doctype
     """
     try:
-        # Get doctype fields
-        meta = frappe.get_meta(doctype)
-        fields = meta.fields
-
-        
-        # Convert to list of dicts for easier handling in frontend
-        field_list = []
-        for field in fields:
-            if field.fieldname in ['naming_series', 'amended_from']:
-                continue
-                
-            field_dict = {
-                "fieldname": field.fieldname,
-                "fieldtype": field.fieldtype,
-                "label": field.label,
-                "reqd": field.reqd,
-                "hidden": field.hidden,
-                "read_only": field.read_only,
-                "options": field.options,
-                "default": field.default,
-                "description": field.description,
-                "idx": field.idx
-            }
-            field_list.append(field_dict)
-        
-        return field_list
+        return get_doctype_meta(doctype)["fields"]
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), _("Error in get_doctype_fields"))
         return {"error": str(e)}
 
+
 @frappe.whitelist()
-def get_link_options(doctype, fields=None):
+@instrument
+def get_doctype_metadata(doctype, version=None):
     """
-    Get options for Link fields
+    Get the precompiled field list, link targets and child tables for a doctype.
+    Pass the `version` from an earlier response to get `not_modified` back instead
+    of the full payload when nothing changed.
     """
     try:
-        if not fields:
-            fields = ["name"]
-        
-        # Get list of documents
-        docs = frappe.get_list(doctype, fields=fields, limit=50)
-        
+        return get_doctype_meta(doctype, version)
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), _("Error in get_doctype_metadata"))
+        return {"error": str(e)}
+
+
+@frappe.whitelist()
+@instrument
+def get_bulk_doctype_metadata(doctypes, versions=None):
+    """
+    Same as get_doctype_metadata for several doctypes in one call, e.g. at app start.
+    `versions` maps doctypes to the version the client already has.
+    """
+    try:
+        doctypes = frappe.parse_json(doctypes) if isinstance(doctypes, str) else doctypes
+        versions = frappe.parse_json(versions) if isinstance(versions, str) else versions
+
+        if not isinstance(doctypes, list) or not doctypes:
+            return {"error": "doctypes must be a non-empty list"}
+        if len(doctypes) > MAX_BULK_DOCTYPES:
+            return {"error": f"At most {MAX_BULK_DOCTYPES} doctypes per request"}
+
+        return get_doctypes_meta(doctypes, versions)
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), _("Error in get_bulk_doctype_metadata"))
+        return {"error": str(e)}
+
+@frappe.whitelist()
+@instrument
+def get_link_options(doctype, fields=None, txt=None):
+    """
+    Get options for Link fields (first 50 matches; see search_link_options for paging)
+    """
+    try:
+        fields = frappe.parse_json(fields) if isinstance(fields, str) else fields
+        docs, _next_cursor = find_link_options(doctype, txt=txt, fields=fields, limit=50)
+
         return docs
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), _("Error in get_link_options"))
         return {"error": str(e)}
 
 
+@frappe.whitelist()
+@instrument
+def search_link_options(doctype, txt=None, fields=None, cursor=None, limit=20):
+    """
+    Typeahead for Link fields: documents whose name or title starts with `txt`,
+    a page at a time. Pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        fields = frappe.parse_json(fields) if isinstance(fields, str) else fields
+
+        rows, next_cursor = find_link_options(doctype, txt=txt, fields=fields, after=cursor, limit=limit)
+
+        return {"success": True, "data": rows, "next_cursor": next_cursor}
+    except frappe.PermissionError:
+        return {"success": False, "message": f"Not permitted to read {doctype}"}
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), _("Error in search_link_options"))
+        return {"success": False, "message": str(e)}
+
+
 
 # ==================== LOCATION TRACKING APIs ====================
 
 @frappe.whitelist()
+@instrument
 def save_user_location(latitude, longitude, accuracy=None, address=None, device_info=None, manual_refresh=False):
     """Save user location to User Location Log doctype with better error handling"""
     try:
         user = frappe.session.user
-        
+
         if user == "Guest":
             return {"success": False, "message": "Authentication required"}
-        
+
         # Validate coordinates
         try:
-            lat = float(latitude)
-            lng = float(longitude)
-            acc = float(accuracy) if accuracy else None
-        except (ValueError, TypeError):
-            return {"success": False, "message": "Invalid coordinate values"}
-        
-        # Validate coordinate ranges
-        if not (-90 <= lat <= 90):
-            return {"success": False, "message": "Latitude must be between -90 and 90"}
-        
-        if not (-180 <= lng <= 180):
-            return {"success": False, "message": "Longitude must be between -180 and 180"}
-        
-        # Prepare device info (limit to essential data to avoid truncation)
-        device_data = {}
-        if device_info:
-            try:
-                full_device_info = json.loads(device_info) if isinstance(device_info, str) else device_info
-                # Keep only essential info to avoid field length issues
-                device_data = {
-                    "browser": full_device_info.get("userAgent", "")[:50],
-                    "platform": full_device_info.get("platform", "")[:30],
-                    "language": full_device_info.get("language", "")[:10],
-                    "timestamp": full_device_info.get("timestamp", "")
-                }
-            except:
-                device_data = {"info": str(device_info)[:100]}
-        
-        # Create location data for Geolocation field
-        location_data = {
-            "type": "FeatureCollection",
-            "features": [{
-                "type": "Feature",
-                "properties": {
-                    "name": f"Location for {user}",
-                    "address": address or "",
-                    "manual": manual_refresh
-                },
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [lng, lat]
+            lat, lng, acc = parse_coordinates(latitude, longitude, accuracy)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
+        # Coordinates are validated above, so write through the trusted fast path
+        row = make_fix_row(lat, lng, acc, address, device_info, manual_refresh)
+
+        if enqueue_fixes(user, [row]):
+            # Write-behind mode: stored (or suppressed) by the ingest queue consumer
+            return {
+                "success": True,
+                "message": "Location queued",
+                "data": {
+                    "name": None,
+                    "queued": True,
+                    "latitude": row["latitude"],
+                    "longitude": row["longitude"],
+                    "timestamp": row["timestamp"],
+                    "address": row["address"]
                 }
-            }]
-        }
-        
-        # Create new location log entry
-        doc = frappe.get_doc({
-            "doctype": "User Location Log",
-            "user": user,
-            "latitude": lat,
-            "longitude": lng,
-            "accuracy_meters": acc,
-            "address": address,
-            "device_info": json.dumps(device_data),
-            "manual_refresh": 1 if manual_refresh else 0,
-            "location": json.dumps(location_data),
-            "timestamp": frappe.utils.now(),
-            "session_id": frappe.session.sid,
-            "ip_address": frappe.local.request_ip,
-        })
-        
-        doc.insert(ignore_permissions=True)
+            }
+
+        logs = insert_fixes(user, [row])
         frappe.db.commit()
-        
+
+        if not logs:
+            # Too close to the last stored position (or too inaccurate); only last seen was updated
+            return {
+                "success": True,
+                "message": "Location unchanged",
+                "data": {
+                    "name": None,
+                    "suppressed": row["suppressed"],
+                    "latitude": row["latitude"],
+                    "longitude": row["longitude"],
+                    "timestamp": row["timestamp"],
+                    "address": row["address"]
+                }
+            }
+
+        log = logs[0]
         return {
-            "success": True, 
+            "success": True,
             "message": "Location saved successfully",
             "data": {
-                "name": doc.name,
-                "latitude": doc.latitude,
-                "longitude": doc.longitude,
-                "timestamp": doc.timestamp,
-                "address": doc.address
+                "name": log.name,
+                "latitude": log.latitude,
+                "longitude": log.longitude,
+                "timestamp": log.timestamp,
+                "address": log.address
             }
         }
-        
+
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Failed to save user location")
         return {"success": False, "message": f"Error saving location: {str(e)}"}
 
 
 @frappe.whitelist()
-def get_user_locations(user_filter=None, limit=50):
-    """Get location data for users based on role permissions"""
+@instrument
+def save_user_locations(fixes):
+    """Save a batch of queued location fixes for the current user in a single transaction"""
+    try:
+        user = frappe.session.user
+
+        if user == "Guest":
+            return {"success": False, "message": "Authentication required"}
+
+        fixes = frappe.parse_json(fixes) if isinstance(fixes, str) else fixes
+
+        if not isinstance(fixes, list):
+            return {"success": False, "message": "Expected a list of locations"}
+
+        if len(fixes) > MAX_BATCH_SIZE:
+            return {"success": False, "message": f"A batch can contain at most {MAX_BATCH_SIZE} locations"}
+
+        rows, results = validate_fixes(fixes)
+
+        if enqueue_fixes(user, rows):
+            for row in rows:
+                results[row["index"]]["queued"] = True
+
+            return {
+                "success": True,
+                "message": f"Queued {len(rows)} of {len(fixes)} locations",
+                "data": {
+                    "results": results,
+                    "queued": len(rows),
+                    "saved": 0,
+                    "suppressed": 0,
+                    "failed": len(fixes) - len(rows)
+                }
+            }
+
+        logs = insert_fixes(user, rows)
+        frappe.db.commit()
+
+        for row in rows:
+            results[row["index"]]["name"] = row.get("name")
+            if row.get("suppressed"):
+                results[row["index"]]["suppressed"] = row["suppressed"]
+
+        return {
+            "success": True,
+            "message": f"Saved {len(logs)} of {len(fixes)} locations",
+            "data": {
+                "results": results,
+                "saved": len(logs),
+                "suppressed": len(rows) - len(logs),
+                "failed": len(fixes) - len(rows)
+            }
+        }
+
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "Failed to save user locations")
+        return {"success": False, "message": f"Error saving locations: {str(e)}"}
+
+
+@frappe.whitelist()
+@instrument
+def get_user_locations(user_filter=None, limit=50, cursor=None, time_format=None):
+    """Get location data for users based on role permissions
+
+    Pass the returned `next_cursor` back as `cursor` for the next page. With
+    `time_format="epoch"` rows carry `epoch_ms` instead of a `time_ago` label.
+    """
     try:
         current_user = frappe.session.user
-        user_roles = frappe.get_roles(current_user)
-        
-        # Check if user has permission to view other users' locations
-        can_view_all = any(role in ["System Manager", "Location Manager", "Manager"] for role in user_roles)
-        
-        # Build filters
-        filters = {}
-        
-        if not can_view_all:
-            # Regular users can only see their own location
-            filters["user"] = current_user
-        elif user_filter:
-            # Managers can filter by specific user
-            filters["user"] = user_filter
-        
+        can_view_all = can_view_all_locations(current_user)
+
+        try:
+            after, _source = decode_cursor(cursor) if cursor else (None, None)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
         # Get latest location for each user
         if can_view_all and not user_filter:
-            # Get latest location for each user using SQL
-            sql_query = """
-                SELECT ul1.* 
-                FROM `tabUser Location Log` ul1
-                INNER JOIN (
-                    SELECT user, MAX(creation) as max_creation
-                    FROM `tabUser Location Log`
-                    GROUP BY user
-                ) ul2 ON ul1.user = ul2.user AND ul1.creation = ul2.max_creation
-                ORDER BY ul1.creation DESC
-                LIMIT %s
-            """
-            locations = frappe.db.sql(sql_query, (limit,), as_dict=True)
+            # Latest location per user is maintained in User Last Location on every insert
+            locations, has_more = get_last_locations(limit, after=after)
+            next_cursor = encode_cursor([locations[-1].creation, locations[-1].user]) if has_more else None
         else:
-            # Get locations for specific user or current user
-            locations = frappe.get_all(
-                "User Location Log",
-                fields=["*"],
-                filters=filters,
-                order_by="creation desc",
+            # Regular users can only see their own location; managers can filter by a specific user
+            target_user = user_filter if can_view_all else current_user
+
+            locations, has_more = fetch_page(
+                "tabUser Location Log",
+                "*",
+                ["user = %(user)s"],
+                {"user": target_user},
+                after=after,
                 limit=limit
             )
-        
-        # Enhance with user details
-        enhanced_locations = []
+            next_cursor = encode_cursor([locations[-1].creation, locations[-1].name]) if has_more else None
+
+        # Enhance with user details, fetched for the whole page at once; rows are updated in place
+        profiles = get_user_profiles([location["user"] for location in locations])
+
         for location in locations:
-            try:
-                user_details = frappe.get_value(
-                    "User", 
-                    location["user"], 
-                    ["full_name", "user_image"], 
-                    as_dict=True
-                ) or {}
-                
-                # Try to get employee details
-                employee_details = frappe.get_value(
-                    "Employee",
-                    {"user_id": location["user"]},
-                    ["employee_name", "designation", "department"],
-                    as_dict=True
-                ) or {}
-                
-                enhanced_location = {
-                    **location,
-                    "full_name": user_details.get("full_name", location["user"]),
-                    "user_image": user_details.get("user_image"),
-                    "employee_name": employee_details.get("employee_name"),
-                    "designation": employee_details.get("designation"),
-                    "department": employee_details.get("department"),
-                    "time_ago": get_time_ago(location.get("creation") or location.get("timestamp"))
-                }
-                
-                enhanced_locations.append(enhanced_location)
-            except Exception as e:
-                # If there's an error with user details, still include the location
-                location["time_ago"] = get_time_ago(location.get("creation") or location.get("timestamp"))
-                enhanced_locations.append(location)
-        
+            profile = profiles.get(location["user"]) or {}
+
+            location.update(
+                full_name=profile.get("full_name") or location["user"],
+                user_image=profile.get("user_image"),
+                employee_name=profile.get("employee_name"),
+                designation=profile.get("designation"),
+                department=profile.get("department")
+            )
+
+        add_time_ago(locations, epoch=time_format == "epoch")
+
         return {
-            "success": True, 
-            "data": enhanced_locations,
-            "can_view_all": can_view_all
+            "success": True,
+            "data": locations,
+            "can_view_all": can_view_all,
+            "next_cursor": next_cursor
         }
-        
+
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Failed to get user locations")
         return {"success": False, "message": str(e)}
 
 
 @frappe.whitelist()
-def get_location_history(user_id=None, from_date=None, to_date=None, limit=100):
-    """Get location history for a user"""
+@instrument
+def get_location_updates(cursor=None, limit=500):
+    """Latest positions that changed after `cursor`, for the live map (managers only)
+
+    Pass the returned `next_cursor` back as `cursor` on the next poll; with no
+    `cursor` every position is returned. `has_more` means another page is ready now.
+    """
     try:
         current_user = frappe.session.user
-        user_roles = frappe.get_roles(current_user)
-        
-        # Check permissions
-        can_view_all = any(role in ["System Manager", "Location Manager", "Manager"] for role in user_roles)
-        
+        if not can_view_all_locations(current_user):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        try:
+            after, _source = decode_cursor(cursor) if cursor else (None, None)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
+        limit = clamp_page_size(limit)
+        rows, after = get_last_location_changes(after, limit)
+        next_cursor = encode_cursor(after)
+
+        if not rows:
+            # Nothing moved since the client's last poll
+            return {"success": True, "not_modified": True, "next_cursor": next_cursor, "has_more": False}
+
+        profiles = get_user_profiles([row.user for row in rows])
+
+        updates = [
+            make_map_update(
+                row.user,
+                row.location_log,
+                row.latitude,
+                row.longitude,
+                row.accuracy_meters,
+                row.address,
+                row.last_seen,
+                profiles.get(row.user) or {}
+            )
+            for row in rows
+        ]
+
+        return {
+            "success": True,
+            "not_modified": False,
+            "data": updates,
+            "next_cursor": next_cursor,
+            "has_more": len(rows) == limit,
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to get location updates")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+@instrument
+def get_daily_travel_summary(date=None, department=None, user_id=None):
+    """Distance travelled, active time and stops per user for a day, with department totals
+
+    Managers see every user (optionally one department or user); everyone else only themselves.
+    Summaries are updated by a scheduler job every 10 minutes.
+    """
+    try:
+        current_user = frappe.session.user
+        can_view_all = can_view_all_locations(current_user)
+
+        if not can_view_all and (department or (user_id and user_id != current_user)):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        day = frappe.utils.getdate(date) if date else frappe.utils.getdate()
+        target_user = user_id if can_view_all else current_user
+
+        summaries = get_daily_summaries(day, department=department, user=target_user)
+        departments = get_department_rollups(day, department=department) if can_view_all and not target_user else []
+
+        return {
+            "success": True,
+            "data": {
+                "date": day,
+                "users": summaries,
+                "departments": departments
+            }
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to get daily travel summary")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+@instrument
+def get_location_filter_stats():
+    """How many incoming fixes were stored vs. suppressed as redundant (managers only)"""
+    try:
+        current_user = frappe.session.user
+        if not can_view_all_locations(current_user):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        stats = get_filter_stats()
+        received = stats["received"]
+        stats["suppressed"] = received - stats["stored"]
+        stats["suppressed_ratio"] = round(stats["suppressed"] / received, 4) if received else 0
+
+        return {"success": True, "data": stats}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to get location filter stats")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+@instrument
+def get_location_ingest_stats():
+    """Depth, lag and dead letters of the write-behind location ingest queue (managers only)"""
+    try:
+        current_user = frappe.session.user
+        if not can_view_all_locations(current_user):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        return {"success": True, "data": get_queue_stats()}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to get location ingest stats")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+def get_api_stats(include_profiles=False, reset=False):
+    """Latency, query count, rows and payload size per oms.api endpoint (managers only)"""
+    try:
+        current_user = frappe.session.user
+        if not can_view_all_locations(current_user):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        data = {"endpoints": get_endpoint_stats()}
+        if frappe.utils.cint(include_profiles):
+            data["profiles"] = get_api_profiles()
+        if frappe.utils.cint(reset):
+            clear_api_stats()
+
+        return {"success": True, "data": data}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to get API stats")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+@instrument
+def get_location_history(user_id=None, from_date=None, to_date=None, limit=100, cursor=None, mode=None, zoom=None, max_points=None, time_format=None):
+    """Get location history for a user, newest first
+
+    Pass the returned `next_cursor` back as `cursor` for the next page. With
+    `mode="simplified"` the whole range is returned as one simplified trail of at
+    most `max_points` points, with a tolerance matched to the map `zoom` if given.
+    With `time_format="epoch"` rows carry `epoch_ms` instead of a `time_ago` label.
+    """
+    try:
+        current_user = frappe.session.user
+        can_view_all = can_view_all_locations(current_user)
+
         target_user = user_id or current_user
-        
+
         if not can_view_all and target_user != current_user:
             return {"success": False, "message": "Insufficient permissions"}
-        
-        # Build filters
-        filters = {"user": target_user}
-        
-        if from_date:
-            filters["creation"] = [">=", from_date]
-        if to_date:
-            if "creation" in filters:
-                filters["creation"] = ["between", [from_date, to_date]]
-            else:
-                filters["creation"] = ["<=", to_date]
-        
-        # Get location history
-        history = frappe.get_all(
-            "User Location Log",
-            fields=["*"],
-            filters=filters,
-            order_by="creation desc",
-            limit=int(limit)
-        )
-        
-        # Add time ago for each entry
-        for entry in history:
-            entry["time_ago"] = get_time_ago(entry.get("creation") or entry.get("timestamp"))
-        
-        return {"success": True, "data": history}
-        
+
+        if mode == "simplified":
+            # Streams the range in keyset pages, so the payload is bounded by max_points
+            rows = iter_location_rows(
+                user=target_user,
+                from_date=from_date,
+                to_date=to_date,
+                fields=("name", "creation", "latitude", "longitude")
+            )
+            zoom = float(zoom) if zoom not in (None, "") else None
+            track = simplify_track(rows, zoom=zoom, max_points=max_points)
+            return {"success": True, "mode": "simplified", "data": track}
+
+        try:
+            after, source = decode_cursor(cursor) if cursor else (None, "log")
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
+        limit = clamp_page_size(limit)
+        start, end = get_creation_range(from_date, to_date)
+        history = []
+        next_cursor = None
+
+        if source == "log":
+            conditions = ["user = %(user)s"]
+            if start:
+                conditions.append("creation >= %(start)s")
+            if end:
+                conditions.append("creation <= %(end)s")
+
+            history, has_more = fetch_page(
+                "tabUser Location Log",
+                "*",
+                conditions,
+                {"user": target_user, "start": start, "end": end},
+                after=after,
+                limit=limit
+            )
+
+            if has_more:
+                next_cursor = encode_cursor([history[-1].creation, history[-1].name], "log")
+            elif len(history) == limit:
+                # The raw fixes ran out exactly at the page boundary; continue with the summaries
+                next_cursor = encode_cursor([], "summary")
+            after = None
+
+        # Fixes past the retention window only survive as hourly summaries
+        if not next_cursor and len(history) < limit:
+            summaries, has_more = get_summary_history(
+                target_user, start, end, after=after or None, limit=limit - len(history)
+            )
+            history += summaries
+
+            if has_more:
+                next_cursor = encode_cursor([summaries[-1].creation, summaries[-1].name], "summary")
+
+        add_time_ago(history, epoch=time_format == "epoch")
+
+        return {"success": True, "data": history, "next_cursor": next_cursor}
+
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Failed to get location history")
         return {"success": False, "message": str(e)}
 
 
 @frappe.whitelist()
+@instrument
+def export_location_geojson(user_id=None, from_date=None, to_date=None):
+    """Deprecated: use `export_locations(format="geojson")`. Exports the caller's own fixes unless `user_id` is given."""
+    return export_locations(
+        format="geojson",
+        user_id=user_id or frappe.session.user,
+        from_date=from_date,
+        to_date=to_date
+    )
+
+
+@frappe.whitelist()
+@instrument
+def export_locations(format="csv", user_id=None, department=None, from_date=None, to_date=None, compress=0):
+    """Download location fixes as CSV, NDJSON or GeoJSON, optionally gzipped
+
+    Managers may export any user or a whole department; everyone else only their own fixes.
+    """
+    current_user = frappe.session.user
+    can_view_all = can_view_all_locations(current_user)
+
+    if not can_view_all and (department or (user_id and user_id != current_user)):
+        frappe.throw(_("Insufficient permissions"), frappe.PermissionError)
+
+    target_user = user_id if can_view_all else current_user
+
+    try:
+        write, mimetype, extension = get_export_writer(format, frappe.utils.cint(compress))
+    except ValueError as e:
+        frappe.throw(str(e))
+
+    rows = iter_location_rows(
+        user=target_user,
+        users=get_department_users(department) if department else None,
+        from_date=from_date,
+        to_date=to_date
+    )
+
+    return build_download_response(
+        lambda out: write(rows, out),
+        filename=f"locations-{target_user or department or 'all'}.{extension}",
+        mimetype=mimetype
+    )
+
+
+@frappe.whitelist()
+@instrument
+def get_locations_within_radius(latitude, longitude, radius_meters, from_date=None, to_date=None, limit=500):
+    """Users (or, with a date range, fixes) within a radius of a point, nearest first (managers only)"""
+    try:
+        current_user = frappe.session.user
+        if not can_view_all_locations(current_user):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        try:
+            lat, lng, _acc = parse_coordinates(latitude, longitude)
+            rows = find_within_radius(lat, lng, float(radius_meters), from_date, to_date, limit)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
+        return {"success": True, "data": rows}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to query locations within radius")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+@instrument
+def get_locations_in_bbox(min_latitude, min_longitude, max_latitude, max_longitude, from_date=None, to_date=None, limit=500):
+    """Users (or, with a date range, fixes) inside a bounding box (managers only)"""
+    try:
+        current_user = frappe.session.user
+        if not can_view_all_locations(current_user):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        try:
+            min_lat, min_lng, _acc = parse_coordinates(min_latitude, min_longitude)
+            max_lat, max_lng, _acc = parse_coordinates(max_latitude, max_longitude)
+            rows = find_in_bbox(min_lat, min_lng, max_lat, max_lng, from_date, to_date, limit)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
+        return {"success": True, "data": rows}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to query locations in bounding box")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+@instrument
+def get_locations_in_polygon(polygon, from_date=None, to_date=None, limit=500):
+    """Users (or, with a date range, fixes) inside a polygon of [lat, lng] vertices (managers only)"""
+    try:
+        current_user = frappe.session.user
+        if not can_view_all_locations(current_user):
+            return {"success": False, "message": "Insufficient permissions"}
+
+        try:
+            rows = find_in_polygon(parse_polygon(polygon), from_date, to_date, limit)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
+        return {"success": True, "data": rows}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Failed to query locations in polygon")
+        return {"success": False, "message": str(e)}
+
+
+@frappe.whitelist()
+@instrument
 def get_all_users_for_tracking():
     """Get list of all users for location tracking (managers only)"""
     try:
         current_user = frappe.session.user
-        user_roles = frappe.get_roles(current_user)
-        
-        # Check permissions
-        if not any(role in ["System Manager", "Location Manager", "Manager"] for role in user_roles):
+        if not can_view_all_locations(current_user):
             return {"success": False, "message": "Insufficient permissions"}
-        
+
         # Get all users with employee records
-        users = frappe.db.sql("""
-            SELECT 
-                u.name as user_id,
-                u.full_name,
-                u.user_image,
-                e.employee_name,
-                e.designation,
-                e.department
-            FROM `tabUser` u
-            LEFT JOIN `tabEmployee` e ON e.user_id = u.name
-            WHERE u.enabled = 1 
-            AND u.name != 'Guest'
-            AND u.name != 'Administrator'
-            ORDER BY u.full_name
-        """, as_dict=True)
-        
+        user_ids = frappe.get_all(
+            "User",
+            filters={"enabled": 1, "name": ["not in", ["Guest", "Administrator"]]},
+            order_by="full_name",
+            pluck="name"
+        )
+        profiles = get_user_profiles(user_ids)
+
+        users = [
+            {
+                "user_id": user_id,
+                "full_name": profiles[user_id]["full_name"],
+                "user_image": profiles[user_id]["user_image"],
+                "employee_name": profiles[user_id]["employee_name"],
+                "designation": profiles[user_id]["designation"],
+                "department": profiles[user_id]["department"]
+            }
+            for user_id in user_ids
+            if user_id in profiles
+        ]
+
         return {"success": True, "data": users}
-        
+
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Failed to get users for tracking")
         return {"success": False, "message": str(e)}
 
 
 @frappe.whitelist()
+@instrument
 def get_my_last_location():
     """Get the last saved location for current user"""
     try:
         user = frappe.session.user
-        
+
         if user == "Guest":
             return {"success": False, "message": "Authentication required"}
-        
-        # Get the latest location for current user
-        last_location = frappe.get_all(
-            "User Location Log",
-            fields=["*"],
-            filters={"user": user},
-            order_by="creation desc",
-            limit=1
-        )
-        
-        if last_location:
-            location_data = last_location[0]
-            location_data["time_ago"] = get_time_ago(location_data.get("creation"))
+
+        location_data = get_user_last_location(user)
+
+        if location_data:
+            add_time_ago([location_data])
             return {"success": True, "data": location_data}
         else:
             return {"success": False, "message": "No location data found"}
-            
+
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Failed to get last location")
         return {"success": False, "message": str(e)}
 
 
 @frappe.whitelist()
+@instrument
 def get_current_user_info():
-    """Get current user information including roles"""
+    """Get current user information including roles (same payload as get_boot_info)"""
     try:
         user = frappe.session.user
-        
+
         if user == "Guest":
             return {"success": False, "message": "Authentication required"}
-        
-        # Get user details
-        user_doc = frappe.get_doc("User", user)
-        
-        # Get user roles
-        roles = frappe.get_roles(user)
-        
-        # Get employee details if available
-        employee = None
-        department = None
-        designation = None
-        
-        try:
-            employee_list = frappe.get_all("Employee", 
-                                         filters={"user_id": user}, 
-                                         fields=["name", "department", "designation"])
-            if employee_list:
-                employee = employee_list[0].name
-                department = employee_list[0].department
-                designation = employee_list[0].designation
-        except:
-            pass
-        
-        return {
-            "user_id": user,
-            "full_name": user_doc.full_name,
-            "email": user_doc.email,
-            "user_image": user_doc.user_image,
-            "roles": roles,
-            "employee": employee,
-            "department": department,
-            "designation": designation
-        }
-        
+
+        return get_boot(user)
+
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Failed to get user info")
         return {"success": False, "message": str(e)}
 
 
+@frappe.whitelist()
+@instrument
+def get_boot_info():
+    """Everything the SPA needs on page load in one round-trip: the user, roles, capabilities,
+    employee details and last location"""
+    return get_boot(frappe.session.user)
+
+
 def get_time_ago(timestamp):
     """Calculate time ago from timestamp"""
-    try:
-        from datetime import datetime
-        import frappe.utils
-        
-        if not timestamp:
-            return "Unknown"
-        
-        now = frappe.utils.now_datetime()
-        created = frappe.utils.get_datetime(timestamp)
-        diff = now - created
-        
-        if diff.days > 0:
-            return f"{diff.days} day{'s' if diff.days > 1 else ''} ago"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f"{hours} hour{'s' if hours > 1 else ''} ago"
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
-            return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-        else:
-            return "Just now"
-    except:
-        return "Unknown"
+    return time_ago(timestamp)
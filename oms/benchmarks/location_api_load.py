@@ -0,0 +1,243 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Load test for the location APIs, with a baseline to compare against.
+
+Seeds `users` synthetic users and `fixes` fixes spread over the last 30 days,
+then calls each endpoint `requests` times from `concurrency` threads, each
+with its own database connection, and reports throughput, p50/p95/p99 latency
+and queries per call. The endpoints are called in-process, so the numbers
+cover the handler and the database but not gunicorn or serialisation.
+
+The seeded data is committed (the threads could not see it otherwise) and
+deleted again at the end, together with the fixes written by
+`save_user_location`. Run it on a development site only.
+
+	bench --site <site> oms-benchmark-location-api --users 200 --fixes 200000 --concurrency 8 \\
+		--save-baseline baseline.json
+	bench --site <site> oms-benchmark-location-api --users 200 --fixes 200000 --concurrency 8 \\
+		--baseline baseline.json
+
+Compared against a baseline, an endpoint counts as a regression when its p95
+latency or average query count grew by more than `tolerance` (a fraction).
+"""
+
+import math
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe.utils import now_datetime
+
+from oms.benchmarks.location_indexes import seed_location_log
+from oms.utils.instrumentation import track_queries
+from oms.utils.last_location import refresh_last_location
+from oms.utils.user_profile import clear_user_profile_cache
+
+BENCH_USER_PATTERN = "bench-user-%@example.com"
+
+# Managers (System Manager) read; seeded users write
+MANAGER = "Administrator"
+
+ENDPOINTS = (
+	"save_user_location",
+	"get_user_locations",
+	"get_location_history",
+	"get_all_users_for_tracking",
+)
+
+# Metrics compared against the baseline
+COMPARED_METRICS = ("p95_ms", "avg_queries")
+
+
+def run(users=100, fixes=50_000, requests=200, concurrency=4, baseline=None, tolerance=0.2, seed=42) -> dict:
+	"""Seed, drive every endpoint and clean up; `baseline` is an earlier report to compare with."""
+	random.seed(seed)
+	site = frappe.local.site
+	user_ids = seed_data(users, fixes)
+
+	try:
+		report = {
+			"users": users,
+			"fixes": fixes,
+			"requests": requests,
+			"concurrency": concurrency,
+			"ran_at": now_datetime(),
+			"endpoints": {
+				endpoint: drive(site, endpoint, user_ids, requests, concurrency, seed)
+				for endpoint in ENDPOINTS
+			},
+		}
+	finally:
+		cleanup()
+
+	if baseline:
+		report["regressions"] = compare(report, baseline, tolerance)
+
+	return report
+
+
+def seed_data(users, fixes) -> list[str]:
+	"""Create the synthetic users and their fixes, and commit."""
+	cleanup()
+	user_ids = seed_location_log("tabUser Location Log", rows=fixes, users=users, days=30)
+
+	now = now_datetime()
+	frappe.db.bulk_insert(
+		"User",
+		(
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"email",
+			"first_name",
+			"full_name",
+			"enabled",
+			"user_type",
+		),
+		[
+			(user, now, now, MANAGER, MANAGER, user, f"Bench {i}", f"Bench User {i}", 1, "System User")
+			for i, user in enumerate(user_ids)
+		],
+	)
+
+	for user in user_ids:
+		refresh_last_location(user)
+
+	frappe.db.commit()
+	return user_ids
+
+
+def cleanup():
+	"""Delete everything `seed_data` and the load run created, and commit."""
+	user_ids = frappe.get_all("User", filters={"name": ["like", BENCH_USER_PATTERN]}, pluck="name")
+	for doctype in (
+		"User Location Log",
+		"User Last Location",
+		"User Location Hourly Summary",
+		"User Daily Travel Summary",
+	):
+		frappe.db.delete(doctype, {"user": ["like", BENCH_USER_PATTERN]})
+	frappe.db.delete("User", {"name": ["like", BENCH_USER_PATTERN]})
+	frappe.db.commit()
+
+	if user_ids:
+		clear_user_profile_cache(user_ids)
+
+
+def drive(site, endpoint, user_ids, requests, concurrency, seed) -> dict:
+	"""Call `endpoint` `requests` times from `concurrency` threads and summarise the calls."""
+	shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+	# Start all threads together so the concurrency is real from the first call
+	start_barrier = threading.Barrier(concurrency, timeout=60)
+
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=concurrency) as executor:
+		results = list(
+			executor.map(
+				lambda args: _worker(site, endpoint, user_ids, start_barrier, *args),
+				[(share, seed + i) for i, share in enumerate(shares)],
+			)
+		)
+	elapsed = time.perf_counter() - start
+
+	calls = [call for worker_calls in results for call in worker_calls]
+	return summarize(calls, elapsed)
+
+
+def _worker(site, endpoint, user_ids, start_barrier, count, seed):
+	rng = random.Random(seed)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		from oms import api
+
+		method = getattr(api, endpoint)
+		calls = []
+		start_barrier.wait()
+		for _ in range(count):
+			args = _make_call(endpoint, user_ids, rng)
+			start = time.perf_counter()
+			with track_queries() as stats:
+				try:
+					result = method(**args)
+					ok = not (isinstance(result, dict) and result.get("success") is False)
+				except Exception:
+					frappe.db.rollback()
+					ok = False
+
+			calls.append({"ms": (time.perf_counter() - start) * 1000, "queries": stats.queries, "ok": ok})
+
+		return calls
+	finally:
+		frappe.destroy()
+
+
+def _make_call(endpoint, user_ids, rng) -> dict:
+	if endpoint == "save_user_location":
+		frappe.set_user(rng.choice(user_ids))
+		return {
+			"latitude": rng.uniform(8, 30),
+			"longitude": rng.uniform(70, 88),
+			"accuracy": rng.uniform(5, 50),
+		}
+
+	frappe.set_user(MANAGER)
+	if endpoint == "get_location_history":
+		return {"user_id": rng.choice(user_ids)}
+	return {}
+
+
+def summarize(calls, elapsed) -> dict:
+	latencies = sorted(call["ms"] for call in calls)
+	queries = [call["queries"] for call in calls]
+
+	return {
+		"requests": len(calls),
+		"errors": sum(not call["ok"] for call in calls),
+		"seconds": round(elapsed, 3),
+		"throughput_rps": round(len(calls) / elapsed, 1) if elapsed else None,
+		"p50_ms": _percentile(latencies, 0.50),
+		"p95_ms": _percentile(latencies, 0.95),
+		"p99_ms": _percentile(latencies, 0.99),
+		"max_ms": round(latencies[-1], 3) if latencies else None,
+		"avg_queries": round(statistics.mean(queries), 2) if queries else None,
+		"max_queries": max(queries) if queries else None,
+	}
+
+
+def _percentile(values, fraction):
+	"""Nearest-rank percentile of sorted `values`"""
+	if not values:
+		return None
+	rank = max(math.ceil(fraction * len(values)) - 1, 0)
+	return round(values[rank], 3)
+
+
+def compare(report, baseline, tolerance) -> list[dict]:
+	"""Metrics in `report` that are more than `tolerance` worse than in `baseline`"""
+	regressions = []
+	for endpoint, metrics in report["endpoints"].items():
+		before = (baseline.get("endpoints") or {}).get(endpoint)
+		if not before:
+			continue
+
+		for metric in COMPARED_METRICS:
+			old, new = before.get(metric), metrics.get(metric)
+			if old and new is not None and new > old * (1 + tolerance):
+				regressions.append(
+					{
+						"endpoint": endpoint,
+						"metric": metric,
+						"baseline": old,
+						"current": new,
+						"ratio": round(new / old, 2),
+					}
+				)
+
+	return regressions
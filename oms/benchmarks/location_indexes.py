@@ -0,0 +1,204 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Query plan and latency benchmark for the User Location Log indexes.
+
+Seeds a scratch copy of the log table with synthetic fixes, runs the queries
+behind the location APIs without and then with the indexes added by
+`user_location_log.on_doctype_update`, and reports EXPLAIN output and timings.
+The scratch table is dropped afterwards; run it on a development site only,
+since the DDL commits the current transaction.
+
+	bench --site <site> oms-benchmark-location-indexes --rows 200000 --users 200
+"""
+
+import random
+import statistics
+import time
+from datetime import timedelta
+
+import frappe
+from frappe.utils import add_days, now_datetime
+
+from oms.utils.geo import geohash_encode
+
+SCRATCH_TABLE = "_oms_bench_location_log"
+
+# Mirrors user_location_log.on_doctype_update
+INDEXES = {
+	"user_creation_index": ("user", "creation"),
+	"creation_index": ("creation",),
+}
+
+# The User Location Log queries behind oms.api, as the endpoints now issue them:
+# `fetch_page` keyset pages on (creation, name), one row past the page size. The
+# latest-per-user GROUP BY is kept as the baseline that User Last Location replaced;
+# get_user_locations for all users and get_my_last_location no longer touch this table.
+QUERIES = {
+	"latest per user (baseline, before User Last Location)": """
+		SELECT ul1.*
+		FROM `{table}` ul1
+		INNER JOIN (
+			SELECT user, MAX(creation) as max_creation
+			FROM `{table}`
+			GROUP BY user
+		) ul2 ON ul1.user = ul2.user AND ul1.creation = ul2.max_creation
+		ORDER BY ul1.creation DESC
+		LIMIT 50
+	""",
+	"get_user_locations (single user, first page)": """
+		SELECT * FROM `{table}`
+		WHERE user = %(user)s
+		ORDER BY creation DESC, name DESC
+		LIMIT 51
+	""",
+	"get_user_locations (single user, next page)": """
+		SELECT * FROM `{table}`
+		WHERE user = %(user)s
+			AND creation <= %(after_creation)s AND (creation < %(after_creation)s OR name < %(after_name)s)
+		ORDER BY creation DESC, name DESC
+		LIMIT 51
+	""",
+	"get_location_history (first page)": """
+		SELECT * FROM `{table}`
+		WHERE user = %(user)s AND creation >= %(from_date)s AND creation <= %(to_date)s
+		ORDER BY creation DESC, name DESC
+		LIMIT 101
+	""",
+	"get_location_history (next page)": """
+		SELECT * FROM `{table}`
+		WHERE user = %(user)s AND creation >= %(from_date)s AND creation <= %(to_date)s
+			AND creation <= %(after_creation)s AND (creation < %(after_creation)s OR name < %(after_name)s)
+		ORDER BY creation DESC, name DESC
+		LIMIT 101
+	""",
+}
+
+SEED_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"user",
+	"latitude",
+	"longitude",
+	"accuracy_meters",
+	"geohash",
+	"timestamp",
+)
+
+
+def run(rows=100_000, users=100, days=90, repeat=5, seed=42) -> dict:
+	"""Seed the scratch table, benchmark every query before and after indexing, then clean up."""
+	random.seed(seed)
+	create_scratch_table(SCRATCH_TABLE)
+
+	try:
+		user_ids = seed_location_log(SCRATCH_TABLE, rows=rows, users=users, days=days)
+		params = {
+			"user": user_ids[0],
+			"from_date": add_days(now_datetime(), -7),
+			"to_date": now_datetime(),
+			# A page boundary in the middle of the range
+			"after_creation": add_days(now_datetime(), -3),
+			"after_name": "m",
+		}
+
+		report = {"rows": rows, "users": users, "repeat": repeat, "queries": {}}
+		for label, stage in (("before", None), ("after", _add_indexes)):
+			if stage:
+				stage()
+
+			for query_name, query in QUERIES.items():
+				sql = query.format(table=SCRATCH_TABLE)
+				report["queries"].setdefault(query_name, {})[label] = {
+					"plan": explain(sql, params),
+					**time_query(sql, params, repeat),
+				}
+
+		return report
+	finally:
+		frappe.db.sql_ddl(f"DROP TABLE IF EXISTS `{SCRATCH_TABLE}`")
+
+
+def seed_location_log(table, rows, users, days) -> list[str]:
+	"""Insert `rows` synthetic fixes for `users` users spread over the last `days` days."""
+	now = now_datetime()
+	user_ids = [f"bench-user-{i}@example.com" for i in range(users)]
+	positions = {user: (random.uniform(8, 30), random.uniform(70, 88)) for user in user_ids}
+
+	batch = []
+	for _ in range(rows):
+		user = random.choice(user_ids)
+		lat, lng = positions[user]
+		lat, lng = lat + random.uniform(-0.001, 0.001), lng + random.uniform(-0.001, 0.001)
+		positions[user] = (lat, lng)
+
+		creation = now - timedelta(seconds=random.randint(0, days * 86400))
+		batch.append(
+			(
+				frappe.generate_hash(length=10),
+				creation,
+				creation,
+				user,
+				user,
+				lat,
+				lng,
+				random.uniform(5, 50),
+				geohash_encode(lat, lng),
+				creation,
+			)
+		)
+
+		if len(batch) == 1000:
+			_insert_rows(table, batch)
+			batch = []
+
+	_insert_rows(table, batch)
+	return user_ids
+
+
+def explain(sql, params) -> list[dict]:
+	return [
+		{key: row.get(key) for key in ("table", "type", "key", "rows", "Extra")}
+		for row in frappe.db.sql(f"EXPLAIN {sql}", params, as_dict=True)
+	]
+
+
+def time_query(sql, params, repeat) -> dict:
+	timings = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		frappe.db.sql(sql, params)
+		timings.append((time.perf_counter() - start) * 1000)
+
+	return {"min_ms": round(min(timings), 3), "median_ms": round(statistics.median(timings), 3)}
+
+
+def create_scratch_table(table):
+	"""(Re)create `table` with the log's columns and no index but the primary key"""
+	frappe.db.sql_ddl(f"DROP TABLE IF EXISTS `{table}`")
+	frappe.db.sql_ddl(f"CREATE TABLE `{table}` LIKE `tabUser Location Log`")
+
+	# Start from the primary key only, whatever the live table has
+	for index in {row.Key_name for row in frappe.db.sql(f"SHOW INDEX FROM `{table}`", as_dict=True)}:
+		if index != "PRIMARY":
+			frappe.db.sql_ddl(f"ALTER TABLE `{table}` DROP INDEX `{index}`")
+
+
+def _add_indexes():
+	for index_name, columns in INDEXES.items():
+		frappe.db.sql_ddl(
+			f"ALTER TABLE `{SCRATCH_TABLE}` ADD INDEX `{index_name}` ({', '.join(f'`{c}`' for c in columns)})"
+		)
+
+
+def _insert_rows(table, batch):
+	if not batch:
+		return
+
+	placeholders = ", ".join(["(%s)" % ", ".join(["%s"] * len(SEED_FIELDS))] * len(batch))
+	frappe.db.sql(
+		f"INSERT INTO `{table}` ({', '.join(SEED_FIELDS)}) VALUES {placeholders}",
+		[value for row in batch for value in row],
+	)
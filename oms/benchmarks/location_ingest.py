@@ -0,0 +1,75 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Inserts-per-second of `Document.insert()` against the fast path in `oms.utils.location_ingest`.
+
+Both paths write `count` synthetic fixes for the current user inside one
+transaction, which is rolled back at the end. Geocoding, realtime pushes and
+touched-day records only happen after commit, so they never fire. The Redis
+state the inserts write straight away is dropped afterwards: the user's cached
+last position, push throttle slot and pending push. The location filter's
+counters still include the benchmark's fixes.
+
+	bench --site <site> oms-benchmark-location-ingest --count 2000
+"""
+
+import random
+import time
+
+import frappe
+
+from oms.utils.location_filter import forget_position
+from oms.utils.location_ingest import insert_fixes, make_fix_row, parse_coordinates
+from oms.utils.location_realtime import PENDING_CACHE_KEY, THROTTLE_CACHE_KEY
+
+
+def run(count=1000, seed=42) -> dict:
+	random.seed(seed)
+	user = frappe.session.user
+	fixes = [(random.uniform(8, 30), random.uniform(70, 88), random.uniform(5, 50)) for _ in range(count)]
+
+	try:
+		return {
+			"count": count,
+			"document_insert": _measure(lambda fix: _document_insert(user, *fix), fixes),
+			"fast_path": _measure(lambda fix: _fast_path_insert(user, *fix), fixes),
+		}
+	finally:
+		frappe.db.rollback()
+		_clear_user_state(user)
+
+
+def _clear_user_state(user):
+	# The cached position points at rolled-back rows; the next read falls back to the database
+	forget_position(user)
+	frappe.cache.delete(frappe.cache.make_key(f"{THROTTLE_CACHE_KEY}:{user}"))
+	frappe.cache.hdel(PENDING_CACHE_KEY, user)
+
+
+def _document_insert(user, lat, lng, acc):
+	frappe.get_doc(
+		{
+			"doctype": "User Location Log",
+			"user": user,
+			"latitude": lat,
+			"longitude": lng,
+			"accuracy_meters": acc,
+		}
+	).insert(ignore_permissions=True)
+
+
+def _fast_path_insert(user, lat, lng, acc):
+	# Mirrors save_user_location: one validation, then the trusted insert
+	insert_fixes(user, [make_fix_row(*parse_coordinates(lat, lng, acc))])
+
+
+def _measure(insert, fixes) -> dict:
+	start = time.perf_counter()
+	for fix in fixes:
+		insert(fix)
+	elapsed = time.perf_counter() - start
+
+	return {
+		"seconds": round(elapsed, 3),
+		"inserts_per_second": round(len(fixes) / elapsed, 1) if elapsed else None,
+	}
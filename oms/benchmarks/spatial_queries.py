@@ -0,0 +1,102 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Latency of the spatial location queries against table size.
+
+Grows a scratch copy of the log table in steps and, at each size, times a
+radius, bounding-box and polygon query over the last week through the geohash
+prefilter, next to a baseline that scans the week and filters in Python.
+Run it on a development site only; the DDL commits the current transaction.
+
+	bench --site <site> oms-benchmark-spatial-queries --sizes 10000,100000,500000
+"""
+
+import random
+import statistics
+import time
+
+import frappe
+from frappe.utils import add_days, now_datetime
+
+from oms.benchmarks.location_indexes import create_scratch_table, seed_location_log
+from oms.utils.geo import bbox_around, haversine_distance, point_in_polygon
+from oms.utils.location_spatial import _query_history
+
+SCRATCH_TABLE = "_oms_bench_spatial_log"
+
+INDEXES = {
+	"user_creation_index": ("user", "creation"),
+	"geohash_creation_index": ("geohash", "creation"),
+}
+
+RADIUS_METERS = 500
+
+
+def run(sizes=(10_000, 50_000, 100_000), users=100, days=30, repeat=5, seed=42) -> dict:
+	"""Seed the scratch table up to each size and time every query; the table is dropped afterwards."""
+	random.seed(seed)
+	create_scratch_table(SCRATCH_TABLE)
+	for index_name, columns in INDEXES.items():
+		frappe.db.sql_ddl(
+			f"ALTER TABLE `{SCRATCH_TABLE}` ADD INDEX `{index_name}` ({', '.join(f'`{c}`' for c in columns)})"
+		)
+
+	try:
+		report = {"users": users, "days": days, "repeat": repeat, "radius_meters": RADIUS_METERS, "sizes": {}}
+		seeded = 0
+		for size in sorted(sizes):
+			seed_location_log(SCRATCH_TABLE, rows=size - seeded, users=users, days=days)
+			seeded = size
+			report["sizes"][size] = _benchmark_size(repeat)
+
+		return report
+	finally:
+		frappe.db.sql_ddl(f"DROP TABLE IF EXISTS `{SCRATCH_TABLE}`")
+
+
+def _benchmark_size(repeat) -> dict:
+	from_date = add_days(now_datetime(), -7)
+	center = frappe.db.sql(
+		f"SELECT latitude, longitude FROM `{SCRATCH_TABLE}` WHERE creation >= %s ORDER BY RAND() LIMIT 1",
+		(from_date,),
+		as_dict=True,
+	)[0]
+	lat, lng = center.latitude, center.longitude
+	bbox = bbox_around(lat, lng, RADIUS_METERS)
+	polygon = [(bbox[0], bbox[1]), (bbox[2], lng), (bbox[0], bbox[3])]
+
+	def within_radius(row):
+		return haversine_distance(lat, lng, row.latitude, row.longitude) <= RADIUS_METERS
+
+	def in_polygon(row):
+		return point_in_polygon(row.latitude, row.longitude, polygon)
+
+	def scan():
+		rows = frappe.db.sql(
+			f"SELECT latitude, longitude FROM `{SCRATCH_TABLE}` WHERE creation >= %s",
+			(from_date,),
+			as_dict=True,
+		)
+		return [row for row in rows if within_radius(row)]
+
+	cases = {
+		"radius": lambda: _query_history(bbox, within_radius, from_date, None, 5000, SCRATCH_TABLE),
+		"bbox": lambda: _query_history(bbox, None, from_date, None, 5000, SCRATCH_TABLE),
+		"polygon": lambda: _query_history(bbox, in_polygon, from_date, None, 5000, SCRATCH_TABLE),
+		"radius (full scan baseline)": scan,
+	}
+	return {name: _time(case, repeat) for name, case in cases.items()}
+
+
+def _time(case, repeat) -> dict:
+	timings = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		matches = len(case())
+		timings.append((time.perf_counter() - start) * 1000)
+
+	return {
+		"matches": matches,
+		"min_ms": round(min(timings), 3),
+		"median_ms": round(statistics.median(timings), 3),
+	}
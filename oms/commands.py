@@ -0,0 +1,203 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("backfill-last-locations")
+@pass_context
+def backfill_last_locations(context):
+	"""Rebuild User Last Location from the full User Location Log history"""
+	import frappe
+
+	from oms.utils.last_location import backfill_last_locations
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		count = backfill_last_locations()
+		frappe.db.commit()
+		click.echo(f"Backfilled last locations for {count} users")
+	finally:
+		frappe.destroy()
+
+
+@click.command("oms-export-locations")
+@click.option("--format", "export_format", default="csv", type=click.Choice(["csv", "ndjson", "geojson"]))
+@click.option("--user", help="Only this user's fixes")
+@click.option("--department", help="Only fixes of users in this department")
+@click.option("--from-date", help="Start of the range (inclusive)")
+@click.option("--to-date", help="End of the range (inclusive; a bare date covers the whole day)")
+@click.option("--gzip", "compress", is_flag=True, default=False, help="Compress the output")
+@click.option("--output", required=True, help="File to write, or - for stdout")
+@pass_context
+def export_locations(context, export_format, user, department, from_date, to_date, compress, output):
+	"""Stream User Location Log rows to a file in chunks, with flat memory use"""
+	import sys
+
+	import frappe
+
+	from oms.utils.location_export import get_export_writer, iter_location_rows
+	from oms.utils.user_profile import get_department_users
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		write, _mimetype, _extension = get_export_writer(export_format, compress)
+		rows = iter_location_rows(
+			user=user,
+			users=get_department_users(department) if department else None,
+			from_date=from_date,
+			to_date=to_date,
+		)
+
+		if output == "-":
+			write(rows, sys.stdout.buffer)
+			sys.stdout.buffer.flush()
+		else:
+			with open(output, "wb") as out:
+				write(rows, out)
+			click.echo(f"Exported locations to {output}", err=True)
+	finally:
+		frappe.destroy()
+
+
+@click.command("oms-requeue-location-dead-letters")
+@click.option("--limit", type=int, help="Requeue at most this many (default: all)")
+@pass_context
+def requeue_location_dead_letters(context, limit):
+	"""Move fixes the ingest queue consumer failed to insert back onto the queue"""
+	import frappe
+
+	from oms.utils.location_queue import requeue_dead_letters
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		click.echo(f"Requeued {requeue_dead_letters(limit)} fixes")
+	finally:
+		frappe.destroy()
+
+
+@click.command("oms-benchmark-location-indexes")
+@click.option("--rows", default=100_000, help="Synthetic fixes to seed")
+@click.option("--users", default=100, help="Distinct users in the synthetic data")
+@click.option("--repeat", default=5, help="Timed runs per query")
+@pass_context
+def benchmark_location_indexes(context, rows, users, repeat):
+	"""Report query plans and latencies of the location API queries with and without indexes"""
+	import frappe
+
+	from oms.benchmarks.location_indexes import run
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		click.echo(frappe.as_json(run(rows=rows, users=users, repeat=repeat)))
+	finally:
+		frappe.destroy()
+
+
+@click.command("oms-benchmark-location-ingest")
+@click.option("--count", default=1000, help="Fixes inserted through each path")
+@pass_context
+def benchmark_location_ingest(context, count):
+	"""Compare inserts per second of Document.insert() and the location fast path"""
+	import frappe
+
+	from oms.benchmarks.location_ingest import run
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		click.echo(frappe.as_json(run(count=count)))
+	finally:
+		frappe.destroy()
+
+
+@click.command("oms-benchmark-spatial-queries")
+@click.option("--sizes", default="10000,50000,100000", help="Comma separated table sizes to measure at")
+@click.option("--users", default=100, help="Distinct users in the synthetic data")
+@click.option("--repeat", default=5, help="Timed runs per query")
+@pass_context
+def benchmark_spatial_queries(context, sizes, users, repeat):
+	"""Report latency of the radius, bounding-box and polygon queries against table size"""
+	import frappe
+
+	from oms.benchmarks.spatial_queries import run
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		sizes = [int(size) for size in sizes.split(",") if size.strip()]
+		click.echo(frappe.as_json(run(sizes=sizes, users=users, repeat=repeat)))
+	finally:
+		frappe.destroy()
+
+
+@click.command("oms-benchmark-location-api")
+@click.option("--users", default=100, help="Synthetic users to seed")
+@click.option("--fixes", default=50_000, help="Synthetic fixes to seed")
+@click.option("--requests", default=200, help="Calls per endpoint")
+@click.option("--concurrency", default=4, help="Threads calling each endpoint at once")
+@click.option(
+	"--baseline", type=click.Path(exists=True, dir_okay=False), help="Earlier report to compare against"
+)
+@click.option(
+	"--tolerance", default=0.2, help="Allowed p95/query-count growth over the baseline, as a fraction"
+)
+@click.option("--save-baseline", type=click.Path(dir_okay=False), help="Write the report here for later runs")
+@pass_context
+def benchmark_location_api(context, users, fixes, requests, concurrency, baseline, tolerance, save_baseline):
+	"""Load test the location APIs; exits non-zero if a baseline is given and any endpoint regressed"""
+	import json
+
+	import frappe
+
+	from oms.benchmarks.location_api_load import run
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		if baseline:
+			with open(baseline) as f:
+				baseline = json.load(f)
+
+		report = run(
+			users=users,
+			fixes=fixes,
+			requests=requests,
+			concurrency=concurrency,
+			baseline=baseline,
+			tolerance=tolerance,
+		)
+		output = frappe.as_json(report)
+		click.echo(output)
+
+		if save_baseline:
+			with open(save_baseline, "w") as f:
+				f.write(output)
+	finally:
+		frappe.destroy()
+
+	if report.get("regressions"):
+		raise SystemExit(1)
+
+
+commands = [
+	backfill_last_locations,
+	export_locations,
+	requeue_location_dead_letters,
+	benchmark_location_indexes,
+	benchmark_location_ingest,
+	benchmark_spatial_queries,
+	benchmark_location_api,
+]
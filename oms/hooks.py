@@ -148,6 +148,69 @@ app_license = "mit"
 # 	}
 # }
 
+doc_events = {
+	"*": {
+		"on_update": "oms.utils.link_search.on_doc_change",
+		"on_trash": "oms.utils.link_search.on_doc_change",
+		"after_rename": "oms.utils.link_search.on_doc_change",
+	},
+	"DocType": {
+		"on_update": "oms.utils.link_search.on_link_field_change",
+		"on_trash": "oms.utils.link_search.on_link_field_change",
+	},
+	"Custom Field": {
+		"on_update": "oms.utils.link_search.on_link_field_change",
+		"on_trash": "oms.utils.link_search.on_link_field_change",
+	},
+	"User": {
+		"on_update": [
+			"oms.utils.user_profile.on_user_change",
+			"oms.utils.capabilities.on_user_change",
+			"oms.utils.boot.on_user_change",
+		],
+		"on_trash": [
+			"oms.utils.user_profile.on_user_change",
+			"oms.utils.capabilities.on_user_change",
+			"oms.utils.boot.on_user_change",
+		],
+		"after_rename": [
+			"oms.utils.user_profile.on_user_rename",
+			"oms.utils.capabilities.on_user_rename",
+			"oms.utils.boot.on_user_rename",
+		],
+	},
+	"Role": {
+		"on_update": [
+			"oms.utils.capabilities.on_role_change",
+			"oms.utils.boot.on_role_change",
+		],
+		"on_trash": [
+			"oms.utils.capabilities.on_role_change",
+			"oms.utils.boot.on_role_change",
+		],
+	},
+	"Role Profile": {
+		"on_update": [
+			"oms.utils.capabilities.on_role_change",
+			"oms.utils.boot.on_role_change",
+		],
+	},
+	"Employee": {
+		"on_update": [
+			"oms.utils.user_profile.on_employee_change",
+			"oms.utils.boot.on_employee_change",
+		],
+		"on_trash": [
+			"oms.utils.user_profile.on_employee_change",
+			"oms.utils.boot.on_employee_change",
+		],
+		"after_rename": [
+			"oms.utils.user_profile.on_employee_change",
+			"oms.utils.boot.on_employee_change",
+		],
+	},
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -169,6 +232,25 @@ app_license = "mit"
 # 	],
 # }
 
+scheduler_events = {
+	"cron": {
+		"*/10 * * * *": [
+			"oms.utils.location_daily.update_daily_summaries",
+			# Picks up fixes queued while a geocoding job was already running
+			"oms.utils.geocoding.process_geocode_queue",
+		],
+		# Safety net for the write-behind ingest queue; the save endpoints enqueue the drain job themselves
+		"* * * * *": [
+			"oms.utils.location_queue.drain_ingest_queue",
+			# Trailing push for users throttled during their last burst of fixes
+			"oms.utils.location_realtime.flush_pending_location_pushes",
+		],
+	},
+	"daily_long": [
+		"oms.utils.location_retention.rollup_location_history",
+	],
+}
+
 # Testing
 # -------
 
@@ -199,8 +281,8 @@ app_license = "mit"
 
 # Request Events
 # ----------------
-# before_request = ["oms.utils.before_request"]
-# after_request = ["oms.utils.after_request"]
+before_request = ["oms.utils.instrumentation.before_request"]
+after_request = ["oms.utils.instrumentation.after_request"]
 
 # Job Events
 # ----------
@@ -248,6 +330,9 @@ app_license = "mit"
 
 website_route_rules = [{'from_route': '/oms/<path:app_path>', 'to_route': 'oms'},]
 
+# Serves the SPA shell from a per-worker cache with ETag/Last-Modified
+page_renderer = ["oms.utils.spa.SPAPageRenderer"]
+
 
 # website_route_rules = [
 #     {"from_route": "/oms/<path:app_path>", "to_route": "oms"},
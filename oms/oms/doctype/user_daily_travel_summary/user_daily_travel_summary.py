@@ -0,0 +1,21 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class UserDailyTravelSummary(Document):
+	"""Per-user, per-day distance, active time and stops derived from User Location Log.
+
+	Rows are written by `oms.utils.location_daily`.
+	"""
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique("User Daily Travel Summary", ["user", "date"], constraint_name="user_date_unique")
+	frappe.db.add_index(
+		"User Daily Travel Summary", ["date", "department"], index_name="date_department_index"
+	)
@@ -0,0 +1,14 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+
+
+class UserLastLocation(Document):
+	"""One row per user holding their most recent User Location Log fix.
+
+	Rows are maintained by `oms.utils.last_location` rather than edited by hand.
+	"""
+
+	pass
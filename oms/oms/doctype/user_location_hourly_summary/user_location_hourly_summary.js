@@ -0,0 +1,8 @@
+// Copyright (c) 2025, HnS and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("User Location Hourly Summary", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,18 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class UserLocationHourlySummary(Document):
+	"""Per-user, per-hour rollup of User Location Log fixes past the retention window.
+
+	Rows are written by `oms.utils.location_retention`.
+	"""
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("User Location Hourly Summary", ["user", "hour"], index_name="user_hour_index")
@@ -3,9 +3,15 @@
 
 import frappe
 from frappe.model.document import Document
-import json
 from datetime import datetime
 
+from oms.utils.geo import geohash_encode
+from oms.utils.geocoding import queue_geocoding
+from oms.utils.last_location import refresh_last_location, upsert_last_locations
+from oms.utils.location_daily import mark_days_touched
+from oms.utils.location_filter import forget_position, remember_position
+from oms.utils.location_realtime import publish_location_updates
+
 
 class UserLocationLog(Document):
     def before_insert(self):
@@ -13,37 +19,19 @@ class UserLocationLog(Document):
         self.timestamp = frappe.utils.now()
         self.session_id = frappe.session.sid
         self.ip_address = frappe.local.request_ip
-        
-        # Ensure geolocation field is properly formatted
-        if self.latitude and self.longitude:
-            self.set_geolocation_field()
     
-    def before_save(self):
-        """Update geolocation field before saving"""
-        if self.latitude and self.longitude:
-            self.set_geolocation_field()
+    def after_insert(self):
+        """Keep the user's row in User Last Location current, notify the dashboards and queue reverse geocoding"""
+        upsert_last_locations([self])
+        remember_position(self.user, self)
+        publish_location_updates([self])
+        queue_geocoding([self])
+        mark_days_touched([self])
     
-    def set_geolocation_field(self):
-        """Set the geolocation field with proper GeoJSON format"""
-        try:
-            location_data = {
-                "type": "FeatureCollection",
-                "features": [{
-                    "type": "Feature",
-                    "properties": {
-                        "name": f"Location for {self.user}",
-                        "address": self.address or "",
-                        "timestamp": str(self.timestamp or frappe.utils.now())
-                    },
-                    "geometry": {
-                        "type": "Point",
-                        "coordinates": [float(self.longitude), float(self.latitude)]
-                    }
-                }]
-            }
-            self.location = json.dumps(location_data)
-        except Exception as e:
-            frappe.log_error(f"Error setting geolocation field: {str(e)}", "User Location Log")
+    def after_delete(self):
+        """Fall back to the previous fix if the latest one was deleted"""
+        refresh_last_location(self.user)
+        forget_position(self.user)
     
     def validate(self):
         """Validate the document before saving"""
@@ -59,3 +47,19 @@ class UserLocationLog(Document):
         
         if not (-180 <= float(self.longitude) <= 180):
             frappe.throw("Longitude must be between -180 and 180")
+        
+        self.geohash = geohash_encode(float(self.latitude), float(self.longitude))
+
+
+def on_doctype_update():
+    """Indexes for the location API query paths (filter by user, order by creation)"""
+    frappe.db.add_index("User Location Log", ["user", "creation"], index_name="user_creation_index")
+    
+    # Spatial queries prefilter on geohash prefixes within a time window
+    frappe.db.add_index("User Location Log", ["geohash", "creation"], index_name="geohash_creation_index")
+    
+    # Newer Frappe versions already index `creation` on every table
+    if not frappe.db.sql(
+        "SHOW INDEX FROM `tabUser Location Log` WHERE Column_name = 'creation' AND Seq_in_index = 1"
+    ):
+        frappe.db.add_index("User Location Log", ["creation"], index_name="creation_index")
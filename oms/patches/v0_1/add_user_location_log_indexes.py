@@ -0,0 +1,7 @@
+from oms.oms.doctype.user_location_log.user_location_log import on_doctype_update
+
+
+def execute():
+	# on_doctype_update only runs when the DocType itself changes, so apply the
+	# indexes explicitly for sites that already have the table
+	on_doctype_update()
@@ -0,0 +1,52 @@
+import frappe
+
+from oms.utils.geo import geohash_encode
+
+# Rows updated per statement so the patch never holds a long lock on the table
+CHUNK_SIZE = 5000
+
+
+def execute():
+	"""Fill `geohash` on existing fixes and last locations so spatial queries can find them."""
+	while True:
+		rows = frappe.db.sql(
+			"""
+			SELECT name, latitude, longitude
+			FROM `tabUser Location Log`
+			WHERE geohash IS NULL
+			LIMIT %s
+			""",
+			(CHUNK_SIZE,),
+			as_dict=True,
+		)
+		if not rows:
+			break
+
+		frappe.db.sql(
+			"""
+			UPDATE `tabUser Location Log`
+			SET geohash = CASE name {cases} END
+			WHERE name IN ({names})
+			""".format(
+				cases=" ".join(["WHEN %s THEN %s"] * len(rows)),
+				names=", ".join(["%s"] * len(rows)),
+			),
+			[
+				*(
+					value
+					for row in rows
+					for value in (row.name, geohash_encode(row.latitude or 0, row.longitude or 0))
+				),
+				*(row.name for row in rows),
+			],
+		)
+		frappe.db.commit()
+
+	frappe.db.sql(
+		"""
+		UPDATE `tabUser Last Location` ull
+		INNER JOIN `tabUser Location Log` ul ON ul.name = ull.location_log
+		SET ull.geohash = ul.geohash
+		"""
+	)
+	frappe.db.commit()
@@ -0,0 +1,10 @@
+import frappe
+
+from oms.utils.last_location import backfill_last_locations
+
+
+def execute():
+	if not frappe.db.table_exists("User Location Log"):
+		return
+
+	backfill_last_locations()
@@ -0,0 +1,23 @@
+import frappe
+
+# Rows cleared per UPDATE so the patch never holds a long lock on the table
+CHUNK_SIZE = 10_000
+
+
+def execute():
+	"""Drop the GeoJSON blobs stored per fix; geometry is now derived from latitude/longitude on read."""
+	while True:
+		frappe.db.sql(
+			"""
+			UPDATE `tabUser Location Log`
+			SET locaion = NULL
+			WHERE locaion IS NOT NULL
+			LIMIT %s
+			""",
+			(CHUNK_SIZE,),
+		)
+		updated = frappe.db.sql("SELECT ROW_COUNT()")[0][0]
+		frappe.db.commit()
+
+		if updated < CHUNK_SIZE:
+			break
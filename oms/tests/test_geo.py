@@ -0,0 +1,69 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+from frappe.tests import UnitTestCase
+
+from oms.utils.geo import geohash_cell_size, geohash_cover, geohash_encode
+
+
+def sample_box(min_lat, min_lng, max_lat, max_lng, steps=8):
+	"""Corners, edges and an interior grid of a bounding box"""
+	for i in range(steps + 1):
+		for j in range(steps + 1):
+			yield (
+				min_lat + (max_lat - min_lat) * i / steps,
+				min_lng + (max_lng - min_lng) * j / steps,
+			)
+
+
+class UnitTestGeohash(UnitTestCase):
+	def assertCovers(self, box, cover):
+		self.assertTrue(cover)
+		for lat, lng in sample_box(*box):
+			geohash = geohash_encode(lat, lng)
+			self.assertTrue(
+				any(geohash.startswith(prefix) for prefix in cover),
+				f"{lat}, {lng} ({geohash}) is outside the cover {cover}",
+			)
+
+	def test_encode_known_point(self):
+		self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+	def test_prefixes_nest(self):
+		self.assertTrue(geohash_encode(28.6139, 77.209).startswith(geohash_encode(28.6139, 77.209, 5)))
+
+	def test_cover_box_inside_one_cell(self):
+		lat, lng = 28.6139, 77.209
+		cover = geohash_cover(lat - 1e-5, lng - 1e-5, lat + 1e-5, lng + 1e-5)
+		self.assertCovers((lat - 1e-5, lng - 1e-5, lat + 1e-5, lng + 1e-5), cover)
+
+	def test_cover_box_on_cell_edges(self):
+		# Edges exactly on cell boundaries: points on the max edges fall in the next cells
+		for precision in (4, 6, 7):
+			height, width = geohash_cell_size(precision)
+			i, j = int((90 + 28.6) // height), int((180 + 77.2) // width)
+			box = (-90 + i * height, -180 + j * width, -90 + (i + 2) * height, -180 + (j + 3) * width)
+			with self.subTest(precision=precision):
+				self.assertCovers(box, geohash_cover(*box, max_cells=64))
+
+	def test_cover_box_across_prime_meridian_and_equator(self):
+		box = (-0.01, -0.01, 0.01, 0.01)
+		cover = geohash_cover(*box)
+		self.assertGreater(len(cover), 1)
+		self.assertCovers(box, cover)
+
+	def test_cover_box_at_top_right_corner_of_the_world(self):
+		box = (89.99, 179.99, 90.0, 180.0)
+		self.assertCovers(box, geohash_cover(*box))
+
+	def test_cover_respects_max_cells(self):
+		box = (28.0, 77.0, 28.5, 77.5)
+		for max_cells in (1, 4, 32):
+			cover = geohash_cover(*box, max_cells=max_cells)
+			with self.subTest(max_cells=max_cells):
+				self.assertLessEqual(len(cover), max_cells)
+				if cover:
+					self.assertCovers(box, cover)
+
+	def test_cover_gives_up_on_huge_boxes(self):
+		self.assertEqual(geohash_cover(-80, -170, 80, 170, max_cells=4), [])
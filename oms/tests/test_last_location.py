@@ -0,0 +1,109 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from oms.utils.last_location import get_last_location_changes, touch_last_seen, upsert_last_locations
+
+# Older than any real row, so these come first in `modified` order
+T1 = datetime(2000, 1, 1, 9, 0, 0)
+T2 = T1 + timedelta(seconds=1)
+
+
+class IntegrationTestLastLocationChanges(IntegrationTestCase):
+	def setUp(self):
+		prefix = frappe.generate_hash(length=8)
+		self.users = [f"{prefix}-{i}@delta.test" for i in range(7)]
+
+		# Five users share one upsert's `modified`, as one drain batch would
+		self.modified = dict.fromkeys(self.users[:5], T1) | dict.fromkeys(self.users[5:], T2)
+		frappe.db.bulk_insert(
+			"User Last Location",
+			("name", "user", "creation", "modified", "last_seen", "latitude", "longitude"),
+			[(user, user, modified, modified, modified, 0, 0) for user, modified in self.modified.items()],
+		)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_pages_split_inside_a_tie(self):
+		seen = []
+		after = None
+		while len(seen) < len(self.users):
+			rows, after = get_last_location_changes(after, limit=2)
+			self.assertTrue(rows)
+			seen.extend(row.user for row in rows)
+
+		self.assertEqual(
+			seen[: len(self.users)], sorted(self.users, key=lambda user: (self.modified[user], user))
+		)
+
+	def test_caught_up_cursor_skips_seen_rows(self):
+		rows, after = get_last_location_changes(None, limit=10_000)
+		self.assertEqual(after[1], None)
+		self.assertTrue(set(self.users) <= {row.user for row in rows})
+
+		rows, _after = get_last_location_changes(after, limit=10_000)
+		self.assertFalse(set(self.users) & {row.user for row in rows})
+
+
+def make_log(user, creation, latitude):
+	return {
+		"name": frappe.generate_hash(length=10),
+		"user": user,
+		"creation": creation,
+		"full_name": user,
+		"latitude": latitude,
+		"longitude": 0,
+		"accuracy_meters": None,
+		"geohash": None,
+		"address": None,
+		"manual_refresh": 0,
+	}
+
+
+class IntegrationTestUpsertLastLocations(IntegrationTestCase):
+	def setUp(self):
+		self.user = f"{frappe.generate_hash(length=8)}@upsert.test"
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_row(self):
+		return frappe.db.get_value(
+			"User Last Location", self.user, ["location_log", "latitude", "last_seen"], as_dict=True
+		)
+
+	def test_newest_log_in_a_batch_wins(self):
+		logs = [make_log(self.user, T1 + timedelta(minutes=minutes), minutes) for minutes in (5, 9, 2)]
+		upsert_last_locations(logs)
+
+		row = self.get_row()
+		self.assertEqual(row.location_log, logs[1]["name"])
+		self.assertEqual(row.latitude, 9)
+		self.assertEqual(row.last_seen, T1 + timedelta(minutes=9))
+
+	def test_older_log_does_not_overwrite(self):
+		newer = make_log(self.user, T2, 2)
+		upsert_last_locations([newer])
+		upsert_last_locations([make_log(self.user, T1, 1)])
+
+		row = self.get_row()
+		self.assertEqual(row.location_log, newer["name"])
+		self.assertEqual(row.latitude, 2)
+		self.assertEqual(row.last_seen, T2)
+
+	def test_touch_last_seen_only_moves_forward(self):
+		upsert_last_locations([make_log(self.user, T2, 2)])
+
+		touch_last_seen(self.user, T1)
+		self.assertEqual(self.get_row().last_seen, T2)
+
+		later = T2 + timedelta(minutes=1)
+		touch_last_seen(self.user, later)
+		row = self.get_row()
+		self.assertEqual(row.last_seen, later)
+		self.assertEqual(row.latitude, 2)
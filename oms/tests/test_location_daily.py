@@ -0,0 +1,86 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+from datetime import datetime, timedelta
+
+from frappe.tests import UnitTestCase
+
+from oms.utils.location_daily import (
+	ACTIVE_GAP_SECONDS,
+	MIN_DWELL_SECONDS,
+	add_fix,
+	new_state,
+	summarize,
+)
+
+START = datetime(2025, 3, 1, 9, 0, 0)
+
+# About 111 m per 0.001 degrees of latitude
+LAT, LNG = 28.6, 77.2
+
+
+def fold(fixes):
+	"""State after adding `(seconds, lat_offset, accuracy)` fixes in order"""
+	state = new_state()
+	for seconds, lat_offset, accuracy in fixes:
+		add_fix(state, LAT + lat_offset, LNG, accuracy, START + timedelta(seconds=seconds))
+	return state
+
+
+class UnitTestDailySummary(UnitTestCase):
+	def test_empty_day(self):
+		summary = summarize(new_state())
+		self.assertEqual(summary["distance_meters"], 0)
+		self.assertEqual(summary["point_count"], 0)
+		self.assertEqual(summary["stops"], [])
+		self.assertIsNone(summary["first_seen"])
+		self.assertIsNone(summary["last_seen"])
+
+	def test_distance_counts_real_moves(self):
+		summary = summarize(fold([(0, 0, 10), (60, 0.001, 10), (120, 0.002, 10)]))
+		self.assertAlmostEqual(summary["distance_meters"], 222.4, delta=0.5)
+		self.assertEqual(summary["point_count"], 3)
+
+	def test_jitter_is_not_distance(self):
+		# 11 m steps stay below the 15 m jitter floor and never move the anchor
+		summary = summarize(fold([(0, 0, 5), (60, 0.0001, 5), (120, 0, 5), (180, 0.0001, 5)]))
+		self.assertEqual(summary["distance_meters"], 0)
+
+	def test_drift_is_measured_from_the_anchor(self):
+		# Each step is jitter, but together they add up to a real move
+		summary = summarize(fold([(0, 0, 5), (60, 0.0001, 5), (120, 0.0002, 5)]))
+		self.assertAlmostEqual(summary["distance_meters"], 22.2, delta=0.5)
+
+	def test_inaccurate_fix_does_not_add_distance(self):
+		summary = summarize(fold([(0, 0, 10), (60, 0.001, 500)]))
+		self.assertEqual(summary["distance_meters"], 0)
+
+	def test_long_gaps_are_not_active_time(self):
+		gap = ACTIVE_GAP_SECONDS + 1
+		summary = summarize(fold([(0, 0, 10), (600, 0, 10), (600 + gap, 0, 10)]))
+		self.assertEqual(summary["active_seconds"], 600)
+		self.assertEqual(summary["first_seen"], str(START))
+		self.assertEqual(summary["last_seen"], str(START + timedelta(seconds=600 + gap)))
+
+	def test_stop_needs_the_dwell_time(self):
+		short = summarize(fold([(0, 0, 10), (MIN_DWELL_SECONDS - 1, 0, 10), (MIN_DWELL_SECONDS, 0.01, 10)]))
+		self.assertEqual(short["stop_count"], 0)
+
+		long = summarize(fold([(0, 0, 10), (MIN_DWELL_SECONDS, 0, 10), (MIN_DWELL_SECONDS + 60, 0.01, 10)]))
+		self.assertEqual(long["stop_count"], 1)
+		self.assertEqual(long["dwell_seconds"], MIN_DWELL_SECONDS)
+		self.assertNotIn("ongoing", long["stops"][0])
+
+	def test_open_stop_counts_as_ongoing(self):
+		summary = summarize(fold([(0, 0.01, 10), (60, 0, 10), (60 + MIN_DWELL_SECONDS, 0.0002, 10)]))
+		self.assertEqual(summary["stop_count"], 1)
+		self.assertEqual(summary["stops"][0]["ongoing"], 1)
+		self.assertEqual(summary["stops"][0]["point_count"], 2)
+
+	def test_incremental_matches_full_fold(self):
+		fixes = [(i * 90, (i % 7) * 0.0007, 10) for i in range(40)]
+		state = fold(fixes[:25])
+		for seconds, lat_offset, accuracy in fixes[25:]:
+			add_fix(state, LAT + lat_offset, LNG, accuracy, START + timedelta(seconds=seconds))
+
+		self.assertEqual(summarize(state), summarize(fold(fixes)))
@@ -0,0 +1,99 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from oms.utils.location_filter import (
+	SUPPRESSED_INACCURATE,
+	SUPPRESSED_STATIONARY,
+	filter_redundant_fixes,
+	forget_position,
+	remember_position,
+)
+
+START = datetime(2025, 3, 1, 9, 0, 0)
+
+# About 11 m per 0.0001 degrees of latitude
+SETTINGS = {
+	"oms_location_min_distance_meters": 20,
+	"oms_location_keepalive_seconds": 900,
+	"oms_location_max_accuracy_meters": 50,
+}
+
+
+def make_fix(seconds, lat_offset=0.0, accuracy=10, manual_refresh=0):
+	return {
+		"latitude": 28.6 + lat_offset,
+		"longitude": 77.2,
+		"accuracy_meters": accuracy,
+		"timestamp": START + timedelta(seconds=seconds),
+		"manual_refresh": manual_refresh,
+	}
+
+
+class IntegrationTestFilterRedundantFixes(IntegrationTestCase):
+	def setUp(self):
+		self.user = f"{frappe.generate_hash(length=10)}@filter.test"
+		self.settings = patch.dict(frappe.conf, SETTINGS)
+		self.settings.start()
+
+	def tearDown(self):
+		self.settings.stop()
+		forget_position(self.user)
+		frappe.db.rollback()
+
+	def reasons(self, rows):
+		kept, suppressed = filter_redundant_fixes(self.user, rows)
+		self.assertEqual(len(kept) + len(suppressed), len(rows))
+		return [row.get("suppressed") for row in sorted(rows, key=lambda row: row["timestamp"])]
+
+	def test_first_fix_is_kept(self):
+		self.assertEqual(self.reasons([make_fix(0)]), [None])
+
+	def test_stationary_fixes_are_suppressed(self):
+		rows = [make_fix(0), make_fix(30, 0.00005), make_fix(60, 0.0001)]
+		self.assertEqual(self.reasons(rows), [None, SUPPRESSED_STATIONARY, SUPPRESSED_STATIONARY])
+
+	def test_moving_fix_is_kept(self):
+		self.assertEqual(self.reasons([make_fix(0), make_fix(30, 0.001)]), [None, None])
+
+	def test_distance_is_measured_from_the_last_kept_fix(self):
+		# Each step is under the threshold, but the drift from the kept fix is not
+		rows = [make_fix(0), make_fix(10, 0.00015), make_fix(20, 0.0003)]
+		self.assertEqual(self.reasons(rows), [None, SUPPRESSED_STATIONARY, None])
+
+	def test_keepalive_stores_a_stationary_fix(self):
+		rows = [make_fix(0), make_fix(899), make_fix(900), make_fix(901)]
+		self.assertEqual(self.reasons(rows), [None, SUPPRESSED_STATIONARY, None, SUPPRESSED_STATIONARY])
+
+	def test_inaccurate_fix_is_suppressed(self):
+		rows = [make_fix(0), make_fix(30, 0.01, accuracy=51), make_fix(60, 0.01, accuracy=50)]
+		self.assertEqual(self.reasons(rows), [None, SUPPRESSED_INACCURATE, None])
+
+	def test_inaccurate_fix_does_not_move_the_reference(self):
+		rows = [make_fix(0), make_fix(10, 0.01, accuracy=500), make_fix(20, 0.00005)]
+		self.assertEqual(self.reasons(rows), [None, SUPPRESSED_INACCURATE, SUPPRESSED_STATIONARY])
+
+	def test_manual_refresh_is_always_kept(self):
+		rows = [make_fix(0), make_fix(10, manual_refresh=1), make_fix(20, accuracy=500, manual_refresh=1)]
+		self.assertEqual(self.reasons(rows), [None, None, None])
+
+	def test_cached_position_is_the_reference(self):
+		remember_position(self.user, {"latitude": 28.6, "longitude": 77.2, "creation": START})
+		self.assertEqual(self.reasons([make_fix(60)]), [SUPPRESSED_STATIONARY])
+
+	def test_unsorted_batch_is_filtered_in_time_order(self):
+		rows = [make_fix(30, 0.00005), make_fix(0)]
+		self.assertEqual(self.reasons(rows), [None, SUPPRESSED_STATIONARY])
+
+	def test_filters_off(self):
+		with patch.dict(
+			frappe.conf,
+			{"oms_location_min_distance_meters": 0, "oms_location_max_accuracy_meters": 0},
+		):
+			rows = [make_fix(0), make_fix(1), make_fix(2, accuracy=10_000)]
+			self.assertEqual(self.reasons(rows), [None, None, None])
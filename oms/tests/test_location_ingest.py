@@ -0,0 +1,87 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+import json
+from datetime import datetime, timedelta
+
+from frappe.tests import UnitTestCase
+
+from oms.utils.location_ingest import (
+	MAX_CLOCK_SKEW,
+	make_fix_row,
+	parse_coordinates,
+	parse_device_info,
+	parse_fix_timestamp,
+	validate_fixes,
+)
+
+NOW = datetime(2025, 3, 1, 12, 0, 0)
+
+
+class UnitTestLocationIngest(UnitTestCase):
+	def test_parse_coordinates(self):
+		self.assertEqual(parse_coordinates("12.5", 77.25, "8"), (12.5, 77.25, 8.0))
+		self.assertEqual(parse_coordinates(0, 0), (0.0, 0.0, None))
+
+	def test_parse_coordinates_rejects_bad_values(self):
+		cases = {
+			("abc", 1): "Invalid coordinate values",
+			(None, 1): "Invalid coordinate values",
+			(90.1, 0): "Latitude must be between -90 and 90",
+			(0, -180.5): "Longitude must be between -180 and 180",
+		}
+		for (lat, lng), message in cases.items():
+			with self.subTest(lat=lat, lng=lng):
+				with self.assertRaises(ValueError) as ctx:
+					parse_coordinates(lat, lng)
+				self.assertEqual(str(ctx.exception), message)
+
+	def test_parse_fix_timestamp(self):
+		self.assertEqual(parse_fix_timestamp(None, NOW), NOW)
+		self.assertEqual(parse_fix_timestamp("", NOW), NOW)
+
+		earlier = NOW - timedelta(hours=1)
+		self.assertEqual(parse_fix_timestamp(str(earlier), NOW), earlier)
+
+		within_skew = NOW + MAX_CLOCK_SKEW
+		self.assertEqual(parse_fix_timestamp(within_skew, NOW), within_skew)
+		self.assertEqual(parse_fix_timestamp(within_skew + timedelta(seconds=1), NOW), NOW)
+
+	def test_parse_device_info_keeps_essentials(self):
+		info = {"userAgent": "x" * 80, "platform": "Linux", "language": "en-IN", "screen": "1080p"}
+		parsed = json.loads(parse_device_info(json.dumps(info)))
+
+		self.assertEqual(parsed["browser"], "x" * 50)
+		self.assertEqual(parsed["platform"], "Linux")
+		self.assertNotIn("screen", parsed)
+		self.assertEqual(parse_device_info(None), "{}")
+		self.assertEqual(json.loads(parse_device_info("not json")), {"info": "not json"})
+
+	def test_make_fix_row(self):
+		row = make_fix_row(1.0, 2.0, None, manual_refresh="1", timestamp=NOW)
+		self.assertEqual(row["manual_refresh"], 1)
+		self.assertEqual(row["timestamp"], NOW)
+		self.assertEqual(
+			make_fix_row(1.0, 2.0, None, manual_refresh=None, timestamp=NOW)["manual_refresh"], 0
+		)
+
+	def test_validate_fixes(self):
+		fixes = [
+			{"latitude": 12.9, "longitude": 77.6, "timestamp": str(NOW - timedelta(minutes=2))},
+			"not a fix",
+			{"latitude": 120, "longitude": 77.6},
+			{"latitude": 12.9, "longitude": 77.6, "timestamp": "garbage"},
+			{"latitude": 13.0, "longitude": 77.7, "manual_refresh": 1},
+		]
+		rows, results = validate_fixes(fixes, NOW)
+
+		self.assertEqual([r["index"] for r in results], [0, 1, 2, 3, 4])
+		self.assertEqual([r["success"] for r in results], [True, False, False, False, True])
+		self.assertEqual(results[1]["message"], "Invalid location payload")
+		self.assertEqual(results[2]["message"], "Latitude must be between -90 and 90")
+		self.assertEqual(results[3]["message"], "Invalid timestamp")
+
+		self.assertEqual([row["index"] for row in rows], [0, 4])
+		self.assertEqual(rows[0]["timestamp"], NOW - timedelta(minutes=2))
+		self.assertEqual(rows[1]["timestamp"], NOW)
+		self.assertEqual(rows[1]["manual_refresh"], 1)
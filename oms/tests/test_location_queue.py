@@ -0,0 +1,94 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from oms.utils import location_queue
+from oms.utils.location_queue import _acquire_drain_lock, _release_drain_lock, process_batch
+
+
+def make_payload(user, second):
+	return json.dumps(
+		{
+			"user": user,
+			"latitude": 28.6,
+			"longitude": 77.2,
+			"accuracy_meters": 10,
+			"address": None,
+			"device_info": None,
+			"manual_refresh": 0,
+			"timestamp": f"2025-03-01T09:00:{second:02d}",
+			"enqueued_at": "2025-03-01T09:00:30",
+		}
+	)
+
+
+class IntegrationTestProcessBatch(IntegrationTestCase):
+	def setUp(self):
+		prefix = f"oms:test:{frappe.generate_hash(length=8)}"
+		self.keys = {
+			"PROCESSING_KEY": f"{prefix}:processing",
+			"DEAD_LETTER_KEY": f"{prefix}:dead_letters",
+			"DRAIN_LOCK_KEY": f"{prefix}:lock",
+		}
+		self.patches = [patch.object(location_queue, name, key) for name, key in self.keys.items()]
+		for key_patch in self.patches:
+			key_patch.start()
+
+	def tearDown(self):
+		for key_patch in self.patches:
+			key_patch.stop()
+		for key in self.keys.values():
+			frappe.cache.delete(frappe.cache.make_key(key))
+
+	def dead_letters(self):
+		return [json.loads(entry) for entry in frappe.cache.lrange(self.keys["DEAD_LETTER_KEY"], 0, -1)]
+
+	def test_failing_user_is_dead_lettered_alone(self):
+		inserted = {}
+
+		def insert_fixes(user, rows):
+			if user == "broken@queue.test":
+				raise ValueError("cannot insert")
+			inserted[user] = rows
+			return rows
+
+		payloads = [
+			make_payload("a@queue.test", 1),
+			make_payload("broken@queue.test", 2),
+			make_payload("a@queue.test", 0),
+			"{not json",
+		]
+		location_queue._push(self.keys["PROCESSING_KEY"], payloads)
+
+		with patch.object(location_queue, "insert_fixes", side_effect=insert_fixes):
+			process_batch(payloads)
+
+		# Rows reach insert_fixes oldest first
+		self.assertEqual(list(inserted), ["a@queue.test"])
+		self.assertEqual([row["timestamp"].second for row in inserted["a@queue.test"]], [0, 1])
+
+		dead = self.dead_letters()
+		self.assertEqual([entry["payload"] for entry in dead], [payloads[3], payloads[1]])
+		self.assertEqual(dead[1]["error"], "cannot insert")
+
+		# Everything was handled, so nothing is left to replay after a crash
+		self.assertEqual(frappe.cache.lrange(self.keys["PROCESSING_KEY"], 0, -1), [])
+
+	def test_lock_is_released_only_by_its_owner(self):
+		self.assertTrue(_acquire_drain_lock("first"))
+		self.assertFalse(_acquire_drain_lock("second"))
+
+		# The first run's lock expired and another run took it over
+		frappe.cache.delete(frappe.cache.make_key(self.keys["DRAIN_LOCK_KEY"]))
+		self.assertTrue(_acquire_drain_lock("second"))
+
+		_release_drain_lock("first")
+		self.assertFalse(_acquire_drain_lock("third"))
+
+		_release_drain_lock("second")
+		self.assertTrue(_acquire_drain_lock("third"))
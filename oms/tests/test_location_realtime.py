@@ -0,0 +1,83 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from oms.utils.location_realtime import (
+	PENDING_CACHE_KEY,
+	THROTTLE_CACHE_KEY,
+	_acquire_push_slot,
+	decode_pending_users,
+	get_pending_users,
+	publish_location_updates,
+)
+
+START = datetime(2025, 3, 1, 9, 0, 0)
+
+
+def make_log(user, seconds, name=None):
+	return frappe._dict(
+		name=name or f"{user}-{seconds}",
+		user=user,
+		latitude=28.6,
+		longitude=77.2,
+		accuracy_meters=10,
+		address=None,
+		creation=START + timedelta(seconds=seconds),
+	)
+
+
+class UnitTestPendingUsers(UnitTestCase):
+	def test_keys_are_decoded(self):
+		self.assertEqual(decode_pending_users({b"a@x.test": b"1", "b@x.test": 1}), ["a@x.test", "b@x.test"])
+
+	def test_exclude_matches_decoded_keys(self):
+		self.assertEqual(decode_pending_users({b"a@x.test": 1, b"b@x.test": 1}, {"a@x.test"}), ["b@x.test"])
+
+
+class IntegrationTestPushThrottle(IntegrationTestCase):
+	def setUp(self):
+		self.user = f"{frappe.generate_hash(length=10)}@realtime.test"
+		self.settings = patch.dict(frappe.conf, {"oms_location_push_interval": 60})
+		self.settings.start()
+
+	def tearDown(self):
+		self.settings.stop()
+		frappe.cache.delete(frappe.cache.make_key(f"{THROTTLE_CACHE_KEY}:{self.user}"))
+		frappe.cache.hdel(PENDING_CACHE_KEY, self.user)
+
+	def test_slot_is_claimed_once(self):
+		self.assertTrue(_acquire_push_slot(self.user))
+		self.assertFalse(_acquire_push_slot(self.user))
+
+	def test_no_throttle(self):
+		with patch.dict(frappe.conf, {"oms_location_push_interval": 0}):
+			self.assertTrue(_acquire_push_slot(self.user))
+			self.assertTrue(_acquire_push_slot(self.user))
+
+	def test_throttled_user_is_marked_pending(self):
+		with patch("frappe.publish_realtime") as publish:
+			publish_location_updates([make_log(self.user, 0), make_log(self.user, 5)])
+			publish_location_updates([make_log(self.user, 10)])
+
+		# Only the newest of the first batch was pushed
+		self.assertEqual(publish.call_count, 1)
+		(updates,) = publish.call_args.args[1].values()
+		self.assertEqual([update["name"] for update in updates], [f"{self.user}-5"])
+		self.assertIn(self.user, get_pending_users())
+
+	def test_pending_user_waits_for_the_slot(self):
+		_acquire_push_slot(self.user)
+		frappe.cache.hset(PENDING_CACHE_KEY, self.user, 1)
+
+		with patch("frappe.publish_realtime") as publish:
+			publish_location_updates([make_log(f"other-{self.user}", 0)])
+
+		self.assertIn(self.user, get_pending_users())
+		(updates,) = publish.call_args.args[1].values()
+		self.assertNotIn(self.user, [update["user"] for update in updates])
+		frappe.cache.delete(frappe.cache.make_key(f"{THROTTLE_CACHE_KEY}:other-{self.user}"))
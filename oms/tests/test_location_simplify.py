@@ -0,0 +1,72 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+import math
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.tests import UnitTestCase
+
+from oms.utils.location_simplify import WINDOW_SIZE, douglas_peucker, simplify_track
+
+
+def make_track(count, wiggle=0.0005):
+	"""A path heading east that zigzags north and south, one fix a second"""
+	start = datetime(2025, 3, 1, 9, 0, 0)
+	return [
+		frappe._dict(
+			latitude=28.6 + wiggle * math.sin(i / 3),
+			longitude=77.2 + i * 0.0001,
+			creation=start + timedelta(seconds=i),
+		)
+		for i in range(count)
+	]
+
+
+def as_point(row):
+	return [row.latitude, row.longitude, row.creation]
+
+
+class UnitTestSimplifyTrack(UnitTestCase):
+	def test_straight_line_keeps_endpoints_only(self):
+		track = make_track(100, wiggle=0)
+		result = simplify_track(track)
+
+		self.assertEqual(result["points"], [as_point(track[0]), as_point(track[-1])])
+		self.assertEqual(result["source_points"], 100)
+
+	def test_short_track_is_unchanged(self):
+		track = make_track(2)
+		self.assertEqual(simplify_track(track)["points"], [as_point(row) for row in track])
+
+	def test_point_budget(self):
+		track = make_track(3000)
+		for max_points in (2, 10, 250):
+			result = simplify_track(track, max_points=max_points)
+			with self.subTest(max_points=max_points):
+				self.assertLessEqual(len(result["points"]), max_points)
+				self.assertEqual(result["points"][0], as_point(track[0]))
+				self.assertEqual(result["points"][-1], as_point(track[-1]))
+
+	def test_budget_and_endpoints_across_windows(self):
+		track = make_track(2 * WINDOW_SIZE + 123)
+		result = simplify_track(track, max_points=100)
+
+		points = result["points"]
+		self.assertLessEqual(len(points), 100)
+		self.assertEqual(points[0], as_point(track[0]))
+		self.assertEqual(points[-1], as_point(track[-1]))
+		self.assertEqual(result["source_points"], len(track))
+
+		# Output stays in time order with no repeats where windows join
+		times = [point[2] for point in points]
+		self.assertEqual(times, sorted(set(times)))
+
+	def test_tolerance_only_grows_when_over_budget(self):
+		track = make_track(500)
+		self.assertEqual(simplify_track(track, max_points=1000)["tolerance_meters"], 0)
+		self.assertGreater(simplify_track(track, max_points=10)["tolerance_meters"], 0)
+
+	def test_douglas_peucker_keeps_the_corner(self):
+		points = [[0.0, 0.0], [0.0, 0.001], [0.0, 0.002], [0.001, 0.002], [0.002, 0.002]]
+		self.assertEqual(douglas_peucker(points, 1.0), [points[0], points[2], points[4]])
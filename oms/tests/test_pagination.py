@@ -0,0 +1,107 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from oms.utils.pagination import clamp_page_size, decode_cursor, encode_cursor, fetch_page
+
+
+class UnitTestCursor(UnitTestCase):
+	def test_round_trip(self):
+		created = datetime(2025, 3, 1, 9, 30, 15, 250000)
+		cursor = encode_cursor([created, "LOG-0001"], source="summary")
+
+		values, source = decode_cursor(cursor)
+		self.assertEqual(values, [str(created), "LOG-0001"])
+		self.assertEqual(source, "summary")
+		self.assertNotIn("=", cursor)
+
+	def test_round_trip_without_source(self):
+		values, source = decode_cursor(encode_cursor([None, "LOG-0001"]))
+		self.assertEqual(values, [None, "LOG-0001"])
+		self.assertIsNone(source)
+
+	def test_invalid_cursor(self):
+		for cursor in ("not a cursor!", encode_cursor([1])[:-3] + "###", "e30", None):
+			with self.assertRaises(ValueError):
+				decode_cursor(cursor)
+
+	def test_clamp_page_size(self):
+		self.assertEqual(clamp_page_size(0), 1)
+		self.assertEqual(clamp_page_size("25"), 25)
+		self.assertEqual(clamp_page_size(10**6), 1000)
+
+
+class IntegrationTestFetchPage(IntegrationTestCase):
+	def setUp(self):
+		self.user = f"{frappe.generate_hash(length=10)}@pagination.test"
+		start = datetime(2025, 3, 1, 9, 0, 0)
+
+		# Three rows share a creation time, so only the name tiebreak orders them
+		rows = [
+			("a", start),
+			("b", start),
+			("c", start),
+			("d", start - timedelta(seconds=1)),
+			("e", start - timedelta(seconds=2)),
+		]
+		frappe.db.bulk_insert(
+			"User Location Log",
+			("name", "creation", "modified", "owner", "modified_by", "user", "latitude", "longitude"),
+			[
+				(
+					f"{self.user}-{suffix}",
+					creation,
+					creation,
+					"Administrator",
+					"Administrator",
+					self.user,
+					0,
+					0,
+				)
+				for suffix, creation in rows
+			],
+		)
+		self.expected = [f"{self.user}-{suffix}" for suffix in ("c", "b", "a", "d", "e")]
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def fetch_all(self, limit):
+		names = []
+		after = None
+		while True:
+			rows, has_more = fetch_page(
+				"tabUser Location Log",
+				"name, creation",
+				["user = %(user)s"],
+				{"user": self.user},
+				after=after,
+				limit=limit,
+			)
+			names.extend(row.name for row in rows)
+			if not has_more:
+				return names
+
+			# Pass the position through the client-facing cursor, as the API does
+			after, _source = decode_cursor(encode_cursor([rows[-1].creation, rows[-1].name]))
+
+	def test_pages_cover_every_row_once(self):
+		for limit in (1, 2, 4, 5, 10):
+			with self.subTest(limit=limit):
+				self.assertEqual(self.fetch_all(limit), self.expected)
+
+	def test_page_inside_a_tie(self):
+		rows, has_more = fetch_page(
+			"tabUser Location Log",
+			"name, creation",
+			["user = %(user)s"],
+			{"user": self.user},
+			after=[str(datetime(2025, 3, 1, 9, 0, 0)), f"{self.user}-b"],
+			limit=2,
+		)
+		self.assertEqual([row.name for row in rows], self.expected[2:4])
+		self.assertTrue(has_more)
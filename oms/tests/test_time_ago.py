@@ -0,0 +1,71 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+from datetime import datetime, timedelta
+
+from frappe.tests import UnitTestCase
+
+from oms.utils.time_ago import UNKNOWN, add_time_ago, format_time_ago, time_ago, to_epoch_ms
+
+NOW = datetime(2025, 3, 1, 12, 0, 0)
+
+
+class UnitTestTimeAgo(UnitTestCase):
+	def test_labels(self):
+		cases = {
+			0: "Just now",
+			60: "Just now",
+			61: "1 minute ago",
+			150: "2 minutes ago",
+			3601: "1 hour ago",
+			7200: "2 hours ago",
+			86400: "1 day ago",
+			3 * 86400 + 5: "3 days ago",
+		}
+		for seconds, label in cases.items():
+			with self.subTest(seconds=seconds):
+				self.assertEqual(format_time_ago(seconds), label)
+
+	def test_unknown(self):
+		self.assertEqual(format_time_ago(None), UNKNOWN)
+		self.assertEqual(time_ago(None, NOW), UNKNOWN)
+		self.assertEqual(time_ago("not a date", NOW), UNKNOWN)
+
+	def test_future_is_just_now(self):
+		self.assertEqual(time_ago(NOW + timedelta(hours=2), NOW), "Just now")
+
+	def test_strings_and_datetimes_agree(self):
+		then = NOW - timedelta(minutes=5)
+		self.assertEqual(time_ago(then, NOW), time_ago(str(then), NOW))
+
+	def test_add_time_ago_sets_every_row(self):
+		rows = [
+			{"creation": NOW - timedelta(minutes=5)},
+			{"creation": None, "timestamp": NOW - timedelta(hours=3)},
+			{"creation": NOW + timedelta(seconds=30)},
+			{},
+		]
+		result = add_time_ago(rows, now=NOW)
+
+		self.assertIs(result, rows)
+		self.assertEqual(
+			[row["time_ago"] for row in rows], ["5 minutes ago", "3 hours ago", "Just now", UNKNOWN]
+		)
+
+	def test_add_time_ago_custom_fields(self):
+		rows = add_time_ago([{"last_seen": NOW - timedelta(days=2)}], fields=("last_seen",), now=NOW)
+		self.assertEqual(rows[0]["time_ago"], "2 days ago")
+
+	def test_epoch_ms(self):
+		now_epoch = 1_740_830_400.0
+		self.assertEqual(to_epoch_ms(NOW - timedelta(seconds=90), NOW, now_epoch), 1_740_830_310_000)
+		self.assertEqual(to_epoch_ms(NOW + timedelta(seconds=1.5), NOW, now_epoch), 1_740_830_401_500)
+		self.assertIsNone(to_epoch_ms(None, NOW, now_epoch))
+
+	def test_add_time_ago_epoch_keeps_order(self):
+		rows = [{"creation": NOW - timedelta(seconds=seconds)} for seconds in (5, 500, 50)]
+		add_time_ago(rows, now=NOW, epoch=True)
+
+		self.assertNotIn("time_ago", rows[0])
+		self.assertEqual(rows[0]["epoch_ms"] - rows[1]["epoch_ms"], 495_000)
+		self.assertEqual(rows[2]["epoch_ms"] - rows[1]["epoch_ms"], 450_000)
@@ -0,0 +1,85 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""The SPA's boot payload: user, roles, capabilities, employee and last location.
+
+Everything except the last location is cached per user in a Redis hash and
+dropped by the User, Employee and Role `doc_events` in hooks.py. The last
+location changes with every fix, so it is read from User Last Location by
+primary key on each call instead of invalidating the payload on every insert.
+"""
+
+import frappe
+
+from oms.utils.capabilities import get_capabilities
+from oms.utils.last_location import get_user_last_location
+from oms.utils.user_profile import get_user_profile
+
+BOOT_CACHE_KEY = "oms:boot"
+
+
+def get_boot(user=None) -> dict:
+	"""Boot payload for `user` (default: session user)"""
+	user = user or frappe.session.user
+
+	payload = frappe.cache.hget(BOOT_CACHE_KEY, user)
+	if payload is None:
+		payload = build_boot(user)
+		frappe.cache.hset(BOOT_CACHE_KEY, user, payload)
+
+	return {**payload, "last_location": get_user_last_location(user)}
+
+
+def build_boot(user) -> dict:
+	profile = get_user_profile(user)
+	capabilities = get_capabilities(user)
+
+	return {
+		"user_id": user,
+		"full_name": profile.get("full_name"),
+		"email": profile.get("email"),
+		"user_image": profile.get("user_image"),
+		"roles": capabilities["roles"],
+		"capabilities": {key: value for key, value in capabilities.items() if key != "roles"},
+		"employee": profile.get("employee"),
+		"employee_name": profile.get("employee_name"),
+		"department": profile.get("department"),
+		"designation": profile.get("designation"),
+		"company": profile.get("company"),
+	}
+
+
+def clear_boot_cache(users=None):
+	"""Drop cached payloads for `users`, or for everyone if none are given."""
+	if users is None:
+		frappe.cache.delete_value(BOOT_CACHE_KEY)
+		return
+
+	for user in users:
+		if user:
+			frappe.cache.hdel(BOOT_CACHE_KEY, user)
+
+
+def on_user_change(doc, method=None):
+	"""`doc_events` handler for User"""
+	clear_boot_cache([doc.name])
+
+
+def on_user_rename(doc, method=None, old=None, new=None, merge=False):
+	"""`doc_events` handler for User renames"""
+	clear_boot_cache([old, new])
+
+
+def on_employee_change(doc, method=None, *args, **kwargs):
+	"""`doc_events` handler for Employee; clears both the old and new linked user"""
+	users = [doc.get("user_id")]
+	previous = doc.get_doc_before_save()
+	if previous:
+		users.append(previous.get("user_id"))
+
+	clear_boot_cache(users)
+
+
+def on_role_change(doc, method=None):
+	"""`doc_events` handler for Role and Role Profile"""
+	clear_boot_cache()
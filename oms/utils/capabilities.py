@@ -0,0 +1,64 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""What the current user may do in OMS, resolved once and cached per user.
+
+Permission checks in the location APIs and the SPA's boot payload read the
+capabilities from a Redis hash keyed by user id instead of resolving roles on
+every request. Entries are dropped by the User `doc_events` in hooks.py, which
+fire when roles are added or removed.
+"""
+
+import frappe
+
+CAPABILITIES_CACHE_KEY = "oms:capabilities"
+
+# Roles that may see every user's location
+LOCATION_MANAGER_ROLES = frozenset(("System Manager", "Location Manager", "Manager"))
+
+
+def get_capabilities(user=None) -> dict:
+	"""`{roles, can_view_all_locations, can_track_location}` for `user` (default: session user)"""
+	user = user or frappe.session.user
+
+	capabilities = frappe.cache.hget(CAPABILITIES_CACHE_KEY, user)
+	if capabilities is None:
+		roles = frappe.get_roles(user)
+		capabilities = {
+			"roles": roles,
+			"can_view_all_locations": not LOCATION_MANAGER_ROLES.isdisjoint(roles),
+			"can_track_location": user != "Guest",
+		}
+		frappe.cache.hset(CAPABILITIES_CACHE_KEY, user, capabilities)
+
+	return capabilities
+
+
+def can_view_all_locations(user=None) -> bool:
+	return get_capabilities(user)["can_view_all_locations"]
+
+
+def clear_capabilities_cache(users=None):
+	"""Drop cached capabilities for `users`, or for everyone if none are given."""
+	if users is None:
+		frappe.cache.delete_value(CAPABILITIES_CACHE_KEY)
+		return
+
+	for user in users:
+		if user:
+			frappe.cache.hdel(CAPABILITIES_CACHE_KEY, user)
+
+
+def on_user_change(doc, method=None):
+	"""`doc_events` handler for User"""
+	clear_capabilities_cache([doc.name])
+
+
+def on_user_rename(doc, method=None, old=None, new=None, merge=False):
+	"""`doc_events` handler for User renames"""
+	clear_capabilities_cache([old, new])
+
+
+def on_role_change(doc, method=None):
+	"""`doc_events` handler for Role and Role Profile; may affect any user"""
+	clear_capabilities_cache()
@@ -0,0 +1,146 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Precompiled DocType metadata for the SPA's generic form views.
+
+The field list, link targets and child tables for a DocType are built once and
+kept in a Redis hash together with a version derived from the DocType's
+`modified` timestamp and its Custom Fields and Property Setters. A request that
+already holds the current version gets a short "not modified" answer instead
+of the full payload, so the browser can keep its copy across page loads.
+"""
+
+import hashlib
+
+import frappe
+
+DOCTYPE_META_CACHE_KEY = "oms:doctype_meta"
+
+# Most DocTypes a single bulk request may ask for
+MAX_BULK_DOCTYPES = 50
+
+# Fields the generic forms never render
+SKIPPED_FIELDS = frozenset(("naming_series", "amended_from"))
+
+FIELD_PROPERTIES = (
+	"fieldname",
+	"fieldtype",
+	"label",
+	"reqd",
+	"hidden",
+	"read_only",
+	"options",
+	"default",
+	"description",
+	"idx",
+)
+
+TABLE_FIELDTYPES = frozenset(("Table", "Table MultiSelect"))
+
+
+def get_doctype_meta(doctype, version=None) -> dict:
+	"""Metadata for `doctype`, or just `{doctype, version, not_modified}` if `version` is current."""
+	return get_doctypes_meta([doctype], {doctype: version} if version else None)[doctype]
+
+
+def get_doctypes_meta(doctypes, versions=None) -> dict:
+	"""Return `{doctype: metadata}` for every DocType in `doctypes`.
+
+	`versions` maps DocTypes to the version the caller already has; those that
+	are still current come back as `{doctype, version, not_modified: True}`.
+	Raises `frappe.DoesNotExistError` for unknown DocTypes.
+	"""
+	versions = versions or {}
+	current = get_meta_versions(doctypes)
+
+	missing = [doctype for doctype in doctypes if doctype not in current]
+	if missing:
+		frappe.throw(f"DocType {', '.join(missing)} not found", frappe.DoesNotExistError)
+
+	result = {}
+	for doctype in dict.fromkeys(doctypes):
+		version = current[doctype]
+		if versions.get(doctype) == version:
+			result[doctype] = {"doctype": doctype, "version": version, "not_modified": True}
+			continue
+
+		meta = frappe.cache.hget(DOCTYPE_META_CACHE_KEY, doctype)
+		if meta is None or meta["version"] != version:
+			meta = build_doctype_meta(doctype, version)
+			frappe.cache.hset(DOCTYPE_META_CACHE_KEY, doctype, meta)
+
+		result[doctype] = meta
+
+	return result
+
+
+def get_meta_versions(doctypes) -> dict:
+	"""Return `{doctype: version}`; the version changes whenever the DocType or its customizations do."""
+	if not doctypes:
+		return {}
+
+	params = {"doctypes": tuple(doctypes)}
+	parts = {
+		row.name: [str(row.modified)]
+		for row in frappe.db.sql(
+			"SELECT name, modified FROM `tabDocType` WHERE name IN %(doctypes)s", params, as_dict=True
+		)
+	}
+
+	# Deleting a customization does not bump anything's `modified`, so count them as well
+	for table, column in (("Custom Field", "dt"), ("Property Setter", "doc_type")):
+		for row in frappe.db.sql(
+			f"""
+			SELECT `{column}` as doctype, MAX(modified) as modified, COUNT(*) as count
+			FROM `tab{table}`
+			WHERE `{column}` IN %(doctypes)s
+			GROUP BY `{column}`
+			""",
+			params,
+			as_dict=True,
+		):
+			if row.doctype in parts:
+				parts[row.doctype].append(f"{table}:{row.modified}:{row.count}")
+
+	return {
+		doctype: hashlib.md5("|".join(values).encode()).hexdigest()[:16] for doctype, values in parts.items()
+	}
+
+
+def build_doctype_meta(doctype, version) -> dict:
+	meta = frappe.get_meta(doctype)
+
+	fields = []
+	links = {}
+	tables = {}
+	for field in meta.fields:
+		if field.fieldname in SKIPPED_FIELDS:
+			continue
+
+		fields.append({key: field.get(key) for key in FIELD_PROPERTIES})
+
+		if field.fieldtype == "Link" and field.options:
+			links[field.fieldname] = field.options
+		elif field.fieldtype in TABLE_FIELDTYPES and field.options:
+			tables[field.fieldname] = field.options
+
+	return {
+		"doctype": doctype,
+		"version": version,
+		"title_field": meta.title_field,
+		"istable": meta.istable,
+		"is_submittable": meta.is_submittable,
+		"fields": fields,
+		"links": links,
+		"tables": tables,
+	}
+
+
+def clear_doctype_meta_cache(doctypes=None):
+	"""Drop cached metadata for `doctypes`, or for every DocType if none are given."""
+	if doctypes is None:
+		frappe.cache.delete_value(DOCTYPE_META_CACHE_KEY)
+		return
+
+	for doctype in doctypes:
+		frappe.cache.hdel(DOCTYPE_META_CACHE_KEY, doctype)
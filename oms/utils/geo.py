@@ -0,0 +1,116 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Geometry helpers for location fixes (WGS84 degrees in, meters out)."""
+
+import math
+
+EARTH_RADIUS_METERS = 6_371_008.8
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision stored on every fix; a 9 character cell is about 5 m x 5 m
+GEOHASH_PRECISION = 9
+
+
+def haversine_distance(lat1, lng1, lat2, lng2) -> float:
+	"""Great-circle distance in meters between two points"""
+	phi1, phi2 = math.radians(lat1), math.radians(lat2)
+	d_phi = phi2 - phi1
+	d_lambda = math.radians(lng2 - lng1)
+
+	a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+	return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION) -> str:
+	"""Geohash of a point; cells sharing a prefix are contained in the shorter prefix's cell"""
+	lat_range = [-90.0, 90.0]
+	lng_range = [-180.0, 180.0]
+	chars = []
+	bits = bit_count = 0
+	even = True
+
+	while len(chars) < precision:
+		value, interval = (lng, lng_range) if even else (lat, lat_range)
+		mid = (interval[0] + interval[1]) / 2
+		if value >= mid:
+			bits = bits * 2 + 1
+			interval[0] = mid
+		else:
+			bits = bits * 2
+			interval[1] = mid
+
+		even = not even
+		bit_count += 1
+		if bit_count == 5:
+			chars.append(GEOHASH_BASE32[bits])
+			bits = bit_count = 0
+
+	return "".join(chars)
+
+
+def geohash_cell_size(precision) -> tuple[float, float]:
+	"""`(height, width)` in degrees of a geohash cell of the given precision"""
+	lng_bits = (5 * precision + 1) // 2
+	lat_bits = 5 * precision // 2
+	return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def geohash_cover(min_lat, min_lng, max_lat, max_lng, max_cells=32) -> list[str]:
+	"""Geohash prefixes whose cells together cover the bounding box.
+
+	Uses the longest precision that needs at most `max_cells` cells. Returns an
+	empty list when even single-character cells would need more, i.e. the box is
+	too large for a prefix filter to help.
+	"""
+	for precision in range(GEOHASH_PRECISION, 0, -1):
+		height, width = geohash_cell_size(precision)
+		lat_cells = range(_cell_index(min_lat, -90, height), _cell_index(max_lat, -90, height) + 1)
+		lng_cells = range(_cell_index(min_lng, -180, width), _cell_index(max_lng, -180, width) + 1)
+
+		if len(lat_cells) * len(lng_cells) <= max_cells:
+			return [
+				geohash_encode(-90 + (i + 0.5) * height, -180 + (j + 0.5) * width, precision)
+				for i in lat_cells
+				for j in lng_cells
+			]
+
+	return []
+
+
+def _cell_index(value, origin, size) -> int:
+	# The top edge (90 / 180) belongs to the last cell
+	return min(int((value - origin) // size), int(round((-2 * origin) / size)) - 1)
+
+
+def bbox_around(lat, lng, radius_meters) -> tuple[float, float, float, float]:
+	"""`(min_lat, min_lng, max_lat, max_lng)` of a box containing the circle around a point"""
+	d_lat = math.degrees(radius_meters / EARTH_RADIUS_METERS)
+	cos_lat = math.cos(math.radians(lat))
+	d_lng = (
+		180.0 if cos_lat < 1e-9 else min(180.0, math.degrees(radius_meters / (EARTH_RADIUS_METERS * cos_lat)))
+	)
+
+	return max(-90.0, lat - d_lat), max(-180.0, lng - d_lng), min(90.0, lat + d_lat), min(180.0, lng + d_lng)
+
+
+def polygon_bbox(polygon) -> tuple[float, float, float, float]:
+	"""Bounding box of a polygon given as `[lat, lng]` vertices"""
+	lats = [vertex[0] for vertex in polygon]
+	lngs = [vertex[1] for vertex in polygon]
+	return min(lats), min(lngs), max(lats), max(lngs)
+
+
+def point_in_polygon(lat, lng, polygon) -> bool:
+	"""Ray casting test of a point against a polygon given as `[lat, lng]` vertices"""
+	inside = False
+	j = len(polygon) - 1
+	for i in range(len(polygon)):
+		lat_i, lng_i = polygon[i]
+		lat_j, lng_j = polygon[j]
+		if (lat_i > lat) != (lat_j > lat) and lng < (lng_j - lng_i) * (lat - lat_i) / (lat_j - lat_i) + lng_i:
+			inside = not inside
+		j = i
+
+	return inside
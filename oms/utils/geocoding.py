@@ -0,0 +1,265 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Reverse geocoding of stored fixes, off the request path.
+
+`insert_fixes` only pushes the names of new User Location Log rows onto a Redis
+list once they commit; a background job drains it in batches within a time budget, resolves each row's geohash cell
+through the cache or the configured geocoder, and fills in `address` (if the
+browser sent none) and `country`. Results are cached per cell, so fixes from
+the same office never cause a second lookup.
+
+The geocoder is any callable taking a list of `(latitude, longitude)` tuples
+and returning one `{address, country}` dict (or None) per point, named by the
+`geocoder` setting. `nominatim_geocoder` talks to OpenStreetMap's Nominatim;
+`stub_geocoder` answers locally for tests and development.
+"""
+
+import time
+from functools import partial
+
+import frappe
+from frappe.utils import cint
+
+from oms.utils.geo import geohash_encode
+from oms.utils.settings import get_setting
+
+LOCATION_LOG_DOCTYPE = "User Location Log"
+
+GEOCODE_QUEUE_KEY = "oms:geocode_queue"
+GEOCODE_MISSING_KEY = "oms:geocode_missing"
+GEOCODE_CACHE_KEY = "oms:geocode"
+GEOCODE_JOB_ID = "oms:geocode"
+
+# Fixes popped per batch
+GEOCODE_BATCH_SIZE = 100
+
+# Cells sent to the geocoder per call; the deadline is checked between calls
+GEOCODER_CHUNK_SIZE = 5
+
+# A run stops taking new work after this many seconds, leaving room within the job timeout
+# for the geocoder call in flight (Nominatim: up to 5 requests of at most 10s each)
+GEOCODE_JOB_TIMEOUT = 300
+GEOCODE_JOB_BUDGET_SECONDS = 180
+
+# Queued names whose row is not found are retried this many times before being dropped
+GEOCODE_MISSING_RETRIES = 3
+GEOCODE_MISSING_TTL = 24 * 3600
+
+# Addresses rarely change; a month keeps office cells warm without growing forever
+GEOCODE_CACHE_TTL = 30 * 24 * 3600
+
+# Nominatim's usage policy allows one request per second
+NOMINATIM_MIN_INTERVAL = 1.0
+
+
+def is_geocoding_enabled() -> bool:
+	return bool(get_setting("geocoder"))
+
+
+def queue_geocoding(logs):
+	"""Schedule `logs` (inserted User Location Log rows) for reverse geocoding once the transaction commits"""
+	if not logs or not is_geocoding_enabled():
+		return
+
+	# Pushed after commit, so no run can pop a name before its row is visible or after it rolled back
+	frappe.db.after_commit.add(partial(_push_names, [log.name for log in logs]))
+	frappe.enqueue(
+		"oms.utils.geocoding.process_geocode_queue",
+		queue="short",
+		timeout=GEOCODE_JOB_TIMEOUT,
+		job_id=GEOCODE_JOB_ID,
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def process_geocode_queue():
+	"""Background job (and scheduler safety net): geocode queued fixes a batch at a time.
+
+	Stops after `GEOCODE_JOB_BUDGET_SECONDS`. Fixes not resolved by then, or when
+	the geocoder fails, go back onto the queue for the next run.
+	"""
+	if not is_geocoding_enabled():
+		return
+
+	deadline = time.monotonic() + GEOCODE_JOB_BUDGET_SECONDS
+	while time.monotonic() < deadline:
+		names = _pop_batch()
+		if not names:
+			break
+
+		try:
+			pending = geocode_logs(names, deadline)
+		except Exception:
+			frappe.db.rollback()
+			_push_names(names)
+			frappe.log_error(frappe.get_traceback(), "Reverse geocoding failed")
+			break
+
+		frappe.db.commit()
+		if pending:
+			_push_names(pending)
+
+
+def _pop_batch():
+	# LRANGE + LTRIM in one MULTI/EXEC, so the cron run and the queued job never take the same names
+	key = frappe.cache.make_key(GEOCODE_QUEUE_KEY)
+	pipeline = frappe.cache.pipeline()
+	pipeline.lrange(key, 0, GEOCODE_BATCH_SIZE - 1)
+	pipeline.ltrim(key, GEOCODE_BATCH_SIZE, -1)
+	names, _trimmed = pipeline.execute()
+	return [frappe.safe_decode(name) for name in names]
+
+
+def _push_names(names):
+	pipeline = frappe.cache.pipeline()
+	pipeline.rpush(frappe.cache.make_key(GEOCODE_QUEUE_KEY), *names)
+	pipeline.execute()
+
+
+def geocode_logs(names, deadline=None) -> list[str]:
+	"""Fill in `address` and `country` for the User Location Log rows `names`.
+
+	Returns the names left unresolved because `deadline` (a `time.monotonic()`
+	value) passed, and names without a row that have not used up their retries.
+	Geocoder errors propagate.
+	"""
+	rows = frappe.get_all(
+		LOCATION_LOG_DOCTYPE,
+		filters={"name": ["in", names]},
+		fields=["name", "latitude", "longitude", "geohash", "address", "country"],
+	)
+	found = {row.name for row in rows}
+	pending = _retry_missing([name for name in names if name not in found])
+
+	rows = [row for row in rows if not row.address or not row.country]
+	if not rows:
+		return pending
+
+	precision = cint(get_setting("geocode_cell_precision"))
+	by_cell = {}
+	for row in rows:
+		cell = (row.geohash or geohash_encode(row.latitude, row.longitude))[:precision]
+		by_cell.setdefault(cell, []).append(row)
+
+	points = {cell: (cell_rows[0].latitude, cell_rows[0].longitude) for cell, cell_rows in by_cell.items()}
+	places = resolve_cells(points, deadline)
+
+	for cell, cell_rows in by_cell.items():
+		if cell not in places:
+			pending.extend(row.name for row in cell_rows)
+			continue
+
+		for row in cell_rows:
+			_apply_place(row, places[cell])
+
+	return pending
+
+
+def _retry_missing(names) -> list[str]:
+	"""Of `names` (queued but without a row), those still within `GEOCODE_MISSING_RETRIES`"""
+	if not names:
+		return []
+
+	key = frappe.cache.make_key(GEOCODE_MISSING_KEY)
+	pipeline = frappe.cache.pipeline()
+	for name in names:
+		pipeline.hincrby(key, name, 1)
+	pipeline.expire(key, GEOCODE_MISSING_TTL)
+	attempts = pipeline.execute()[:-1]
+
+	return [name for name, count in zip(names, attempts, strict=True) if count <= GEOCODE_MISSING_RETRIES]
+
+
+def resolve_cells(points, deadline=None) -> dict:
+	"""Return `{cell: {address, country}}` for `points` (`{cell: (lat, lng)}`).
+
+	Only cache misses go to the geocoder, `GEOCODER_CHUNK_SIZE` cells per call;
+	cells not reached before `deadline` are left out of the result.
+	"""
+	places = {}
+	missing = []
+	for cell in points:
+		place = frappe.cache.get_value(f"{GEOCODE_CACHE_KEY}:{cell}")
+		if place is None:
+			missing.append(cell)
+		else:
+			places[cell] = place
+
+	geocoder = get_geocoder() if missing else None
+	for start in range(0, len(missing), GEOCODER_CHUNK_SIZE):
+		if deadline is not None and time.monotonic() >= deadline:
+			break
+
+		chunk = missing[start : start + GEOCODER_CHUNK_SIZE]
+		results = geocoder([points[cell] for cell in chunk])
+
+		for cell, place in zip(chunk, results, strict=True):
+			# Cache empty answers too, so a cell the geocoder knows nothing about is not asked again
+			place = {"address": (place or {}).get("address"), "country": (place or {}).get("country")}
+			frappe.cache.set_value(f"{GEOCODE_CACHE_KEY}:{cell}", place, expires_in_sec=GEOCODE_CACHE_TTL)
+			places[cell] = place
+
+	return places
+
+
+def _apply_place(row, place):
+	values = {}
+	if not row.address and place.get("address"):
+		values["address"] = place["address"]
+	if not row.country and place.get("country"):
+		values["country"] = place["country"]
+	if not values:
+		return
+
+	frappe.db.set_value(LOCATION_LOG_DOCTYPE, row.name, values, update_modified=False)
+
+	if "address" in values:
+		# Only if this fix is still the user's latest position
+		frappe.db.sql(
+			"""
+			UPDATE `tabUser Last Location`
+			SET address = %(address)s
+			WHERE location_log = %(name)s AND IFNULL(address, '') = ''
+			""",
+			{"address": values["address"], "name": row.name},
+		)
+
+
+def get_geocoder():
+	return frappe.get_attr(get_setting("geocoder"))
+
+
+def nominatim_geocoder(points):
+	"""Geocoder backed by Nominatim (`nominatim_url` setting), one request per point."""
+	import requests
+
+	url = get_setting("nominatim_url")
+	headers = {"User-Agent": f"OMS location tracking ({frappe.local.site})"}
+	results = []
+	for index, (lat, lng) in enumerate(points):
+		if index:
+			time.sleep(NOMINATIM_MIN_INTERVAL)
+
+		response = requests.get(
+			url,
+			params={"format": "jsonv2", "lat": lat, "lon": lng, "zoom": 18},
+			headers=headers,
+			timeout=10,
+		)
+		response.raise_for_status()
+		data = response.json()
+
+		results.append(
+			{"address": data.get("display_name"), "country": (data.get("address") or {}).get("country")}
+			if "error" not in data
+			else None
+		)
+
+	return results
+
+
+def stub_geocoder(points):
+	"""Offline geocoder for tests and development: echoes the coordinates back as the address."""
+	return [{"address": f"{lat:.5f}, {lng:.5f}", "country": "Testland"} for lat, lng in points]
@@ -0,0 +1,290 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Per-endpoint metrics and opt-in profiling for the whitelisted methods in oms.api.
+
+`@instrument` (placed under `@frappe.whitelist()`) times the handler and, for
+the duration of the call, wraps `frappe.db.sql` (`track_queries`) to count
+queries, the time spent in them and the rows they return. The `after_request` hook adds the
+response size and the time spent after the handler returned (serialising the
+response and the framework's own work). Everything goes into one Redis hash
+per endpoint with a single pipelined round-trip per request, including
+latency and query-count histograms, so N+1 patterns show up as a heavy tail
+in the query histogram.
+
+Managers can profile a single request by passing `oms_profile=1` when the
+`api_profiler` setting names a profiler; the report is kept in a short list
+in the cache and returned by the stats endpoint.
+"""
+
+import cProfile
+import functools
+import io
+import pstats
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint, flt, now_datetime
+
+from oms.utils.capabilities import can_view_all_locations
+from oms.utils.settings import get_setting
+
+API_STATS_CACHE_KEY = "oms:api_stats"
+API_PROFILES_CACHE_KEY = "oms:api_profiles"
+
+# Upper bounds of the histogram buckets; anything above the last one lands in "inf"
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# Profiles kept, newest first, and lines of each cProfile report
+MAX_PROFILES = 20
+PROFILE_REPORT_LINES = 40
+
+
+def instrument(fn):
+	"""Record metrics for every call of the whitelisted method `fn`."""
+	endpoint = f"{fn.__module__}.{fn.__name__}"
+
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		# Endpoints calling other endpoints are measured as part of the outer call
+		if getattr(frappe.local, "oms_api_call", None) or not cint(get_setting("api_instrumentation")):
+			return fn(*args, **kwargs)
+
+		call = frappe.local.oms_api_call = frappe._dict(endpoint=endpoint)
+		profiler = _start_profiler()
+		start = time.perf_counter()
+		try:
+			with track_queries(call):
+				result = fn(*args, **kwargs)
+			call.failed = isinstance(result, dict) and result.get("success") is False
+			return result
+		except Exception:
+			call.errored = True
+			raise
+		finally:
+			call.handler_ms = (time.perf_counter() - start) * 1000
+			frappe.local.oms_api_call = None
+
+			if profiler:
+				_save_profile(endpoint, profiler, call.handler_ms)
+
+			# Inside a request the after_request hook records it, once the response size is known
+			if getattr(frappe.local, "oms_request_start", None) is None:
+				record_call(call)
+			else:
+				frappe.local.oms_api_last_call = call
+
+	return wrapper
+
+
+@contextmanager
+def track_queries(stats=None):
+	"""Count the queries run inside the block, their time and rows returned, into `stats`."""
+	stats = stats if stats is not None else frappe._dict()
+	stats.update(queries=0, db_ms=0.0, rows=0)
+
+	original_sql = frappe.db.sql
+	frappe.db.sql = _counting_sql(original_sql, stats)
+	try:
+		yield stats
+	finally:
+		frappe.db.sql = original_sql
+
+
+def _counting_sql(sql, call):
+	@functools.wraps(sql)
+	def counting_sql(*args, **kwargs):
+		start = time.perf_counter()
+		try:
+			result = sql(*args, **kwargs)
+		finally:
+			call.queries += 1
+			call.db_ms += (time.perf_counter() - start) * 1000
+
+		if isinstance(result, list | tuple):
+			call.rows += len(result)
+		return result
+
+	return counting_sql
+
+
+def before_request():
+	"""`before_request` hook"""
+	frappe.local.oms_request_start = time.perf_counter()
+	frappe.local.oms_api_last_call = None
+
+
+def after_request(response=None, request=None):
+	"""`after_request` hook: record the instrumented call made by this request, if any"""
+	call = getattr(frappe.local, "oms_api_last_call", None)
+	start = getattr(frappe.local, "oms_request_start", None)
+	if not call or start is None:
+		return
+
+	call.overhead_ms = max((time.perf_counter() - start) * 1000 - call.handler_ms, 0)
+	if response is not None:
+		if response.content_length is not None:
+			call.bytes = response.content_length
+		elif not response.is_streamed and not response.direct_passthrough:
+			call.bytes = len(response.get_data())
+
+	record_call(call)
+	frappe.local.oms_api_last_call = None
+
+
+def record_call(call):
+	key = frappe.cache.make_key(f"{API_STATS_CACHE_KEY}:{call.endpoint}")
+	pipeline = frappe.cache.pipeline()
+	pipeline.sadd(frappe.cache.make_key(f"{API_STATS_CACHE_KEY}:endpoints"), call.endpoint)
+	pipeline.hincrby(key, "calls", 1)
+	if call.get("errored"):
+		pipeline.hincrby(key, "errors", 1)
+	if call.get("failed"):
+		pipeline.hincrby(key, "failures", 1)
+
+	pipeline.hincrbyfloat(key, "handler_ms", round(call.handler_ms, 3))
+	pipeline.hincrbyfloat(key, "db_ms", round(call.db_ms, 3))
+	pipeline.hincrby(key, "queries", call.queries)
+	pipeline.hincrby(key, "rows", call.rows)
+	pipeline.hincrby(key, f"latency_le_{_bucket(call.handler_ms, LATENCY_BUCKETS_MS)}", 1)
+	pipeline.hincrby(key, f"queries_le_{_bucket(call.queries, QUERY_BUCKETS)}", 1)
+
+	if call.get("overhead_ms") is not None:
+		pipeline.hincrby(key, "http_calls", 1)
+		pipeline.hincrbyfloat(key, "overhead_ms", round(call.overhead_ms, 3))
+		pipeline.hincrby(key, "bytes", cint(call.get("bytes")))
+
+	pipeline.execute()
+
+
+def _bucket(value, buckets):
+	for bound in buckets:
+		if value <= bound:
+			return bound
+	return "inf"
+
+
+def get_endpoint_stats() -> dict:
+	"""Return `{endpoint: metrics}` with averages and histogram-estimated percentiles."""
+	# Read through a plain pipeline: the counters are raw Redis integers, which
+	# `frappe.cache`'s own readers would try to unpickle
+	endpoints = sorted(frappe.safe_decode(endpoint) for endpoint in _get_endpoints())
+	pipeline = frappe.cache.pipeline()
+	for endpoint in endpoints:
+		pipeline.hgetall(frappe.cache.make_key(f"{API_STATS_CACHE_KEY}:{endpoint}"))
+	hashes = pipeline.execute()
+
+	stats = {}
+	for endpoint, values in zip(endpoints, hashes, strict=True):
+		raw = {frappe.safe_decode(field): flt(frappe.safe_decode(value)) for field, value in values.items()}
+		calls = cint(raw.get("calls"))
+		if not calls:
+			continue
+
+		http_calls = cint(raw.get("http_calls"))
+		latency = _histogram(raw, "latency", LATENCY_BUCKETS_MS)
+		stats[endpoint] = {
+			"calls": calls,
+			"errors": cint(raw.get("errors")),
+			"failures": cint(raw.get("failures")),
+			"avg_ms": round(raw.get("handler_ms", 0) / calls, 3),
+			"p50_ms": _percentile(latency, calls, 0.50),
+			"p95_ms": _percentile(latency, calls, 0.95),
+			"p99_ms": _percentile(latency, calls, 0.99),
+			"avg_db_ms": round(raw.get("db_ms", 0) / calls, 3),
+			"avg_queries": round(raw.get("queries", 0) / calls, 2),
+			"avg_rows": round(raw.get("rows", 0) / calls, 2),
+			"avg_overhead_ms": round(raw.get("overhead_ms", 0) / http_calls, 3) if http_calls else None,
+			"avg_bytes": round(raw.get("bytes", 0) / http_calls) if http_calls else None,
+			"latency_histogram_ms": latency,
+			"query_histogram": _histogram(raw, "queries", QUERY_BUCKETS),
+		}
+
+	return stats
+
+
+def _get_endpoints():
+	pipeline = frappe.cache.pipeline()
+	pipeline.smembers(frappe.cache.make_key(f"{API_STATS_CACHE_KEY}:endpoints"))
+	return pipeline.execute()[0]
+
+
+def _histogram(raw, name, buckets):
+	return {str(bound): cint(raw.get(f"{name}_le_{bound}")) for bound in (*buckets, "inf")}
+
+
+def _percentile(histogram, total, fraction):
+	"""Upper bound of the bucket holding the given fraction of calls (None if it's the open-ended one)"""
+	seen = 0
+	for bound, count in histogram.items():
+		seen += count
+		if seen >= total * fraction:
+			return None if bound == "inf" else cint(bound)
+	return None
+
+
+def clear_api_stats():
+	keys = [f"{API_STATS_CACHE_KEY}:{frappe.safe_decode(endpoint)}" for endpoint in _get_endpoints()]
+	keys.append(f"{API_STATS_CACHE_KEY}:endpoints")
+	frappe.cache.delete_value(keys)
+
+
+def _start_profiler():
+	profiler_name = get_setting("api_profiler")
+	if not profiler_name or not cint(frappe.form_dict.get("oms_profile")):
+		return None
+	if not can_view_all_locations(frappe.session.user):
+		return None
+
+	if profiler_name == "pyinstrument":
+		try:
+			from pyinstrument import Profiler
+		except ImportError:
+			profiler_name = "cprofile"
+		else:
+			profiler = Profiler()
+			profiler.start()
+			return profiler
+
+	profiler = cProfile.Profile()
+	profiler.enable()
+	return profiler
+
+
+def _save_profile(endpoint, profiler, duration_ms):
+	if isinstance(profiler, cProfile.Profile):
+		profiler.disable()
+		output = io.StringIO()
+		pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+		profiler_name, report = "cprofile", output.getvalue()
+	else:
+		profiler.stop()
+		profiler_name, report = "pyinstrument", profiler.output_text(unicode=True)
+
+	key = frappe.cache.make_key(API_PROFILES_CACHE_KEY)
+	pipeline = frappe.cache.pipeline()
+	pipeline.lpush(
+		key,
+		frappe.as_json(
+			{
+				"endpoint": endpoint,
+				"user": frappe.session.user,
+				"at": now_datetime(),
+				"duration_ms": round(duration_ms, 3),
+				"profiler": profiler_name,
+				"report": report,
+			}
+		),
+	)
+	pipeline.ltrim(key, 0, MAX_PROFILES - 1)
+	pipeline.execute()
+
+
+def get_api_profiles() -> list[dict]:
+	"""The most recent profiles, newest first"""
+	return [
+		frappe.parse_json(frappe.safe_decode(entry))
+		for entry in frappe.cache.lrange(API_PROFILES_CACHE_KEY, 0, MAX_PROFILES - 1)
+	]
@@ -0,0 +1,223 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Maintenance of the User Last Location table (one row per user).
+
+Every insert into User Location Log upserts the user's row here, so "where is
+everyone right now" is a read of O(users) rows instead of a GROUP BY over the
+full location history.
+"""
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+from oms.utils.pagination import fetch_page
+
+LAST_LOCATION_DOCTYPE = "User Last Location"
+
+# Columns copied from a User Location Log row; `last_seen` is the log's creation
+COPIED_FIELDS = (
+	"full_name",
+	"latitude",
+	"longitude",
+	"accuracy_meters",
+	"geohash",
+	"address",
+	"manual_refresh",
+)
+
+# Rows modified within this window may belong to transactions that have not
+# committed yet, so delta reads stop short of it and pick them up next time
+DELTA_SETTLE_TIME = timedelta(seconds=2)
+
+# Columns sent to the live map; everything else it shows comes from the profile cache
+MAP_FIELDS = (
+	"user",
+	"location_log",
+	"latitude",
+	"longitude",
+	"accuracy_meters",
+	"address",
+	"last_seen",
+	"modified",
+)
+
+# Only newer fixes may overwrite a row, so late offline syncs never move a user backwards.
+# `last_seen` is assigned last because MariaDB evaluates the assignments left to right.
+UPSERT_QUERY = """
+	INSERT INTO `tabUser Last Location`
+		(name, creation, modified, owner, modified_by, docstatus, idx, user,
+		location_log, last_seen, full_name, latitude, longitude, accuracy_meters, geohash, address, manual_refresh)
+	VALUES {values}
+	ON DUPLICATE KEY UPDATE
+		modified = IF(VALUES(last_seen) >= last_seen, VALUES(modified), modified),
+		location_log = IF(VALUES(last_seen) >= last_seen, VALUES(location_log), location_log),
+		full_name = IF(VALUES(last_seen) >= last_seen, VALUES(full_name), full_name),
+		latitude = IF(VALUES(last_seen) >= last_seen, VALUES(latitude), latitude),
+		longitude = IF(VALUES(last_seen) >= last_seen, VALUES(longitude), longitude),
+		accuracy_meters = IF(VALUES(last_seen) >= last_seen, VALUES(accuracy_meters), accuracy_meters),
+		geohash = IF(VALUES(last_seen) >= last_seen, VALUES(geohash), geohash),
+		address = IF(VALUES(last_seen) >= last_seen, VALUES(address), address),
+		manual_refresh = IF(VALUES(last_seen) >= last_seen, VALUES(manual_refresh), manual_refresh),
+		last_seen = IF(VALUES(last_seen) >= last_seen, VALUES(last_seen), last_seen)
+"""
+
+
+def upsert_last_locations(logs):
+	"""Upsert User Last Location from User Location Log rows (dicts or docs).
+
+	Each log needs `name`, `user`, `creation` and the fields in `COPIED_FIELDS`.
+	Only the newest log per user is written.
+	"""
+	latest = {}
+	for log in logs:
+		current = latest.get(log.get("user"))
+		if not current or get_datetime(log.get("creation")) >= get_datetime(current.get("creation")):
+			latest[log.get("user")] = log
+
+	if not latest:
+		return
+
+	now = now_datetime()
+	row_placeholder = f"({', '.join(['%s'] * (10 + len(COPIED_FIELDS)))})"
+	placeholders = []
+	values = []
+	for user, log in latest.items():
+		placeholders.append(row_placeholder)
+		values.extend(
+			[
+				user,
+				now,
+				now,
+				"Administrator",
+				"Administrator",
+				0,
+				0,
+				user,
+				log.get("name"),
+				log.get("creation"),
+				*(log.get(field) for field in COPIED_FIELDS),
+			]
+		)
+
+	frappe.db.sql(UPSERT_QUERY.format(values=", ".join(placeholders)), values)
+
+
+def touch_last_seen(user, seen):
+	"""Move a user's `last_seen` forward without changing their position, for fixes that were not stored."""
+	frappe.db.sql(
+		"""
+		UPDATE `tabUser Last Location`
+		SET last_seen = %(seen)s, modified = %(now)s
+		WHERE user = %(user)s AND last_seen < %(seen)s
+		""",
+		{"user": user, "seen": seen, "now": now_datetime()},
+	)
+
+
+def refresh_last_location(user):
+	"""Recompute a user's row from the log, e.g. after their latest fix was deleted."""
+	latest = frappe.get_all(
+		"User Location Log",
+		filters={"user": user},
+		fields=["name", "user", "creation", *COPIED_FIELDS],
+		order_by="creation desc",
+		limit=1,
+	)
+
+	frappe.db.delete(LAST_LOCATION_DOCTYPE, {"user": user})
+	upsert_last_locations(latest)
+
+
+def backfill_last_locations() -> int:
+	"""Rebuild User Last Location from the full history. Returns the number of users written.
+
+	This runs the expensive latest-per-user query once; afterwards the table is kept
+	current by the insert paths.
+	"""
+	latest = frappe.db.sql(
+		"""
+		SELECT ul1.name, ul1.user, ul1.creation, {fields}
+		FROM `tabUser Location Log` ul1
+		INNER JOIN (
+			SELECT user, MAX(creation) as max_creation
+			FROM `tabUser Location Log`
+			GROUP BY user
+		) ul2 ON ul1.user = ul2.user AND ul1.creation = ul2.max_creation
+		""".format(fields=", ".join(f"ul1.{field}" for field in COPIED_FIELDS)),
+		as_dict=True,
+	)
+
+	for start in range(0, len(latest), 500):
+		upsert_last_locations(latest[start : start + 500])
+
+	return len({row.user for row in latest})
+
+
+def get_last_locations(limit=50, after=None):
+	"""Latest position of every tracked user, newest first, shaped like User Location Log rows.
+
+	Keyset paged on `(last_seen, user)`; pass the last row's `(creation, user)` as
+	`after` for the next page. Returns `(rows, has_more)`.
+	"""
+	return fetch_page(
+		"tabUser Last Location",
+		"""location_log as name, user, full_name, latitude, longitude, accuracy_meters,
+			address, manual_refresh, last_seen as creation, last_seen as timestamp""",
+		[],
+		{},
+		sort_columns=("last_seen", "user"),
+		after=after,
+		limit=limit,
+	)
+
+
+def get_user_last_location(user):
+	"""A user's latest position, or None if they have never sent one."""
+	return frappe.db.get_value(
+		LAST_LOCATION_DOCTYPE,
+		user,
+		["latitude", "longitude", "accuracy_meters", "address", "last_seen as creation"],
+		as_dict=True,
+	)
+
+
+def get_last_location_changes(after=None, limit=500):
+	"""Rows of users whose position changed after the `after` position, oldest change first.
+
+	One upsert stamps every row it writes with the same `modified`, so positions
+	are `(modified, user)` pairs rather than `modified` alone. Returns
+	`(rows, next_after)`; pass `next_after` back as `after` on the next call. With
+	no `after` every row is returned.
+	"""
+	until = now_datetime() - DELTA_SETTLE_TIME
+	conditions = ["modified <= %(until)s"]
+	values = {"until": until, "limit": int(limit)}
+
+	if after:
+		values["after_modified"], values["after_user"] = after
+		if values["after_user"]:
+			conditions.append(
+				"(modified > %(after_modified)s OR (modified = %(after_modified)s AND user > %(after_user)s))"
+			)
+		else:
+			conditions.append("modified > %(after_modified)s")
+
+	rows = frappe.db.sql(
+		"""
+		SELECT {fields}
+		FROM `tabUser Last Location`
+		WHERE {conditions}
+		ORDER BY modified, user
+		LIMIT %(limit)s
+		""".format(fields=", ".join(MAP_FIELDS), conditions=" AND ".join(conditions)),
+		values,
+		as_dict=True,
+	)
+
+	# A full page may have more changes behind it, even within the same `modified`
+	if len(rows) == int(limit):
+		return rows, [rows[-1].modified, rows[-1].user]
+	return rows, [until, None]
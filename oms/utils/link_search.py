@@ -0,0 +1,150 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Typeahead lookups for Link fields.
+
+Options are matched by prefix on the DocType's name, title field and search
+fields, so the name (primary key) and any indexed search field can serve the
+match from an index, and are paged by name with a keyset cursor instead of
+loading the whole table into the dropdown.
+
+Pages are cached for a short time per user, since results depend on the
+user's permissions. Each DocType has a generation counter in the cache keys;
+the `doc_events` in hooks.py bump it whenever a document of that DocType is
+saved, deleted or renamed, which orphans every cached page for it at once.
+Only DocTypes some Link field points at are ever searched, so writes to any
+other DocType skip the bump.
+"""
+
+import hashlib
+import json
+
+import frappe
+from frappe.utils import cint
+
+from oms.utils.pagination import decode_cursor, encode_cursor
+
+LINK_SEARCH_CACHE_KEY = "oms:link_search"
+LINK_TARGETS_CACHE_KEY = "oms:link_search_targets"
+
+# Seconds a cached page is served before it is read again
+LINK_SEARCH_CACHE_TTL = 60
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def find_link_options(doctype, txt=None, fields=None, after=None, limit=DEFAULT_PAGE_SIZE):
+	"""Return `(rows, next_cursor)` for `doctype` documents whose name or title starts with `txt`.
+
+	`fields` defaults to the name and title field; unknown fields are dropped.
+	A malformed cursor restarts from the first page. Raises
+	`frappe.PermissionError` if the user cannot read `doctype`.
+	"""
+	if not frappe.has_permission(doctype, "read"):
+		frappe.throw(f"Not permitted to read {doctype}", frappe.PermissionError)
+
+	meta = frappe.get_meta(doctype)
+	fields = _get_fields(meta, fields)
+	txt = (txt or "").strip()
+	limit = min(max(cint(limit) or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+	last_name = _decode_after(after) if after else None
+
+	cache_key = _make_cache_key(doctype, [txt, fields, last_name, limit])
+	page = frappe.cache.get_value(cache_key)
+	if page is None:
+		page = _fetch_page(meta, txt, fields, last_name, limit)
+		frappe.cache.set_value(cache_key, page, expires_in_sec=LINK_SEARCH_CACHE_TTL)
+
+	rows, has_more = page
+	next_cursor = encode_cursor([rows[-1]["name"]]) if has_more else None
+	return rows, next_cursor
+
+
+def _decode_after(after):
+	try:
+		values, _source = decode_cursor(after)
+		return str(values[0]) if values[0] is not None else None
+	except (ValueError, TypeError, KeyError, IndexError):
+		return None
+
+
+def _get_fields(meta, fields):
+	title_field = meta.title_field if meta.title_field and meta.has_field(meta.title_field) else None
+	if not fields:
+		fields = [title_field] if title_field else []
+
+	return list(dict.fromkeys(["name"] + [field for field in fields if meta.has_field(field)]))
+
+
+def _get_search_columns(meta):
+	columns = ["name"]
+	if meta.title_field:
+		columns.append(meta.title_field)
+	columns.extend(field.strip() for field in (meta.search_fields or "").split(","))
+
+	return [
+		column
+		for column in dict.fromkeys(columns)
+		if column == "name"
+		or (meta.has_field(column) and meta.get_field(column).fieldtype in frappe.model.data_fieldtypes)
+	]
+
+
+def _fetch_page(meta, txt, fields, last_name, limit):
+	filters = [["name", ">", last_name]] if last_name is not None else []
+
+	or_filters = None
+	if txt:
+		# Prefix match only, so an index on the column can still be used
+		pattern = txt.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+		or_filters = [[column, "like", pattern] for column in _get_search_columns(meta)]
+
+	rows = frappe.get_list(
+		meta.name,
+		fields=fields,
+		filters=filters,
+		or_filters=or_filters,
+		order_by="name asc",
+		limit_page_length=limit + 1,
+	)
+
+	return rows[:limit], len(rows) > limit
+
+
+def _make_cache_key(doctype, args):
+	generation = cint(
+		frappe.cache.get(frappe.cache.make_key(f"{LINK_SEARCH_CACHE_KEY}:generation:{doctype}"))
+	)
+	digest = hashlib.md5(json.dumps(args, default=str).encode()).hexdigest()
+	return f"{LINK_SEARCH_CACHE_KEY}:{doctype}:{generation}:{frappe.session.user}:{digest}"
+
+
+def clear_link_search_cache(doctype):
+	"""Orphan every cached page for `doctype`; they expire on their own."""
+	frappe.cache.incrby(frappe.cache.make_key(f"{LINK_SEARCH_CACHE_KEY}:generation:{doctype}"), 1)
+
+
+def get_link_target_doctypes() -> set:
+	"""DocTypes that a Link field or Custom Field points at"""
+	targets = frappe.cache.get_value(LINK_TARGETS_CACHE_KEY)
+	if targets is None:
+		targets = set()
+		for doctype in ("DocField", "Custom Field"):
+			targets.update(
+				frappe.get_all(doctype, filters={"fieldtype": "Link"}, pluck="options", distinct=True)
+			)
+		frappe.cache.set_value(LINK_TARGETS_CACHE_KEY, targets)
+
+	return targets
+
+
+def on_doc_change(doc, method=None, *args, **kwargs):
+	"""`doc_events` handler for every DocType; only Link targets have cached pages"""
+	if doc.doctype in get_link_target_doctypes():
+		clear_link_search_cache(doc.doctype)
+
+
+def on_link_field_change(doc, method=None, *args, **kwargs):
+	"""`doc_events` handler for DocType and Custom Field, which can add or remove Link targets"""
+	frappe.cache.delete_value(LINK_TARGETS_CACHE_KEY)
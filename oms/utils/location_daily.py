@@ -0,0 +1,355 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Daily travel distance, active time and stops per user.
+
+`update_daily_summaries` runs from the scheduler. It finds the (user, day)
+pairs that received fixes since the last run, using the `modified` index of
+User Location Log, and folds only the new fixes into each day's User Daily
+Travel Summary row. The row's `state` holds what is needed to resume: running
+totals, the last fix, the anchor distance is measured from, the open stop
+cluster and the closed stops. A late fix older than the day's last processed
+fix (an offline queue synced late) makes that day be recomputed from scratch.
+
+A fix whose transaction commits after the scan has passed its `modified` would
+be missed by the watermark alone, so every insert also records its (user, day)
+in a Redis sorted set once it commits, and each run brings those days up to date
+before scanning.
+
+Stationary fixes are suppressed on ingest (see `oms.utils.location_filter`),
+but the keepalive interval is shorter than `ACTIVE_GAP_SECONDS`, so a user
+standing still still counts as active.
+"""
+
+import json
+from datetime import datetime, time, timedelta
+from functools import partial
+from time import monotonic
+
+import frappe
+from frappe.utils import get_datetime, getdate, now_datetime
+
+from oms.utils.geo import haversine_distance
+from oms.utils.last_location import DELTA_SETTLE_TIME
+from oms.utils.user_profile import get_user_profile
+
+SUMMARY_DOCTYPE = "User Daily Travel Summary"
+
+# Where the last run stopped, as a `modified` timestamp of User Location Log
+WATERMARK_KEY = "oms_daily_travel_watermark"
+
+# "user|date" members scored by the earliest new fix's creation (epoch seconds)
+TOUCHED_DAYS_KEY = "oms:daily_travel_touched"
+TOUCHED_DAYS_PER_RUN = 5000
+
+# Gaps between fixes longer than this are not counted as active time
+ACTIVE_GAP_SECONDS = 30 * 60
+
+# Movement below this (or below the fix's accuracy) is treated as GPS jitter
+MIN_MOVE_METERS = 15
+
+# A stop is a run of fixes within this radius of its first fix, lasting at least MIN_DWELL_SECONDS
+STOP_RADIUS_METERS = 100
+MIN_DWELL_SECONDS = 5 * 60
+
+# Commit after this many user-days so one run never holds a long transaction
+COMMIT_EVERY = 200
+
+# Fixes per watermark step, and seconds after which a run stops starting new steps
+WINDOW_ROWS = 20_000
+RUN_BUDGET_SECONDS = 180
+
+# Watermark before the first run
+EPOCH = "1970-01-01 00:00:00"
+
+SUMMARY_FIELDS = (
+	"full_name",
+	"department",
+	"distance_meters",
+	"active_seconds",
+	"dwell_seconds",
+	"stop_count",
+	"point_count",
+	"first_seen",
+	"last_seen",
+	"stops",
+	"state",
+)
+
+UPSERT_QUERY = """
+	INSERT INTO `tabUser Daily Travel Summary`
+		(name, creation, modified, owner, modified_by, docstatus, idx, user, date, {fields})
+	VALUES (%(name)s, %(now)s, %(now)s, 'Administrator', 'Administrator', 0, 0, %(user)s, %(date)s, {placeholders})
+	ON DUPLICATE KEY UPDATE
+		modified = VALUES(modified), {updates}
+""".format(
+	fields=", ".join(SUMMARY_FIELDS),
+	placeholders=", ".join(f"%({field})s" for field in SUMMARY_FIELDS),
+	updates=", ".join(f"{field} = VALUES({field})" for field in SUMMARY_FIELDS),
+)
+
+
+def update_daily_summaries():
+	"""Fold the fixes written since the last run into their users' daily summaries.
+
+	Works through the backlog in windows of at most `WINDOW_ROWS` fixes, committing
+	and moving the watermark after each one, and stops after `RUN_BUDGET_SECONDS`.
+	A first run over a long history is thus spread over several runs instead of
+	restarting from the beginning every time it hits the job timeout.
+	"""
+	for i, (user, day, first_new) in enumerate(_pop_touched_days(TOUCHED_DAYS_PER_RUN), 1):
+		update_day(user, day, first_new)
+		if i % COMMIT_EVERY == 0:
+			frappe.db.commit()
+	frappe.db.commit()
+
+	since = frappe.db.get_global(WATERMARK_KEY) or EPOCH
+	until = now_datetime() - DELTA_SETTLE_TIME
+	deadline = monotonic() + RUN_BUDGET_SECONDS
+
+	while monotonic() < deadline:
+		window_end = _get_window_end(since, until)
+		if window_end is None:
+			break
+
+		touched = frappe.db.sql(
+			"""
+			SELECT user, DATE(creation) as day, MIN(creation) as first_new
+			FROM `tabUser Location Log`
+			WHERE modified > %(since)s AND modified <= %(until)s
+			GROUP BY user, DATE(creation)
+			""",
+			{"since": since, "until": window_end},
+			as_dict=True,
+		)
+
+		for i, row in enumerate(touched, 1):
+			update_day(row.user, getdate(row.day), get_datetime(row.first_new))
+			if i % COMMIT_EVERY == 0:
+				frappe.db.commit()
+
+		since = str(window_end)
+		frappe.db.set_global(WATERMARK_KEY, since)
+		frappe.db.commit()
+
+
+def mark_days_touched(logs):
+	"""Record the (user, day) of each of `logs` for the next run, once the transaction commits."""
+	earliest = {}
+	for log in logs:
+		creation = get_datetime(log.creation)
+		member = f"{log.user}|{creation.date()}"
+		earliest[member] = min(earliest.get(member, creation), creation)
+
+	if earliest:
+		scores = {member: creation.timestamp() for member, creation in earliest.items()}
+		frappe.db.after_commit.add(partial(_record_touched_days, scores))
+
+
+def _record_touched_days(scores):
+	# LT keeps the earliest new fix when a day is touched again before the next run
+	pipeline = frappe.cache.pipeline()
+	pipeline.zadd(frappe.cache.make_key(TOUCHED_DAYS_KEY), scores, lt=True)
+	pipeline.execute()
+
+
+def _pop_touched_days(count) -> list[tuple]:
+	"""Up to `count` recorded `(user, day, first_new)`, removed from the set in one MULTI/EXEC"""
+	key = frappe.cache.make_key(TOUCHED_DAYS_KEY)
+	pipeline = frappe.cache.pipeline()
+	pipeline.zrange(key, 0, count - 1, withscores=True)
+	pipeline.zremrangebyrank(key, 0, count - 1)
+	members, _removed = pipeline.execute()
+
+	touched = []
+	for member, score in members:
+		user, day = frappe.safe_decode(member).rsplit("|", 1)
+		touched.append((user, getdate(day), datetime.fromtimestamp(score)))
+	return touched
+
+
+def _get_window_end(since, until):
+	"""`modified` of the `WINDOW_ROWS`-th fix after `since`, capped at `until`; None if nothing is pending."""
+	if not frappe.db.sql(
+		"SELECT 1 FROM `tabUser Location Log` WHERE modified > %(since)s AND modified <= %(until)s LIMIT 1",
+		{"since": since, "until": until},
+	):
+		return None
+
+	window_end = frappe.db.sql(
+		"""
+		SELECT modified
+		FROM `tabUser Location Log`
+		WHERE modified > %(since)s AND modified <= %(until)s
+		ORDER BY modified
+		LIMIT 1 OFFSET %(offset)s
+		""",
+		{"since": since, "until": until, "offset": WINDOW_ROWS - 1},
+	)
+	return window_end[0][0] if window_end else until
+
+
+def update_day(user, day, first_new=None):
+	"""Bring one user's summary for `day` up to date, incrementally when the new fixes allow it."""
+	state = frappe.db.get_value(SUMMARY_DOCTYPE, {"user": user, "date": day}, "state")
+	state = json.loads(state) if state else None
+
+	start = datetime.combine(day, time.min)
+	if state and state["last"] and first_new and first_new > get_datetime(state["last"][3]):
+		start = get_datetime(state["last"][3])
+		condition = "creation > %(start)s"
+	else:
+		state = new_state()
+		condition = "creation >= %(start)s"
+
+	fixes = frappe.db.sql(
+		f"""
+		SELECT latitude, longitude, accuracy_meters, creation
+		FROM `tabUser Location Log`
+		WHERE user = %(user)s AND {condition} AND creation < %(end)s
+		ORDER BY creation
+		""",
+		{"user": user, "start": start, "end": datetime.combine(day, time.min) + timedelta(days=1)},
+		as_dict=True,
+	)
+
+	for fix in fixes:
+		add_fix(state, fix.latitude, fix.longitude, fix.accuracy_meters, fix.creation)
+
+	save_day(user, day, state)
+
+
+def new_state() -> dict:
+	return {
+		"distance_meters": 0.0,
+		"active_seconds": 0,
+		"point_count": 0,
+		"first_seen": None,
+		"last": None,
+		"anchor": None,
+		"cluster": None,
+		"stops": [],
+	}
+
+
+def add_fix(state, lat, lng, accuracy, fix_time):
+	"""Fold one fix (in time order) into `state`"""
+	fix_time = get_datetime(fix_time)
+	state["point_count"] += 1
+	state["first_seen"] = state["first_seen"] or str(fix_time)
+
+	if state["last"]:
+		gap = (fix_time - get_datetime(state["last"][3])).total_seconds()
+		if gap <= ACTIVE_GAP_SECONDS:
+			state["active_seconds"] += int(gap)
+
+	anchor = state["anchor"]
+	if not anchor:
+		state["anchor"] = [lat, lng]
+	else:
+		moved = haversine_distance(anchor[0], anchor[1], lat, lng)
+		if moved >= max(MIN_MOVE_METERS, accuracy or 0):
+			state["distance_meters"] += moved
+			state["anchor"] = [lat, lng]
+
+	cluster = state["cluster"]
+	if (
+		cluster
+		and haversine_distance(cluster["latitude"], cluster["longitude"], lat, lng) <= STOP_RADIUS_METERS
+	):
+		cluster["departed"] = str(fix_time)
+		cluster["point_count"] += 1
+	else:
+		if cluster and _duration(cluster) >= MIN_DWELL_SECONDS:
+			state["stops"].append(cluster)
+		state["cluster"] = {
+			"latitude": lat,
+			"longitude": lng,
+			"arrived": str(fix_time),
+			"departed": str(fix_time),
+			"point_count": 1,
+		}
+
+	state["last"] = [lat, lng, accuracy, str(fix_time)]
+
+
+def summarize(state) -> dict:
+	"""Column values of a summary row for `state`; a qualifying open cluster counts as an ongoing stop"""
+	stops = [{**stop, "duration_seconds": _duration(stop)} for stop in state["stops"]]
+	cluster = state["cluster"]
+	if cluster and _duration(cluster) >= MIN_DWELL_SECONDS:
+		stops.append({**cluster, "duration_seconds": _duration(cluster), "ongoing": 1})
+
+	return {
+		"distance_meters": round(state["distance_meters"], 2),
+		"active_seconds": state["active_seconds"],
+		"dwell_seconds": sum(stop["duration_seconds"] for stop in stops),
+		"stop_count": len(stops),
+		"point_count": state["point_count"],
+		"first_seen": state["first_seen"],
+		"last_seen": state["last"][3] if state["last"] else None,
+		"stops": stops,
+	}
+
+
+def save_day(user, day, state):
+	profile = get_user_profile(user)
+	values = summarize(state)
+	values.update(
+		{
+			"name": frappe.generate_hash(length=10),
+			"now": now_datetime(),
+			"user": user,
+			"date": day,
+			"full_name": profile.get("full_name"),
+			"department": profile.get("department"),
+			"stops": json.dumps(values["stops"]),
+			"state": json.dumps(state),
+		}
+	)
+	frappe.db.sql(UPSERT_QUERY, values)
+
+
+def _duration(cluster) -> int:
+	return int((get_datetime(cluster["departed"]) - get_datetime(cluster["arrived"])).total_seconds())
+
+
+def get_daily_summaries(day, department=None, user=None) -> list[dict]:
+	"""Summary rows for `day`, longest distance first"""
+	filters = {"date": day}
+	if department:
+		filters["department"] = department
+	if user:
+		filters["user"] = user
+
+	rows = frappe.get_all(
+		SUMMARY_DOCTYPE,
+		filters=filters,
+		fields=["user", "full_name", "department", "date", *SUMMARY_FIELDS[2:-1]],
+		order_by="distance_meters desc",
+	)
+	for row in rows:
+		row.stops = json.loads(row.stops) if row.stops else []
+
+	return rows
+
+
+def get_department_rollups(day, department=None) -> list[dict]:
+	"""Totals per department for `day`"""
+	return frappe.db.sql(
+		"""
+		SELECT
+			department,
+			COUNT(*) as users,
+			SUM(distance_meters) as distance_meters,
+			SUM(active_seconds) as active_seconds,
+			SUM(dwell_seconds) as dwell_seconds,
+			SUM(stop_count) as stop_count
+		FROM `tabUser Daily Travel Summary`
+		WHERE date = %(day)s {department_condition}
+		GROUP BY department
+		ORDER BY distance_meters DESC
+		""".format(department_condition="AND department = %(department)s" if department else ""),
+		{"day": day, "department": department},
+		as_dict=True,
+	)
@@ -0,0 +1,208 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Incremental export of User Location Log rows as CSV, NDJSON or GeoJSON.
+
+Rows are read in fixed-size keyset pages ordered by `(creation, name)` and
+written straight to a file object, optionally through gzip, so memory use does
+not grow with the number of rows exported. Geometry is built from the
+latitude/longitude columns at export time rather than stored with every fix.
+"""
+
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import date
+
+import frappe
+from frappe.utils import get_datetime
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+# Rows fetched per query while exporting
+CHUNK_SIZE = 5000
+
+# Exports larger than this are spooled to disk instead of memory
+SPOOL_MAX_SIZE = 1024 * 1024
+
+EXPORT_FIELDS = (
+	"name",
+	"user",
+	"full_name",
+	"creation",
+	"latitude",
+	"longitude",
+	"accuracy_meters",
+	"address",
+	"manual_refresh",
+)
+
+
+def get_creation_range(from_date=None, to_date=None):
+	"""`(start, end)` datetimes for a date filter; a bare date as `to_date` covers that whole day."""
+	start = get_datetime(from_date) if from_date else None
+	end = None
+
+	if to_date:
+		end = get_datetime(to_date)
+		if type(to_date) is date or (isinstance(to_date, str) and len(to_date.strip()) == 10):
+			end = end.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+	return start, end
+
+
+def iter_location_rows(
+	user=None, from_date=None, to_date=None, chunk_size=CHUNK_SIZE, fields=EXPORT_FIELDS, users=None
+):
+	"""Yield log rows oldest first, one keyset page at a time.
+
+	`users` restricts the rows to a list of users in addition to `user`. `fields`
+	must include `name` and `creation`.
+	"""
+	conditions = []
+	values = {"limit": chunk_size}
+
+	if user:
+		conditions.append("user = %(user)s")
+		values["user"] = user
+	if users is not None:
+		if not users:
+			return
+		conditions.append("user IN %(users)s")
+		values["users"] = tuple(users)
+	from_date, to_date = get_creation_range(from_date, to_date)
+	if from_date:
+		conditions.append("creation >= %(from_date)s")
+		values["from_date"] = from_date
+	if to_date:
+		conditions.append("creation <= %(to_date)s")
+		values["to_date"] = to_date
+
+	while True:
+		page_conditions = list(conditions)
+		if "last_creation" in values:
+			page_conditions.append(
+				"creation >= %(last_creation)s AND (creation > %(last_creation)s OR name > %(last_name)s)"
+			)
+
+		rows = frappe.db.sql(
+			"""
+			SELECT {fields}
+			FROM `tabUser Location Log`
+			{where}
+			ORDER BY creation, name
+			LIMIT %(limit)s
+			""".format(
+				fields=", ".join(fields),
+				where=f"WHERE {' AND '.join(page_conditions)}" if page_conditions else "",
+			),
+			values,
+			as_dict=True,
+		)
+
+		yield from rows
+
+		if len(rows) < chunk_size:
+			break
+
+		values["last_creation"] = rows[-1].creation
+		values["last_name"] = rows[-1].name
+
+
+def to_geojson_feature(row) -> dict:
+	"""GeoJSON Point feature for a log row"""
+	return {
+		"type": "Feature",
+		"geometry": {"type": "Point", "coordinates": [row.longitude, row.latitude]},
+		"properties": {
+			"name": row.name,
+			"user": row.user,
+			"full_name": row.full_name,
+			"timestamp": str(row.creation),
+			"accuracy_meters": row.accuracy_meters,
+			"address": row.address or "",
+			"manual": bool(row.manual_refresh),
+		},
+	}
+
+
+def write_geojson(rows, out):
+	"""Write `rows` to the binary file `out` as a FeatureCollection, one feature at a time."""
+	out.write(b'{"type": "FeatureCollection", "features": [')
+	for i, row in enumerate(rows):
+		if i:
+			out.write(b",")
+		out.write(json.dumps(to_geojson_feature(row), default=str).encode())
+	out.write(b"]}")
+
+
+def write_ndjson(rows, out):
+	"""Write `rows` to the binary file `out` as one JSON object per line."""
+	for row in rows:
+		out.write(json.dumps({field: row.get(field) for field in EXPORT_FIELDS}, default=str).encode())
+		out.write(b"\n")
+
+
+def write_csv(rows, out):
+	"""Write `rows` to the binary file `out` as CSV with a header row."""
+	# Format each row into a small text buffer and write the bytes: wrapping `out` in a
+	# TextIOWrapper fails on Python 3.10, where SpooledTemporaryFile lacks `readable()`
+	buffer = io.StringIO()
+	writer = csv.writer(buffer)
+
+	writer.writerow(EXPORT_FIELDS)
+	for row in rows:
+		writer.writerow([row.get(field) for field in EXPORT_FIELDS])
+		out.write(buffer.getvalue().encode())
+		buffer.seek(0)
+		buffer.truncate()
+
+	out.write(buffer.getvalue().encode())
+
+
+# format: (writer, mimetype, file extension)
+EXPORT_FORMATS = {
+	"csv": (write_csv, "text/csv", "csv"),
+	"ndjson": (write_ndjson, "application/x-ndjson", "ndjson"),
+	"geojson": (write_geojson, "application/geo+json", "geojson"),
+}
+
+
+def get_export_writer(export_format, compress=False):
+	"""Return `(write, mimetype, extension)` for an export; `write(rows, out)` gzips when `compress` is set."""
+	if export_format not in EXPORT_FORMATS:
+		raise ValueError(f"Unsupported export format: {export_format}")
+
+	write, mimetype, extension = EXPORT_FORMATS[export_format]
+	if not compress:
+		return write, mimetype, extension
+
+	def write_compressed(rows, out):
+		# Closing the GzipFile writes the trailer but leaves `out` open
+		with gzip.GzipFile(fileobj=out, mode="wb") as compressed:
+			write(rows, compressed)
+
+	return write_compressed, "application/gzip", f"{extension}.gz"
+
+
+def build_download_response(write, filename, mimetype) -> Response:
+	"""Run `write(fileobj)` into a spooled temp file and return it as a file download.
+
+	The file is filled before the response is returned because the database
+	connection is closed once the request handler exits.
+	"""
+	out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+	write(out)
+	size = out.tell()
+	out.seek(0)
+
+	response = Response(
+		wrap_file(frappe.local.request.environ, out),
+		mimetype=mimetype,
+		direct_passthrough=True,
+	)
+	response.headers["Content-Length"] = str(size)
+	response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+	return response
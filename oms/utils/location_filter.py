@@ -0,0 +1,119 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Server-side suppression of redundant location fixes.
+
+Devices that are not moving keep reporting the same position. A fix is
+suppressed instead of stored when it is within `location_min_distance_meters`
+of the user's last stored position and less than `location_keepalive_seconds`
+after it, or when its accuracy is worse than `location_max_accuracy_meters`.
+Manual refreshes are always stored. Suppressed fixes only move the user's
+`last_seen` forward.
+
+The last stored position per user is cached in Redis, and the number of
+received, stored and suppressed fixes is counted for `get_filter_stats`.
+"""
+
+import frappe
+from frappe.utils import cint, flt, get_datetime
+
+from oms.utils.geo import haversine_distance
+from oms.utils.settings import get_setting
+
+LAST_POSITION_CACHE_KEY = "oms:last_position"
+STATS_CACHE_KEY = "oms:location_filter_stats"
+
+SUPPRESSED_STATIONARY = "stationary"
+SUPPRESSED_INACCURATE = "inaccurate"
+
+STAT_COUNTERS = ("received", "stored", SUPPRESSED_STATIONARY, SUPPRESSED_INACCURATE)
+
+
+def filter_redundant_fixes(user, rows):
+	"""Split `rows` into `(kept, suppressed)`; suppressed rows get `row["suppressed"]` set to the reason."""
+	min_distance = flt(get_setting("location_min_distance_meters"))
+	keepalive = cint(get_setting("location_keepalive_seconds"))
+	max_accuracy = flt(get_setting("location_max_accuracy_meters"))
+
+	kept = []
+	suppressed = []
+	last = get_last_position(user) if min_distance > 0 else None
+
+	for row in sorted(rows, key=lambda row: row["timestamp"]):
+		reason = None
+
+		if not row["manual_refresh"]:
+			if max_accuracy > 0 and row["accuracy_meters"] and row["accuracy_meters"] > max_accuracy:
+				reason = SUPPRESSED_INACCURATE
+			elif last and _is_stationary(last, row, min_distance, keepalive):
+				reason = SUPPRESSED_STATIONARY
+
+		if reason:
+			row["suppressed"] = reason
+			suppressed.append(row)
+		else:
+			kept.append(row)
+			last = {"latitude": row["latitude"], "longitude": row["longitude"], "creation": row["timestamp"]}
+
+	_record_stats(len(rows), kept, suppressed)
+	return kept, suppressed
+
+
+def _is_stationary(last, row, min_distance, keepalive) -> bool:
+	if keepalive > 0 and (row["timestamp"] - get_datetime(last["creation"])).total_seconds() >= keepalive:
+		return False
+
+	distance = haversine_distance(last["latitude"], last["longitude"], row["latitude"], row["longitude"])
+	return distance < min_distance
+
+
+def get_last_position(user):
+	"""Last stored position of `user` as `{latitude, longitude, creation}`, or None"""
+	position = frappe.cache.hget(LAST_POSITION_CACHE_KEY, user)
+	if position is None:
+		position = frappe.db.get_value(
+			"User Location Log",
+			{"user": user},
+			["latitude", "longitude", "creation"],
+			order_by="creation desc",
+			as_dict=True,
+		)
+		if position:
+			remember_position(user, position)
+
+	return position
+
+
+def remember_position(user, log):
+	"""Cache `log` as the user's last stored position if it is newer than the cached one"""
+	position = {
+		"latitude": log.get("latitude"),
+		"longitude": log.get("longitude"),
+		"creation": get_datetime(log.get("creation")),
+	}
+	cached = frappe.cache.hget(LAST_POSITION_CACHE_KEY, user)
+
+	if not cached or position["creation"] >= cached["creation"]:
+		frappe.cache.hset(LAST_POSITION_CACHE_KEY, user, position)
+
+
+def forget_position(user):
+	frappe.cache.hdel(LAST_POSITION_CACHE_KEY, user)
+
+
+def _record_stats(received, kept, suppressed):
+	counts = {"received": received, "stored": len(kept)}
+	for row in suppressed:
+		counts[row["suppressed"]] = counts.get(row["suppressed"], 0) + 1
+
+	for counter, count in counts.items():
+		if count:
+			frappe.cache.incrby(frappe.cache.make_key(f"{STATS_CACHE_KEY}:{counter}"), count)
+
+
+def get_filter_stats() -> dict:
+	"""Running totals of received, stored and suppressed fixes since the counters were last reset"""
+	return {
+		counter: cint(frappe.cache.get(frappe.cache.make_key(f"{STATS_CACHE_KEY}:{counter}")))
+		for counter in STAT_COUNTERS
+	}
@@ -0,0 +1,237 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Validation and the trusted write path for User Location Log fixes.
+
+Fixes from the location APIs are validated once here and written with plain
+INSERTs instead of `Document.insert()`: names are random hashes rather than the
+`{full_name}-{timestamp}` expression, and the controller hooks (which would only
+re-validate the coordinates) are skipped. `insert_fixes` runs the follow-up work
+the controller's `after_insert` would otherwise do, including queueing the rows
+for background reverse geocoding.
+"""
+
+import json
+from datetime import timedelta
+
+import frappe
+from frappe.utils import cint, get_datetime, now_datetime
+from frappe.utils.data import convert_utc_to_system_timezone
+
+from oms.utils.geo import geohash_encode
+from oms.utils.geocoding import queue_geocoding
+from oms.utils.last_location import touch_last_seen, upsert_last_locations
+from oms.utils.location_daily import mark_days_touched
+from oms.utils.location_filter import filter_redundant_fixes, remember_position
+from oms.utils.location_realtime import publish_location_updates
+from oms.utils.user_profile import get_user_profile
+
+LOCATION_LOG_DOCTYPE = "User Location Log"
+
+# Upper bound on fixes accepted in one batch request
+MAX_BATCH_SIZE = 500
+
+# Client clocks drift; anything further ahead than this is clamped to "now"
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+LOG_INSERT_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"idx",
+	"full_name",
+	"user",
+	"latitude",
+	"longitude",
+	"accuracy_meters",
+	"geohash",
+	"timestamp",
+	"session_id",
+	"ip_address",
+	"address",
+	"device_info",
+	"manual_refresh",
+)
+
+
+def parse_coordinates(latitude, longitude, accuracy=None):
+	"""Return `(lat, lng, accuracy)` as floats, or raise `ValueError` with a user facing message."""
+	try:
+		lat = float(latitude)
+		lng = float(longitude)
+		acc = float(accuracy) if accuracy else None
+	except (ValueError, TypeError):
+		raise ValueError("Invalid coordinate values")
+
+	if not (-90 <= lat <= 90):
+		raise ValueError("Latitude must be between -90 and 90")
+
+	if not (-180 <= lng <= 180):
+		raise ValueError("Longitude must be between -180 and 180")
+
+	return lat, lng, acc
+
+
+def parse_device_info(device_info) -> str:
+	"""Keep only the essential device info fields so the JSON fits the Small Text column."""
+	if not device_info:
+		return json.dumps({})
+
+	try:
+		full_device_info = json.loads(device_info) if isinstance(device_info, str) else device_info
+		device_data = {
+			"browser": full_device_info.get("userAgent", "")[:50],
+			"platform": full_device_info.get("platform", "")[:30],
+			"language": full_device_info.get("language", "")[:10],
+			"timestamp": full_device_info.get("timestamp", ""),
+		}
+	except Exception:
+		device_data = {"info": str(device_info)[:100]}
+
+	return json.dumps(device_data)
+
+
+def parse_fix_timestamp(value, now=None):
+	"""Convert a client supplied fix time to a naive system timezone datetime.
+
+	Queued fixes carry the ISO time they were captured at (usually UTC with a `Z`
+	suffix). Missing values fall back to `now`, and times in the future are clamped.
+	"""
+	now = now or now_datetime()
+	if not value:
+		return now
+
+	fix_time = get_datetime(value)
+	if fix_time.tzinfo:
+		fix_time = convert_utc_to_system_timezone(fix_time).replace(tzinfo=None)
+
+	if fix_time - now > MAX_CLOCK_SKEW:
+		return now
+
+	return fix_time
+
+
+def make_fix_row(lat, lng, acc, address=None, device_info=None, manual_refresh=False, timestamp=None) -> dict:
+	"""Row for `insert_fixes` from already validated coordinates"""
+	return {
+		"latitude": lat,
+		"longitude": lng,
+		"accuracy_meters": acc,
+		"address": address,
+		"device_info": parse_device_info(device_info),
+		"manual_refresh": 1 if cint(manual_refresh) else 0,
+		"timestamp": timestamp or now_datetime(),
+	}
+
+
+def validate_fixes(fixes, now=None):
+	"""Validate a batch of raw fixes in a single pass.
+
+	Returns `(rows, results)` where `rows` holds the parsed values of every valid
+	fix (tagged with its position in the batch) and `results` holds one entry per
+	input fix, in order, with `success` set to False for the rejected ones.
+	"""
+	now = now or now_datetime()
+	rows = []
+	results = []
+
+	for index, fix in enumerate(fixes):
+		try:
+			if not isinstance(fix, dict):
+				raise ValueError("Invalid location payload")
+
+			lat, lng, acc = parse_coordinates(fix.get("latitude"), fix.get("longitude"), fix.get("accuracy"))
+
+			try:
+				fix_time = parse_fix_timestamp(fix.get("timestamp"), now)
+			except Exception:
+				raise ValueError("Invalid timestamp")
+
+		except ValueError as e:
+			results.append({"index": index, "success": False, "message": str(e)})
+			continue
+
+		row = make_fix_row(
+			lat, lng, acc, fix.get("address"), fix.get("device_info"), fix.get("manual_refresh"), fix_time
+		)
+		row["index"] = index
+		rows.append(row)
+		results.append({"index": index, "success": True})
+
+	return rows, results
+
+
+def bulk_insert_fixes(user, rows, now=None) -> list[dict]:
+	"""Write validated fixes for `user` with one multi-row INSERT and return the inserted rows.
+
+	The caller owns the transaction; nothing is committed here. `creation` is set to
+	the fix time so ordering by creation stays chronological for fixes that were
+	queued offline and synced late. Rows may carry their own `session_id` and
+	`ip_address` (fixes drained from the ingest queue); otherwise the current
+	request's are used.
+	"""
+	if not rows:
+		return []
+
+	now = now or now_datetime()
+	full_name = get_user_profile(user).get("full_name")
+	session_id = frappe.session.sid
+	ip_address = frappe.local.request_ip
+
+	values = []
+	for row in rows:
+		values.append(
+			(
+				frappe.generate_hash(length=10),
+				row["timestamp"],
+				now,
+				user,
+				user,
+				0,
+				0,
+				full_name,
+				user,
+				row["latitude"],
+				row["longitude"],
+				row["accuracy_meters"],
+				geohash_encode(row["latitude"], row["longitude"]),
+				row["timestamp"],
+				row.get("session_id", session_id),
+				row.get("ip_address", ip_address),
+				row["address"],
+				row["device_info"],
+				row["manual_refresh"],
+			)
+		)
+
+	frappe.db.bulk_insert(LOCATION_LOG_DOCTYPE, LOG_INSERT_FIELDS, values)
+	return [frappe._dict(zip(LOG_INSERT_FIELDS, value, strict=True)) for value in values]
+
+
+def insert_fixes(user, rows) -> list[dict]:
+	"""Insert validated fixes for `user` and update everything derived from them.
+
+	Redundant fixes (see `oms.utils.location_filter`) are not inserted; they get
+	`row["suppressed"]` set and only move the user's last seen time forward. Stored
+	rows get `row["name"]` set. Does not commit; the caller owns the transaction.
+	"""
+	kept, suppressed = filter_redundant_fixes(user, rows)
+
+	logs = bulk_insert_fixes(user, kept)
+	for row, log in zip(kept, logs, strict=True):
+		row["name"] = log.name
+
+	upsert_last_locations(logs)
+	if suppressed:
+		touch_last_seen(user, max(row["timestamp"] for row in suppressed))
+
+	# Cache and queue side effects come after every write, so a failed insert leaves none behind
+	if logs:
+		remember_position(user, logs[-1])
+	queue_geocoding(logs)
+	mark_days_touched(logs)
+	publish_location_updates(logs)
+	return logs
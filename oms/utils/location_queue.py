@@ -0,0 +1,281 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Write-behind ingest queue for location fixes.
+
+With the `location_ingest_mode` setting set to "queue", the save endpoints only
+validate a fix, push it onto a Redis list and return; a background job drains
+the list with one multi-row insert per user and batch through the same
+`insert_fixes` path the synchronous mode uses. This keeps request latency flat
+when every device reports at once at shift start.
+
+Backpressure: once the list holds `location_queue_max_depth` fixes, the
+endpoints insert synchronously again, which slows callers down instead of
+letting the queue grow without bound. Fixes that fail to insert are moved,
+with the error, to a dead-letter list and can be requeued once fixed.
+
+Delivery is at least once: a drain moves each batch to a processing list,
+commits each user's fixes on their own and only then removes them from the
+list, and the next drain inserts whatever a crashed drain left there before
+taking new fixes. Committing per user also keeps every fix's commit within
+moments of its `modified`, which the delta readers rely on.
+"""
+
+import json
+from time import monotonic
+
+import frappe
+from frappe.utils import cint, get_datetime, now_datetime
+
+from oms.utils.location_filter import forget_position
+from oms.utils.location_ingest import insert_fixes
+from oms.utils.settings import get_setting
+
+INGEST_QUEUE_KEY = "oms:ingest_queue"
+PROCESSING_KEY = "oms:ingest_processing"
+DEAD_LETTER_KEY = "oms:ingest_dead_letters"
+DRAIN_LOCK_KEY = "oms:ingest_drain_lock"
+STATS_CACHE_KEY = "oms:ingest_stats"
+INGEST_JOB_ID = "oms:ingest"
+
+# Fixes claimed per batch, and seconds after which a drain stops claiming batches
+DRAIN_BATCH_SIZE = 1000
+DRAIN_BUDGET_SECONDS = 180
+
+# Matches the short queue's job timeout, so the lock of a killed drain expires with it
+DRAIN_LOCK_SECONDS = 300
+
+# Deletes the drain lock only if it still holds this run's token
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+	return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Fields of a fix row (see `make_fix_row`) carried through the queue
+QUEUED_FIELDS = ("latitude", "longitude", "accuracy_meters", "address", "device_info", "manual_refresh")
+
+
+def is_queue_enabled() -> bool:
+	return get_setting("location_ingest_mode") == "queue"
+
+
+def enqueue_fixes(user, rows) -> bool:
+	"""Push validated fix rows for `user` onto the ingest queue.
+
+	Returns False, without queueing anything, if queueing is off or the queue is
+	full; the caller should then insert the rows itself.
+	"""
+	if not rows or not is_queue_enabled():
+		return False
+
+	if get_queue_depth() + len(rows) > cint(get_setting("location_queue_max_depth")):
+		_record_stats(rejected=len(rows))
+		return False
+
+	enqueued_at = now_datetime().isoformat()
+	payloads = [
+		json.dumps(
+			{
+				**{field: row[field] for field in QUEUED_FIELDS},
+				"user": user,
+				"timestamp": row["timestamp"].isoformat(),
+				"session_id": frappe.session.sid,
+				"ip_address": frappe.local.request_ip,
+				"enqueued_at": enqueued_at,
+			}
+		)
+		for row in rows
+	]
+	_push(INGEST_QUEUE_KEY, payloads)
+	_record_stats(queued=len(rows))
+
+	frappe.enqueue(
+		"oms.utils.location_queue.drain_ingest_queue",
+		queue="short",
+		job_id=INGEST_JOB_ID,
+		deduplicate=True,
+	)
+	return True
+
+
+def drain_ingest_queue():
+	"""Background job (and scheduler safety net): insert queued fixes a batch at a time."""
+	token = frappe.generate_hash()
+	if not _acquire_drain_lock(token):
+		return
+
+	try:
+		# Left behind by a drain that died before committing its batch
+		if payloads := _get_processing():
+			process_batch(payloads)
+			_clear_processing()
+
+		deadline = monotonic() + DRAIN_BUDGET_SECONDS
+		while monotonic() < deadline:
+			payloads = _claim_batch(DRAIN_BATCH_SIZE)
+			if not payloads:
+				break
+
+			process_batch(payloads)
+			_clear_processing()
+	finally:
+		_release_drain_lock(token)
+
+
+def _acquire_drain_lock(token) -> bool:
+	# Only one drain at a time owns the processing list
+	return bool(
+		frappe.cache.set(frappe.cache.make_key(DRAIN_LOCK_KEY), token, nx=True, ex=DRAIN_LOCK_SECONDS)
+	)
+
+
+def _release_drain_lock(token):
+	# A run that outlived the lock must not delete the lock the next run now holds
+	frappe.cache.eval(RELEASE_LOCK_SCRIPT, 1, frappe.cache.make_key(DRAIN_LOCK_KEY), token)
+
+
+def _push(key, values):
+	# One RPUSH for all values; `frappe.cache.rpush` only takes a single value
+	pipeline = frappe.cache.pipeline()
+	pipeline.rpush(frappe.cache.make_key(key), *values)
+	pipeline.execute()
+
+
+def _claim_batch(size):
+	# LMOVEs in one MULTI/EXEC, so the batch sits in the processing list until it is committed
+	queue_key = frappe.cache.make_key(INGEST_QUEUE_KEY)
+	processing_key = frappe.cache.make_key(PROCESSING_KEY)
+	pipeline = frappe.cache.pipeline()
+	for _i in range(size):
+		pipeline.lmove(queue_key, processing_key, "LEFT", "RIGHT")
+	return [payload for payload in pipeline.execute() if payload is not None]
+
+
+def _get_processing():
+	return frappe.cache.lrange(PROCESSING_KEY, 0, -1)
+
+
+def _clear_processing():
+	frappe.cache.delete(frappe.cache.make_key(PROCESSING_KEY))
+
+
+def _ack(payloads):
+	# Done with these payloads; a crash from here on must not insert them again
+	processing_key = frappe.cache.make_key(PROCESSING_KEY)
+	pipeline = frappe.cache.pipeline()
+	for payload in payloads:
+		pipeline.lrem(processing_key, 1, payload)
+	pipeline.execute()
+
+
+def process_batch(payloads):
+	"""Insert a batch of queued payloads, committing each user's fixes on their own.
+
+	A user whose insert fails is rolled back and dead-lettered without affecting
+	the others.
+	"""
+	by_user = {}
+	for payload in payloads:
+		try:
+			fix = json.loads(payload)
+			row = {field: fix[field] for field in QUEUED_FIELDS}
+			row.update(
+				timestamp=get_datetime(fix["timestamp"]),
+				session_id=fix.get("session_id"),
+				ip_address=fix.get("ip_address"),
+			)
+			by_user.setdefault(fix["user"], []).append((payload, row, fix["enqueued_at"]))
+		except Exception as e:
+			_dead_letter([payload], f"Unreadable payload: {e}")
+			_ack([payload])
+
+	stored = 0
+	oldest = None
+	for user, entries in by_user.items():
+		entries.sort(key=lambda entry: entry[1]["timestamp"])
+		user_payloads = [payload for payload, _row, _enqueued in entries]
+		try:
+			stored += len(insert_fixes(user, [row for _payload, row, _enqueued in entries]))
+			frappe.db.commit()
+		except Exception as e:
+			frappe.db.rollback()
+			forget_position(user)
+			frappe.log_error(frappe.get_traceback(), "Failed to insert queued locations")
+			_dead_letter(user_payloads, str(e))
+			_ack(user_payloads)
+			continue
+
+		_ack(user_payloads)
+		first_enqueued = min(enqueued for _payload, _row, enqueued in entries)
+		oldest = min(oldest, first_enqueued) if oldest else first_enqueued
+
+	_record_stats(drained=len(payloads), stored=stored)
+	if oldest:
+		lag = (now_datetime() - get_datetime(oldest)).total_seconds()
+		frappe.cache.set_value(f"{STATS_CACHE_KEY}:last_lag_seconds", round(lag, 3))
+	frappe.cache.set_value(f"{STATS_CACHE_KEY}:last_drained_at", now_datetime().isoformat())
+
+
+def _dead_letter(payloads, error):
+	entries = [json.dumps({"payload": frappe.safe_decode(payload), "error": error}) for payload in payloads]
+	_push(DEAD_LETTER_KEY, entries)
+	_record_stats(dead_lettered=len(payloads))
+
+
+def requeue_dead_letters(limit=None) -> int:
+	"""Move up to `limit` (default: all) dead letters back onto the ingest queue; returns how many."""
+	count = 0
+	while limit is None or count < cint(limit):
+		entry = frappe.cache.lpop(DEAD_LETTER_KEY)
+		if entry is None:
+			break
+
+		frappe.cache.rpush(INGEST_QUEUE_KEY, json.loads(entry)["payload"])
+		count += 1
+
+	if count:
+		frappe.enqueue(
+			"oms.utils.location_queue.drain_ingest_queue",
+			queue="short",
+			job_id=INGEST_JOB_ID,
+			deduplicate=True,
+		)
+	return count
+
+
+def get_queue_depth() -> int:
+	return cint(frappe.cache.llen(INGEST_QUEUE_KEY))
+
+
+def _record_stats(**counts):
+	for counter, count in counts.items():
+		if count:
+			frappe.cache.incrby(frappe.cache.make_key(f"{STATS_CACHE_KEY}:{counter}"), count)
+
+
+def get_queue_stats() -> dict:
+	"""Queue depth and lag, dead letters, and counters since the cache was last flushed."""
+	stats = {
+		counter: cint(frappe.cache.get(frappe.cache.make_key(f"{STATS_CACHE_KEY}:{counter}")))
+		for counter in ("queued", "rejected", "drained", "stored", "dead_lettered")
+	}
+
+	# Age of the oldest fix still waiting
+	head = frappe.cache.lindex(frappe.cache.make_key(INGEST_QUEUE_KEY), 0)
+	try:
+		oldest = get_datetime(json.loads(head)["enqueued_at"]) if head else None
+	except Exception:
+		oldest = None
+
+	stats.update(
+		mode=get_setting("location_ingest_mode"),
+		depth=get_queue_depth(),
+		max_depth=cint(get_setting("location_queue_max_depth")),
+		dead_letters=cint(frappe.cache.llen(DEAD_LETTER_KEY)),
+		lag_seconds=round((now_datetime() - oldest).total_seconds(), 3) if oldest else 0,
+		last_lag_seconds=frappe.cache.get_value(f"{STATS_CACHE_KEY}:last_lag_seconds"),
+		last_drained_at=frappe.cache.get_value(f"{STATS_CACHE_KEY}:last_drained_at"),
+	)
+	return stats
@@ -0,0 +1,152 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Realtime push of position changes to the manager dashboards.
+
+After fixes are written, the newest position per user is published to the
+`doctype:User Last Location` socket.io room, which only users who can read that
+DocType may join. Publishing is throttled per user: a position that arrives while
+the user's slot is taken marks the user pending, and the newest stored position is
+pushed once the slot expires (on the next publish or by the per-minute flush), so
+the last fix of a burst always reaches the dashboards.
+"""
+
+import frappe
+from frappe.utils import cint
+
+from oms.utils.settings import get_setting
+from oms.utils.time_ago import to_epoch_ms
+from oms.utils.user_profile import get_user_profiles
+
+LOCATION_UPDATE_EVENT = "oms_location_update"
+ROOM_DOCTYPE = "User Last Location"
+THROTTLE_CACHE_KEY = "oms:location_push_throttle"
+PENDING_CACHE_KEY = "oms:location_push_pending"
+
+
+def make_map_update(
+	user, log_name, latitude, longitude, accuracy_meters, address, last_seen, profile
+) -> dict:
+	"""Compact row the live map renders for one user's position"""
+	return {
+		"name": log_name,
+		"user": user,
+		"full_name": profile.get("full_name") or user,
+		"user_image": profile.get("user_image"),
+		"designation": profile.get("designation"),
+		"department": profile.get("department"),
+		"latitude": latitude,
+		"longitude": longitude,
+		"accuracy_meters": accuracy_meters,
+		"address": address,
+		"creation": last_seen,
+		"epoch_ms": to_epoch_ms(last_seen),
+	}
+
+
+def publish_location_updates(logs):
+	"""Publish one coalesced event with the newest of `logs` for each user, once the transaction commits."""
+	latest = {}
+	for log in logs:
+		current = latest.get(log.user)
+		if not current or log.creation >= current.creation:
+			latest[log.user] = log
+
+	users = []
+	for user in latest:
+		if _acquire_push_slot(user):
+			users.append(user)
+		else:
+			frappe.cache.hset(PENDING_CACHE_KEY, user, 1)
+
+	updates = [
+		make_map_update(
+			user,
+			latest[user].name,
+			latest[user].latitude,
+			latest[user].longitude,
+			latest[user].accuracy_meters,
+			latest[user].address,
+			latest[user].creation,
+			profile,
+		)
+		for user, profile in _get_profiles(users).items()
+	]
+	updates.extend(_get_pending_updates(exclude=latest))
+	_publish(updates)
+
+
+def flush_pending_location_pushes():
+	"""Push the stored position of throttled users whose slot has expired (scheduled every minute)."""
+	_publish(_get_pending_updates())
+
+
+def _get_pending_updates(exclude=()):
+	"""Map rows for pending users whose push slot is free again, claiming their slots."""
+	users = [user for user in get_pending_users(exclude) if _acquire_push_slot(user)]
+	if not users:
+		return []
+
+	for user in users:
+		frappe.cache.hdel(PENDING_CACHE_KEY, user)
+
+	rows = frappe.get_all(
+		ROOM_DOCTYPE,
+		filters={"name": ("in", users)},
+		fields=["user", "location_log", "latitude", "longitude", "accuracy_meters", "address", "last_seen"],
+	)
+	profiles = _get_profiles([row.user for row in rows])
+	return [
+		make_map_update(
+			row.user,
+			row.location_log,
+			row.latitude,
+			row.longitude,
+			row.accuracy_meters,
+			row.address,
+			row.last_seen,
+			profiles[row.user],
+		)
+		for row in rows
+	]
+
+
+def get_pending_users(exclude=()) -> list[str]:
+	"""Users marked pending by a throttled publish, minus `exclude`"""
+	return decode_pending_users(frappe.cache.hgetall(PENDING_CACHE_KEY), exclude)
+
+
+def decode_pending_users(pending, exclude=()) -> list[str]:
+	# Hash fields come back from Redis as bytes
+	users = (frappe.safe_decode(user) for user in pending)
+	return [user for user in users if user not in exclude]
+
+
+def _get_profiles(users) -> dict:
+	if not users:
+		return {}
+	profiles = get_user_profiles(users)
+	return {user: profiles.get(user) or {} for user in users}
+
+
+def _publish(updates):
+	if not updates:
+		return
+
+	frappe.publish_realtime(
+		LOCATION_UPDATE_EVENT,
+		{"updates": updates},
+		doctype=ROOM_DOCTYPE,
+		after_commit=True,
+	)
+
+
+def _acquire_push_slot(user) -> bool:
+	"""True if `user` has not been pushed within the throttle interval, and claim the slot."""
+	interval = cint(get_setting("location_push_interval"))
+	if interval <= 0:
+		return True
+
+	# SET NX EX, so two workers can never both claim the slot
+	key = frappe.cache.make_key(f"{THROTTLE_CACHE_KEY}:{user}")
+	return bool(frappe.cache.set(key, 1, nx=True, ex=interval))
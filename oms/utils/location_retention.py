@@ -0,0 +1,141 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Retention for User Location Log: roll old fixes up into hourly summaries.
+
+Raw fixes older than `location_retention_days` are aggregated into one User
+Location Hourly Summary row per user and hour, then deleted. The work is done one
+calendar month at a time, with a commit after each month, so a single run never
+holds a transaction over the whole backlog. History queries read the summaries
+for the part of a range that is no longer kept raw.
+
+Native table partitioning is not an option here: MariaDB requires the partition
+column to be part of every unique key, and Frappe tables are keyed on `name`.
+"""
+
+import frappe
+from frappe.utils import add_days, add_months, get_datetime, get_first_day, getdate, now_datetime
+
+from oms.utils.pagination import fetch_page
+from oms.utils.settings import get_setting
+
+SUMMARY_DOCTYPE = "User Location Hourly Summary"
+
+# Rows deleted per DELETE statement while purging a month
+PURGE_CHUNK_SIZE = 10_000
+
+# Re-running a month merges into existing rows. The means are weighted by point
+# count, so `point_count` is assigned after the columns that read it. Accuracy may
+# be NULL on either side, in which case the other side's value is kept.
+ROLLUP_QUERY = """
+	INSERT INTO `tabUser Location Hourly Summary`
+		(name, creation, modified, owner, modified_by, docstatus, idx, user, full_name, hour,
+		latitude, longitude, accuracy_meters, first_seen, last_seen, address, point_count)
+	SELECT
+		MD5(CONCAT(user, DATE_FORMAT(creation, '%%Y%%m%%d%%H'))),
+		NOW(6), NOW(6), 'Administrator', 'Administrator', 0, 0,
+		user,
+		MAX(full_name),
+		DATE_FORMAT(creation, '%%Y-%%m-%%d %%H:00:00'),
+		AVG(latitude),
+		AVG(longitude),
+		AVG(accuracy_meters),
+		MIN(creation),
+		MAX(creation),
+		MAX(address),
+		COUNT(*)
+	FROM `tabUser Location Log`
+	WHERE creation >= %(start)s AND creation < %(end)s
+	GROUP BY user, DATE_FORMAT(creation, '%%Y%%m%%d%%H')
+	ON DUPLICATE KEY UPDATE
+		modified = VALUES(modified),
+		latitude = (latitude * point_count + VALUES(latitude) * VALUES(point_count)) / (point_count + VALUES(point_count)),
+		longitude = (longitude * point_count + VALUES(longitude) * VALUES(point_count)) / (point_count + VALUES(point_count)),
+		accuracy_meters = COALESCE(
+			(accuracy_meters * point_count + VALUES(accuracy_meters) * VALUES(point_count)) / (point_count + VALUES(point_count)),
+			accuracy_meters,
+			VALUES(accuracy_meters)
+		),
+		first_seen = LEAST(first_seen, VALUES(first_seen)),
+		last_seen = GREATEST(last_seen, VALUES(last_seen)),
+		point_count = point_count + VALUES(point_count)
+"""
+
+
+def get_retention_cutoff():
+	"""Start of the oldest day whose raw fixes are still kept, or None if retention is off."""
+	days = frappe.utils.cint(get_setting("location_retention_days"))
+	if days <= 0:
+		return None
+
+	return get_datetime(add_days(getdate(now_datetime()), -days))
+
+
+def rollup_location_history():
+	"""Summarise and purge every raw fix older than the retention cutoff, month by month."""
+	cutoff = get_retention_cutoff()
+	if not cutoff:
+		return
+
+	oldest = frappe.db.sql("SELECT MIN(creation) FROM `tabUser Location Log`")[0][0]
+	if not oldest or oldest >= cutoff:
+		return
+
+	start = get_datetime(get_first_day(oldest))
+	while start < cutoff:
+		end = min(get_datetime(add_months(start, 1)), cutoff)
+		rollup_window(start, end)
+		frappe.db.commit()
+		start = end
+
+
+def rollup_window(start, end):
+	"""Aggregate the fixes in `[start, end)` into hourly summaries and delete them."""
+	frappe.db.sql(ROLLUP_QUERY, {"start": start, "end": end})
+
+	while True:
+		frappe.db.sql(
+			"""
+			DELETE FROM `tabUser Location Log`
+			WHERE creation >= %(start)s AND creation < %(end)s
+			LIMIT %(limit)s
+			""",
+			{"start": start, "end": end, "limit": PURGE_CHUNK_SIZE},
+		)
+		if frappe.db.sql("SELECT ROW_COUNT()")[0][0] < PURGE_CHUNK_SIZE:
+			break
+
+
+def get_summary_history(user, from_date=None, to_date=None, after=None, limit=100):
+	"""Hourly summaries for `user`, newest first, shaped like User Location Log rows.
+
+	Keyset paged on `(hour, name)`; pass the last row's `(creation, name)` as `after`
+	for the next page. Returns `(rows, has_more)`.
+	"""
+	if limit <= 0:
+		return [], False
+
+	conditions = ["user = %(user)s"]
+	values = {"user": user}
+	if from_date:
+		conditions.append("hour >= %(from_date)s")
+		values["from_date"] = from_date
+	if to_date:
+		conditions.append("hour <= %(to_date)s")
+		values["to_date"] = to_date
+
+	summaries, has_more = fetch_page(
+		f"tab{SUMMARY_DOCTYPE}",
+		"""name, user, full_name, latitude, longitude, accuracy_meters, address,
+			point_count, first_seen, last_seen, hour as creation, hour as timestamp""",
+		conditions,
+		values,
+		sort_columns=("hour", "name"),
+		after=after,
+		limit=limit,
+	)
+
+	for summary in summaries:
+		summary["is_summary"] = 1
+
+	return summaries, has_more
@@ -0,0 +1,126 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Douglas-Peucker simplification of location trails of any length.
+
+Rows are consumed as a stream (oldest first) in windows of `WINDOW_SIZE`
+points. Each window is simplified and appended to the output, and whenever
+the output grows past twice the point budget the tolerance is doubled and the
+output simplified again. Memory and payload stay bounded by the budget and the
+window size, however much history the range covers.
+"""
+
+import math
+
+from frappe.utils import cint
+
+from oms.utils.geo import EARTH_RADIUS_METERS
+
+DEFAULT_MAX_POINTS = 1000
+MAX_POINTS_LIMIT = 5000
+
+# Points simplified at a time
+WINDOW_SIZE = 5000
+
+# Deviation from the true path allowed on screen when a zoom level is given
+PIXEL_TOLERANCE = 2
+
+# Web Mercator meters per pixel at zoom 0 on the equator (256 px tiles)
+METERS_PER_PIXEL_AT_ZOOM_0 = 156_543.03
+
+# Tolerance to start doubling from when the point budget is exceeded without one
+MIN_TOLERANCE_METERS = 1.0
+
+
+def tolerance_for_zoom(zoom, latitude) -> float:
+	"""Ground distance in meters covered by `PIXEL_TOLERANCE` pixels at a map zoom level"""
+	meters_per_pixel = METERS_PER_PIXEL_AT_ZOOM_0 * math.cos(math.radians(latitude)) / 2 ** float(zoom)
+	return PIXEL_TOLERANCE * meters_per_pixel
+
+
+def simplify_track(rows, zoom=None, max_points=DEFAULT_MAX_POINTS) -> dict:
+	"""Simplify rows with `latitude`, `longitude` and `creation`, oldest first.
+
+	The tolerance comes from `zoom` when given (so the result looks identical at
+	that zoom) and is raised as needed to stay within `max_points`. Returns the
+	points as `[lat, lng, creation]` with the number of source points and the
+	tolerance finally used.
+	"""
+	max_points = min(max(cint(max_points) or DEFAULT_MAX_POINTS, 2), MAX_POINTS_LIMIT)
+	tolerance = 0.0
+
+	kept = []
+	window = []
+	source_points = 0
+
+	for row in rows:
+		if not source_points and zoom is not None:
+			tolerance = tolerance_for_zoom(zoom, row.latitude)
+
+		source_points += 1
+		window.append([row.latitude, row.longitude, row.creation])
+
+		if len(window) >= WINDOW_SIZE:
+			# The window's last point is kept and starts the next window, so segments join up
+			kept.extend(douglas_peucker(window, tolerance)[:-1])
+			window = [window[-1]]
+
+			while len(kept) > 2 * max_points:
+				tolerance = max(tolerance * 2, MIN_TOLERANCE_METERS)
+				kept = douglas_peucker(kept, tolerance)
+
+	if window:
+		kept.extend(douglas_peucker(window, tolerance))
+
+	while len(kept) > max_points:
+		tolerance = max(tolerance * 2, MIN_TOLERANCE_METERS)
+		kept = douglas_peucker(kept, tolerance)
+
+	return {"points": kept, "source_points": source_points, "tolerance_meters": round(tolerance, 2)}
+
+
+def douglas_peucker(points, tolerance) -> list:
+	"""Points of `[lat, lng, ...]` whose removal would move the path by more than `tolerance` meters"""
+	if len(points) < 3:
+		return list(points)
+
+	# Equirectangular projection around the first point is accurate enough at trail scale
+	cos_lat = math.cos(math.radians(points[0][0]))
+	xy = [
+		(math.radians(point[1]) * cos_lat * EARTH_RADIUS_METERS, math.radians(point[0]) * EARTH_RADIUS_METERS)
+		for point in points
+	]
+
+	keep = [False] * len(points)
+	keep[0] = keep[-1] = True
+	stack = [(0, len(points) - 1)]
+
+	while stack:
+		start, end = stack.pop()
+		max_distance = -1.0
+		index = start
+
+		for i in range(start + 1, end):
+			distance = _segment_distance(xy[i], xy[start], xy[end])
+			if distance > max_distance:
+				max_distance, index = distance, i
+
+		if max_distance > tolerance:
+			keep[index] = True
+			stack.append((start, index))
+			stack.append((index, end))
+
+	return [point for point, kept in zip(points, keep, strict=True) if kept]
+
+
+def _segment_distance(point, start, end) -> float:
+	px, py = point
+	ax, ay = start
+	bx, by = end
+	dx, dy = bx - ax, by - ay
+
+	if dx == 0 and dy == 0:
+		return math.hypot(px - ax, py - ay)
+
+	t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+	return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
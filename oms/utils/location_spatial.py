@@ -0,0 +1,173 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Radius, bounding-box and polygon queries over location fixes.
+
+Every fix carries a geohash (see `oms.utils.geo`). A query first selects
+candidates whose geohash starts with one of the prefixes covering the query's
+bounding box, which the `geohash` indexes turn into a few range scans, and
+then refines them exactly with haversine distance or a point-in-polygon test.
+
+Without a time window the query runs against User Last Location ("who is
+there now"); with `from_date` and/or `to_date` it searches the fix history.
+"""
+
+import frappe
+
+from oms.utils.geo import bbox_around, geohash_cover, haversine_distance, point_in_polygon, polygon_bbox
+from oms.utils.location_export import get_creation_range
+
+# Upper bound on rows returned by one spatial query
+MAX_RESULTS = 5000
+
+# History candidates are read in pages of this many rows until enough match
+CANDIDATE_CHUNK_SIZE = 2000
+
+MAX_POLYGON_VERTICES = 500
+
+RESULT_FIELDS = (
+	"name",
+	"user",
+	"full_name",
+	"latitude",
+	"longitude",
+	"accuracy_meters",
+	"address",
+	"creation",
+)
+
+
+def find_within_radius(latitude, longitude, radius_meters, from_date=None, to_date=None, limit=500):
+	"""Fixes within `radius_meters` of a point, nearest first, each with `distance_meters`"""
+	if radius_meters <= 0:
+		raise ValueError("Radius must be greater than 0")
+
+	def refine(row):
+		row.distance_meters = round(haversine_distance(latitude, longitude, row.latitude, row.longitude), 2)
+		return row.distance_meters <= radius_meters
+
+	rows = _query(bbox_around(latitude, longitude, radius_meters), refine, from_date, to_date, limit)
+	rows.sort(key=lambda row: row.distance_meters)
+	return rows
+
+
+def find_in_bbox(
+	min_latitude, min_longitude, max_latitude, max_longitude, from_date=None, to_date=None, limit=500
+):
+	"""Fixes inside a bounding box, newest first"""
+	if min_latitude > max_latitude or min_longitude > max_longitude:
+		raise ValueError("Bounding box minimum must not exceed its maximum")
+
+	bbox = (min_latitude, min_longitude, max_latitude, max_longitude)
+	return _query(bbox, None, from_date, to_date, limit)
+
+
+def find_in_polygon(polygon, from_date=None, to_date=None, limit=500):
+	"""Fixes inside a polygon given as a list of `[lat, lng]` vertices, newest first"""
+	if not 3 <= len(polygon) <= MAX_POLYGON_VERTICES:
+		raise ValueError(f"A polygon needs between 3 and {MAX_POLYGON_VERTICES} vertices")
+
+	def refine(row):
+		return point_in_polygon(row.latitude, row.longitude, polygon)
+
+	return _query(polygon_bbox(polygon), refine, from_date, to_date, limit)
+
+
+def parse_polygon(polygon) -> list[tuple[float, float]]:
+	"""Validate a polygon from a request (JSON string or list of `[lat, lng]` pairs)"""
+	polygon = frappe.parse_json(polygon) if isinstance(polygon, str) else polygon
+	try:
+		vertices = [(float(lat), float(lng)) for lat, lng in polygon]
+	except (TypeError, ValueError):
+		raise ValueError("Polygon must be a list of [latitude, longitude] pairs")
+
+	if any(not (-90 <= lat <= 90 and -180 <= lng <= 180) for lat, lng in vertices):
+		raise ValueError("Polygon vertices must be valid coordinates")
+
+	return vertices
+
+
+def _query(bbox, refine, from_date, to_date, limit, table="tabUser Location Log"):
+	limit = min(int(limit), MAX_RESULTS)
+	if from_date or to_date:
+		return _query_history(bbox, refine, from_date, to_date, limit, table)
+
+	return _query_latest(bbox, refine, limit)
+
+
+def _bbox_conditions(bbox, geohash_column="geohash"):
+	"""SQL conditions and values selecting rows inside `bbox`, led by the geohash prefix filter"""
+	min_lat, min_lng, max_lat, max_lng = bbox
+	conditions = ["latitude BETWEEN %s AND %s", "longitude BETWEEN %s AND %s"]
+	values = [min_lat, max_lat, min_lng, max_lng]
+
+	prefixes = geohash_cover(*bbox)
+	if prefixes:
+		like_conditions = " OR ".join([f"{geohash_column} LIKE %s"] * len(prefixes))
+		conditions.insert(0, f"({like_conditions})")
+		values[:0] = [f"{prefix}%" for prefix in prefixes]
+
+	return conditions, values
+
+
+def _query_latest(bbox, refine, limit):
+	# One row per user, so the candidates always fit in memory
+	conditions, values = _bbox_conditions(bbox)
+	candidates = frappe.db.sql(
+		"""
+		SELECT location_log as name, user, full_name, latitude, longitude, accuracy_meters,
+			address, last_seen as creation
+		FROM `tabUser Last Location`
+		WHERE {conditions}
+		ORDER BY last_seen DESC
+		""".format(conditions=" AND ".join(conditions)),
+		values,
+		as_dict=True,
+	)
+
+	rows = [row for row in candidates if not refine or refine(row)]
+	return rows[:limit]
+
+
+def _query_history(bbox, refine, from_date, to_date, limit, table):
+	conditions, values = _bbox_conditions(bbox)
+	start, end = get_creation_range(from_date, to_date)
+	if start:
+		conditions.append("creation >= %s")
+		values.append(start)
+	if end:
+		conditions.append("creation <= %s")
+		values.append(end)
+
+	rows = []
+	cursor = None
+	while len(rows) < limit:
+		page_conditions = list(conditions)
+		page_values = list(values)
+		if cursor:
+			page_conditions.append("(creation < %s OR (creation = %s AND name < %s))")
+			page_values.extend([cursor.creation, cursor.creation, cursor.name])
+
+		candidates = frappe.db.sql(
+			"""
+			SELECT {fields}
+			FROM `{table}`
+			WHERE {conditions}
+			ORDER BY creation DESC, name DESC
+			LIMIT {chunk_size}
+			""".format(
+				fields=", ".join(RESULT_FIELDS),
+				table=table,
+				conditions=" AND ".join(page_conditions),
+				chunk_size=CANDIDATE_CHUNK_SIZE,
+			),
+			page_values,
+			as_dict=True,
+		)
+
+		rows.extend(row for row in candidates if not refine or refine(row))
+		if len(candidates) < CANDIDATE_CHUNK_SIZE:
+			break
+		cursor = candidates[-1]
+
+	return rows[:limit]
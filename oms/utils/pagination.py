@@ -0,0 +1,78 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Keyset (cursor) pagination for newest-first listings.
+
+A page is read with `WHERE key <= last AND (key < last OR tiebreak < last_tiebreak)`
+on an index leading with the sort key, so every page costs the same however
+deep it is, and rows inserted meanwhile never shift or repeat entries the way
+OFFSET paging does. Clients get the position as an opaque cursor string.
+"""
+
+import base64
+import json
+
+import frappe
+
+# Upper bound on rows per page
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values, source=None) -> str:
+	"""Opaque cursor for the sort key values of the last row on a page"""
+	payload = {"k": [str(value) if value is not None else None for value in values]}
+	if source:
+		payload["s"] = source
+	return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+	"""Return `(values, source)` from a cursor made by `encode_cursor`, or raise `ValueError`."""
+	try:
+		payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+		return payload["k"], payload.get("s")
+	except (TypeError, KeyError, ValueError):
+		raise ValueError("Invalid cursor")
+
+
+def clamp_page_size(limit) -> int:
+	return min(max(int(limit), 1), MAX_PAGE_SIZE)
+
+
+def fetch_page(table, fields, conditions, values, sort_columns=("creation", "name"), after=None, limit=100):
+	"""One page of `table`, newest first by the two `sort_columns`, starting after the `after` values.
+
+	`conditions` are SQL snippets using named placeholders from `values`. Returns
+	`(rows, has_more)`.
+	"""
+	limit = clamp_page_size(limit)
+	key, tiebreak = sort_columns
+	conditions = list(conditions)
+	values = dict(values)
+
+	if after:
+		conditions.append(
+			f"{key} <= %(after_key)s AND ({key} < %(after_key)s OR {tiebreak} < %(after_tiebreak)s)"
+		)
+		values["after_key"], values["after_tiebreak"] = after
+
+	rows = frappe.db.sql(
+		"""
+		SELECT {fields}
+		FROM `{table}`
+		{where}
+		ORDER BY {key} DESC, {tiebreak} DESC
+		LIMIT {limit}
+		""".format(
+			fields=fields,
+			table=table,
+			where=f"WHERE {' AND '.join(conditions)}" if conditions else "",
+			key=key,
+			tiebreak=tiebreak,
+			limit=limit + 1,
+		),
+		values,
+		as_dict=True,
+	)
+
+	return rows[:limit], len(rows) > limit
@@ -0,0 +1,46 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""OMS tunables, overridable per site through `site_config.json`.
+
+Each key is read from the site config with an `oms_` prefix, e.g.
+
+	bench --site <site> set-config oms_location_retention_days 180
+"""
+
+import frappe
+
+DEFAULTS = {
+	# Raw User Location Log rows older than this are rolled up into hourly summaries
+	# and deleted. 0 keeps raw history forever.
+	"location_retention_days": 90,
+	# Minimum seconds between realtime position pushes for the same user. 0 pushes every fix.
+	"location_push_interval": 10,
+	# Fixes closer than this to the user's last stored position are not stored. 0 disables the check.
+	"location_min_distance_meters": 20,
+	# ...unless this many seconds have passed since that position was stored
+	"location_keepalive_seconds": 900,
+	# Fixes less accurate than this are not stored. 0 accepts any accuracy.
+	"location_max_accuracy_meters": 0,
+	# "queue" makes the save endpoints push fixes onto a Redis list drained by a background
+	# job instead of inserting them in the request; "sync" inserts them directly
+	"location_ingest_mode": "sync",
+	# Past this many queued fixes the save endpoints insert synchronously again
+	"location_queue_max_depth": 50000,
+	# Record latency, query and payload metrics for every oms.api endpoint. 0 disables it.
+	"api_instrumentation": 1,
+	# Let managers profile single oms.api requests by passing `oms_profile=1`.
+	# "cprofile" or "pyinstrument" (if installed); empty disables profiling.
+	"api_profiler": "",
+	# Dotted path of the reverse geocoder filling in address and country after fixes are
+	# stored, e.g. "oms.utils.geocoding.nominatim_geocoder". Empty disables geocoding.
+	"geocoder": "",
+	# Fixes in the same geohash cell of this length (7 is about 150 m) share one lookup
+	"geocode_cell_precision": 7,
+	# Reverse endpoint used by `nominatim_geocoder`; point it at a self-hosted instance under load
+	"nominatim_url": "https://nominatim.openstreetmap.org/reverse",
+}
+
+
+def get_setting(key):
+	return frappe.conf.get(f"oms_{key}", DEFAULTS[key])
@@ -0,0 +1,106 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Serve the SPA shell (www/oms.html) for `/oms` and every `/oms/<path>` route.
+
+Frappe's template renderer reads and renders www/oms.html on every hit. The
+shell only varies by site and by the session's CSRF token, so each worker
+renders it once per site with a placeholder for the token and swaps the token
+in per request. The file's mtime is rechecked every few seconds (on every
+request in developer mode), so a new build is picked up without a restart.
+
+Responses carry an ETag and Last-Modified and are marked `private, no-cache`,
+so browsers revalidate on reload and get a 304 instead of the body when
+neither the build nor their session changed.
+"""
+
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import frappe
+from frappe.website.page_renderers.base_renderer import BaseRenderer
+from werkzeug.wrappers import Response
+
+SHELL_ROUTE = "oms"
+
+# Seconds between checks for a rebuilt shell
+SHELL_RECHECK_SECONDS = 5
+
+CSRF_TOKEN_TAG = "{{ frappe.session.csrf_token }}"
+CSRF_TOKEN_PLACEHOLDER = "__oms_csrf_token__"
+
+# Per-worker state: the shell source, its mtime and build id, and the shell rendered per site
+_shell = {"path": None, "mtime": None, "checked_at": 0, "build": None, "source": None, "rendered": {}}
+
+
+class SPAPageRenderer(BaseRenderer):
+	"""`page_renderer` hook for the SPA routes"""
+
+	def can_render(self):
+		return self.path == SHELL_ROUTE
+
+	def render(self):
+		shell = get_shell()
+		csrf_token = frappe.session.data.csrf_token or ""
+
+		response = Response(
+			shell["html"].replace(CSRF_TOKEN_PLACEHOLDER, csrf_token),
+			status=self.http_status_code or 200,
+			mimetype="text/html",
+		)
+		response.headers["Cache-Control"] = "private, no-cache"
+		response.headers["Vary"] = "Cookie"
+		response.set_etag(f"{shell['build']}-{hashlib.md5(csrf_token.encode()).hexdigest()[:12]}")
+		response.last_modified = shell["last_modified"]
+
+		return response.make_conditional(frappe.request)
+
+
+def get_shell() -> dict:
+	"""`{html, build, last_modified}` for the current site, re-reading www/oms.html only if it changed"""
+	_refresh_source()
+
+	site = frappe.local.site
+	html = _shell["rendered"].get(site)
+	if html is None:
+		source = _shell["source"].replace(CSRF_TOKEN_TAG, CSRF_TOKEN_PLACEHOLDER)
+		html = frappe.render_template(
+			source,
+			{"site_name": site, "socketio_port": frappe.conf.socketio_port},
+		)
+		_shell["rendered"][site] = html
+
+	return {
+		"html": html,
+		"build": _shell["build"],
+		"last_modified": datetime.fromtimestamp(int(_shell["mtime"]), tz=timezone.utc),
+	}
+
+
+def _refresh_source():
+	now = time.monotonic()
+	if (
+		_shell["source"] is not None
+		and not frappe.conf.developer_mode
+		and now - _shell["checked_at"] < SHELL_RECHECK_SECONDS
+	):
+		return
+
+	_shell["checked_at"] = now
+	path = _shell["path"] or frappe.get_app_path("oms", "www", "oms.html")
+	mtime = os.path.getmtime(path)
+	if mtime == _shell["mtime"]:
+		return
+
+	with open(path) as f:
+		source = f.read()
+
+	_shell.update(
+		path=path,
+		mtime=mtime,
+		source=source,
+		build=hashlib.md5(source.encode()).hexdigest()[:12],
+		rendered={},
+	)
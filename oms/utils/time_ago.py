@@ -0,0 +1,98 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Relative times ("5 minutes ago") for whole result pages at once.
+
+`add_time_ago` takes one "now" for the page, works on the datetimes the
+database already returned instead of re-parsing them, reuses the label
+strings across rows and sets the value on each row in place. With
+`epoch=True` it sets `epoch_ms` instead, for clients that format times
+themselves.
+"""
+
+import time
+from datetime import datetime
+
+from frappe.utils import get_datetime, now_datetime
+
+UNKNOWN = "Unknown"
+
+
+def add_time_ago(rows, fields=("creation", "timestamp"), now=None, epoch=False):
+	"""Set `time_ago` (or `epoch_ms`) on every row in `rows`, from the first of `fields` that is set."""
+	now = now or now_datetime()
+	now_epoch = time.time()
+	labels = {}
+
+	for row in rows:
+		value = next((row.get(field) for field in fields if row.get(field)), None)
+		seconds = _seconds_since(value, now)
+
+		if epoch:
+			row["epoch_ms"] = to_epoch_ms(value, now, now_epoch)
+			continue
+
+		label = labels.get(seconds)
+		if label is None:
+			label = labels[seconds] = format_time_ago(seconds)
+		row["time_ago"] = label
+
+	return rows
+
+
+def time_ago(timestamp, now=None) -> str:
+	"""Relative time of a single timestamp"""
+	return format_time_ago(_seconds_since(timestamp, now or now_datetime()))
+
+
+def to_epoch_ms(value, now=None, now_epoch=None):
+	"""Milliseconds since the Unix epoch of a naive server-time `value`, or None if unparseable.
+
+	Clients get an unambiguous instant instead of a server-local string they would
+	parse in the browser's time zone.
+	"""
+	value = _to_datetime(value)
+	if value is None:
+		return None
+
+	now = now or now_datetime()
+	now_epoch = time.time() if now_epoch is None else now_epoch
+	return int((now_epoch - (now - value).total_seconds()) * 1000)
+
+
+def format_time_ago(seconds) -> str:
+	if seconds is None:
+		return UNKNOWN
+
+	days, seconds = divmod(seconds, 86400)
+	if days > 0:
+		return f"{days} day{'s' if days > 1 else ''} ago"
+	if seconds > 3600:
+		hours = seconds // 3600
+		return f"{hours} hour{'s' if hours > 1 else ''} ago"
+	if seconds > 60:
+		minutes = seconds // 60
+		return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
+	return "Just now"
+
+
+def _seconds_since(value, now):
+	"""Whole seconds from `value` to `now` (0 for times in the future), or None if unparseable"""
+	value = _to_datetime(value)
+	if value is None:
+		return None
+
+	return max(int((now - value).total_seconds()), 0)
+
+
+def _to_datetime(value):
+	if not value:
+		return None
+
+	if isinstance(value, datetime):
+		return value
+
+	try:
+		return get_datetime(value)
+	except Exception:
+		return None
@@ -0,0 +1,150 @@
+# Copyright (c) 2025, HnS and contributors
+# For license information, please see license.txt
+
+"""Cached User + Employee profile lookups shared by the OMS APIs.
+
+Profiles are stored in a Redis hash keyed by user id, read for a whole result
+set with one HMGET and fetched with a single `IN (...)` query on a cache miss. Entries are dropped by
+the User and Employee `doc_events` registered in hooks.py.
+"""
+
+import pickle
+
+import frappe
+
+USER_PROFILE_CACHE_KEY = "oms:user_profile"
+
+PROFILE_FIELDS = (
+	"user_id",
+	"full_name",
+	"email",
+	"user_image",
+	"employee",
+	"employee_name",
+	"designation",
+	"department",
+	"company",
+)
+
+
+def get_user_profile(user) -> dict:
+	"""Profile for a single user; see `get_user_profiles`."""
+	return get_user_profiles([user]).get(user) or {}
+
+
+def get_user_profiles(users) -> dict:
+	"""Return `{user: profile}` for every user in `users`, hitting the database at most once.
+
+	Users without an Employee record get the Employee keys set to None. Unknown
+	users are left out of the result.
+	"""
+	users = [user for user in dict.fromkeys(users) if user]
+	if not users:
+		return {}
+
+	profiles = {}
+	missing = []
+	for user, profile in zip(users, _get_cached_profiles(users), strict=True):
+		if profile is None:
+			missing.append(user)
+		else:
+			profiles[user] = profile
+
+	if missing:
+		fetched = {profile["user_id"]: profile for profile in _fetch_profiles(missing)}
+		_cache_profiles(fetched)
+		profiles.update(fetched)
+
+	return profiles
+
+
+def _get_cached_profiles(users) -> list:
+	# One HMGET for the whole list, through the raw pipeline since `frappe.cache` only wraps HGET.
+	# Values are pickled the way `frappe.cache.hset` stores them.
+	pipeline = frappe.cache.pipeline()
+	pipeline.hmget(frappe.cache.make_key(USER_PROFILE_CACHE_KEY), users)
+	(values,) = pipeline.execute()
+	return [pickle.loads(value) if value is not None else None for value in values]
+
+
+def _cache_profiles(profiles):
+	if not profiles:
+		return
+
+	pipeline = frappe.cache.pipeline()
+	pipeline.hset(
+		frappe.cache.make_key(USER_PROFILE_CACHE_KEY),
+		mapping={user: pickle.dumps(profile) for user, profile in profiles.items()},
+	)
+	pipeline.execute()
+
+
+def get_department_users(department) -> list[str]:
+	"""Users linked to an Employee in `department`"""
+	return frappe.get_all(
+		"Employee",
+		filters={"department": department, "user_id": ["is", "set"]},
+		pluck="user_id",
+	)
+
+
+def _fetch_profiles(users):
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			u.name as user_id,
+			u.full_name,
+			u.email,
+			u.user_image,
+			e.name as employee,
+			e.employee_name,
+			e.designation,
+			e.department,
+			e.company
+		FROM `tabUser` u
+		LEFT JOIN `tabEmployee` e ON e.user_id = u.name
+		WHERE u.name IN %(users)s
+		ORDER BY e.creation
+		""",
+		{"users": users},
+		as_dict=True,
+	)
+
+	# A user linked to several Employee records keeps the oldest one
+	seen = set()
+	for row in rows:
+		if row.user_id in seen:
+			continue
+		seen.add(row.user_id)
+		yield {field: row.get(field) for field in PROFILE_FIELDS}
+
+
+def clear_user_profile_cache(users=None):
+	"""Drop cached profiles for `users`, or every cached profile if none are given."""
+	if users is None:
+		frappe.cache.delete_value(USER_PROFILE_CACHE_KEY)
+		return
+
+	for user in users:
+		if user:
+			frappe.cache.hdel(USER_PROFILE_CACHE_KEY, user)
+
+
+def on_user_change(doc, method=None):
+	"""`doc_events` handler for User"""
+	clear_user_profile_cache([doc.name])
+
+
+def on_user_rename(doc, method=None, old=None, new=None, merge=False):
+	"""`doc_events` handler for User renames"""
+	clear_user_profile_cache([old, new])
+
+
+def on_employee_change(doc, method=None, *args, **kwargs):
+	"""`doc_events` handler for Employee; clears both the old and new linked user"""
+	users = [doc.get("user_id")]
+	previous = doc.get_doc_before_save()
+	if previous:
+		users.append(previous.get("user_id"))
+
+	clear_user_profile_cache(users)
@@ -1,18 +1,14 @@
 # oms.py
 import frappe
-import os
+
+# Normally served by oms.utils.spa.SPAPageRenderer (see `page_renderer` in hooks.py),
+# which caches the rendered shell; this context is only used if that renderer is bypassed.
 
 def get_context(context):
     context.no_cache = 1
     context.no_sidebar = 1
     context.no_breadcrumbs = 1
-
-    vue_index_path = frappe.get_app_path("oms", "public", "oms", "index.html")
-
-    if os.path.exists(vue_index_path):
-        with open(vue_index_path, "r") as f:
-            context.content = f.read()
-    else:
-        context.content = "<h1>Vue frontend not found. Run `npm run build` in the frontend folder.</h1>"
+    context.site_name = frappe.local.site
+    context.socketio_port = frappe.conf.socketio_port
 
     return context